@@ -0,0 +1,80 @@
+"""Prompt size benchmark for long dialogue sessions.
+
+Plays a 100-turn conversation through a session and reports the prompt tokens
+of the dialogue request at several turns, with the LLM summary stubbed out.
+Without summarization the prompt grows with every turn; with it, the prompt
+stays within the context budget.
+
+Run with:
+    poetry run python benchmarks/bench_dialogue_context.py [turns]
+"""
+
+import sys
+from unittest.mock import patch
+
+from tutor.llm.tokens import count_tokens
+from tutor.web import context
+from tutor.web.app import (
+    DialogueResponse,
+    _get_dialogue_messages,
+    record_turn,
+    start_session,
+)
+from tutor.web.sessions import SessionStore
+
+
+def _stub_summarize(sessions, session) -> None:
+    session.summary = "The student and the tutor have been chatting about work. " * 4
+    session.summarized_messages = (
+        len(session.messages) - context.DIALOGUE_RECENT_MESSAGES
+    )
+
+
+def _prompt_tokens(session, user_response: str) -> int:
+    messages = _get_dialogue_messages(session, user_response)
+    return sum(count_tokens(message["content"]) for message in messages)
+
+
+def _run(turns: int, summarize: bool) -> dict:
+    sessions = SessionStore()
+    session = sessions.get(start_session(sessions, "work")["session_id"])
+    reply = DialogueResponse(
+        next_line_zh="那你周末一般喜欢做什么呢？有没有什么特别的安排？",
+        next_line_pinyin="nà nǐ zhōu mò yì bān xǐ huān zuò shén me ne?",
+        next_line_en="So what do you usually like to do on weekends?",
+    )
+
+    tokens = {}
+    for turn in range(1, turns + 1):
+        user_response = (
+            f"我第{turn}次跟你说，我周末喜欢去公园散步，然后跟朋友一起吃饭。"
+        )
+        tokens[turn] = _prompt_tokens(session, user_response)
+        if summarize:
+            record_turn(sessions, session, user_response, reply)
+            if context.needs_summary(session):
+                _stub_summarize(sessions, session)
+        else:
+            session.add_turn("user", user_response)
+            session.add_turn("tutor", reply.next_line_zh, reply.model_dump_json())
+    return tokens
+
+
+def main(turns: int = 100) -> None:
+    # Summaries are applied synchronously above instead of in the background
+    with (
+        patch("tutor.web.app.maybe_summarize"),
+        patch("tutor.web.app.review_in_background"),
+    ):
+        unbounded = _run(turns, summarize=False)
+        bounded = _run(turns, summarize=True)
+
+    print(f"{'turn':>6} {'full history':>14} {'summarized':>12}  (prompt tokens)")
+    for turn in sorted({1, 10, 25, 50, 75, turns}):
+        if turn <= turns:
+            print(f"{turn:>6} {unbounded[turn]:>14} {bounded[turn]:>12}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100)
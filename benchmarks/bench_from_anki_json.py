@@ -0,0 +1,49 @@
+"""Benchmark for materializing flashcards from Anki note JSON.
+
+Run with:
+    poetry run python benchmarks/bench_from_anki_json.py [num_notes]
+"""
+
+import sys
+import time
+
+from tutor.llm.models import LanguageFlashcard
+
+
+def _make_note(note_id: int) -> dict:
+    return {
+        "noteId": note_id,
+        "modelName": "chinese-tutor-mandarin",
+        "fields": {
+            "Chinese": {"value": "学习"},
+            "Pinyin": {"value": "xué xí"},
+            "English": {"value": "to study, to learn"},
+            "Sample Usage": {"value": "我每天学习中文。"},
+            "Sample Usage (English)": {"value": "I study Chinese every day."},
+            "Related Words": {
+                "value": "• 教育 (jiào yù) - education [related field]\n"
+                "• 考试 (kǎo shì) - exam [common context]\n"
+                "• 复习 (fù xí) - to review [similar usage]"
+            },
+        },
+    }
+
+
+def main(num_notes: int = 20_000, repeat: int = 5) -> None:
+    notes = [_make_note(i) for i in range(num_notes)]
+
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        flashcards = [LanguageFlashcard.from_anki_json(note) for note in notes]
+        elapsed = min(elapsed, time.process_time() - start)
+
+    assert len(flashcards) == num_notes
+    print(
+        f"Loaded {num_notes} notes in {elapsed * 1000:.1f}ms CPU (best of {repeat}) "
+        f"({elapsed / num_notes * 1e6:.2f}us/note)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
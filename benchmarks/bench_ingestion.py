@@ -0,0 +1,321 @@
+"""Throughput benchmarks for flashcard ingestion, against stub backends.
+
+Runs the CLI's ingestion paths end to end with the LLM replaced by
+StubLLMServer, Anki by FakeAnkiConnect and Azure TTS by a function that only
+waits, and reports cards per second for each deck size:
+
+- generate: `ct g` for a batch of new words (_generate_flashcard_from_word_impl)
+- add: adding a batch of generated flashcards (maybe_add_flashcards_to_deck)
+- fix: `ct fix-cards` over the whole deck (_fix_cards_impl); one card in ten
+  needs regenerating, the rest only need audio
+
+plus micro-benchmarks of LanguageFlashcard.from_anki_json and
+_parse_related_words. Results are written as JSON; pass an earlier run to
+--compare to see the change against another branch.
+
+Run with:
+    poetry run python benchmarks/bench_ingestion.py [--sizes 100,1000,10000] [--batch 100]
+        [--llm-ttft 0] [--tts-latency 0] [--anki-latency 0]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import hashlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from contextlib import ExitStack, redirect_stdout
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import click
+
+from bench_from_anki_json import _make_note
+from bench_related_words import _make_text
+from stub_llm import StubLLMServer
+from tutor.cli_global_state import set_model, set_skip_confirm, set_structured_outputs
+from tutor.commands.fix_cards import _fix_cards_impl
+from tutor.commands.generate_flashcard_from_word import (
+    _generate_flashcard_from_word_impl,
+)
+from tutor.llm.models import LanguageFlashcard, MandarinFlashcard, MandarinRelatedWord
+from tutor.llm_flashcards import maybe_add_flashcards_to_deck
+from tutor.utils.anki import ANKI_CONNECT_URL_ENV
+from tutor.utils.fake_anki import FakeAnkiConnect
+
+DECK = "Benchmark"
+MODEL_NAME = "chinese-tutor-mandarin"
+MODEL_FIELDS = MandarinFlashcard.get_required_anki_fields() + ["Related Words"]
+
+_WORD_RE = re.compile(r"for the word/phrase (\S+?)\. ")
+_RELATED_WORDS = (
+    "• 教育 (jiào yù) - education [related field]\n"
+    "• 考试 (kǎo shì) - exam [common context]"
+)
+
+
+def _word(i: int) -> str:
+    """A distinct two-character word for each i below 20,000."""
+    return chr(0x4E00 + i // 200) + chr(0x4E00 + 200 + i % 200)
+
+
+def _flashcard_json(request: dict) -> str:
+    """Answer a flashcard prompt with a flashcard for the word it asks about."""
+    match = _WORD_RE.search(request["messages"][-1]["content"])
+    word = match.group(1) if match else "学习"
+    return json.dumps(_flashcard(word).model_dump(), ensure_ascii=False)
+
+
+def _flashcard(word: str) -> MandarinFlashcard:
+    return MandarinFlashcard(
+        word=word,
+        pinyin="xué xí",
+        english="to study, to learn",
+        sample_usage=f"我每天{word}中文。",
+        sample_usage_english="I study Chinese every day.",
+        related_words=[
+            MandarinRelatedWord(
+                word="教育", pinyin="jiào yù", english="education", relationship="field"
+            )
+        ],
+    )
+
+
+def _seed_deck(anki: FakeAnkiConnect, size: int) -> None:
+    """Fill the deck with complete cards, except that fix has work to do.
+
+    Every card lacks its word audio, and one in ten lacks its sample usage.
+    """
+    anki.clear_notes()
+    for i in range(size):
+        word = _word(i)
+        anki.add_note(
+            DECK,
+            MODEL_NAME,
+            {
+                "Chinese": word,
+                "Pinyin": "xué xí",
+                "English": "to study, to learn",
+                "Sample Usage": "" if i % 10 == 0 else f"我每天{word}中文。",
+                "Sample Usage (English)": "I study Chinese every day.",
+                "Sample Usage (Audio)": "[sound:sample.wav]",
+                "Related Words": _RELATED_WORDS,
+            },
+        )
+
+
+def _stub_text_to_speech(latency: float) -> Callable[[str, str], str]:
+    def text_to_speech(text: str, language: str) -> str:
+        if latency:
+            time.sleep(latency)
+        return f"chinese-tutor-{hashlib.md5(text.encode()).hexdigest()}.wav"
+
+    return text_to_speech
+
+
+def _measure(name: str, size: int, items: int, run: Callable[[], None]) -> dict:
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+    result = {
+        "benchmark": name,
+        "deck_size": size,
+        "items": items,
+        "seconds": seconds,
+        "items_per_second": items / seconds,
+    }
+    print(
+        f"{name:<16} {size:>7} {items:>7} {seconds:>9.3f} "
+        f"{result['items_per_second']:>12.1f}"
+    )
+    return result
+
+
+def _best_of(repeat: int, run: Callable[[], None]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _micro_benchmarks(num_items: int) -> List[dict]:
+    notes = [_make_note(i) for i in range(num_items)]
+    text = _make_text(num_items)
+    results = []
+    for name, run in (
+        (
+            "from_anki_json",
+            lambda: [LanguageFlashcard.from_anki_json(note) for note in notes],
+        ),
+        (
+            "parse_related",
+            lambda: LanguageFlashcard._parse_related_words(
+                text, MandarinRelatedWord, "pinyin"
+            ),
+        ),
+    ):
+        seconds = _best_of(5, run)
+        results.append(
+            {
+                "benchmark": name,
+                "deck_size": None,
+                "items": num_items,
+                "seconds": seconds,
+                "items_per_second": num_items / seconds,
+            }
+        )
+        print(
+            f"{name:<16} {'-':>7} {num_items:>7} {seconds:>9.3f} "
+            f"{num_items / seconds:>12.1f}"
+        )
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(results: List[dict], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {
+            (r["benchmark"], r["deck_size"], r["items"]): r
+            for r in json.load(f)["results"]
+        }
+    print(f"\nChange against {baseline_path}:")
+    for result in results:
+        before = baseline.get(
+            (result["benchmark"], result["deck_size"], result["items"])
+        )
+        if before is None:
+            continue
+        ratio = result["items_per_second"] / before["items_per_second"]
+        print(
+            f"{result['benchmark']:<16} {str(result['deck_size'] or '-'):>7} "
+            f"{before['items_per_second']:>10.1f} -> "
+            f"{result['items_per_second']:>10.1f}/s ({ratio:.2f}x)"
+        )
+
+
+@click.command()
+@click.option("--sizes", default="100,1000,10000", help="Comma-separated deck sizes")
+@click.option("--batch", default=100, help="Words per generate and add run")
+@click.option("--llm-ttft", default=0.0, help="Stub LLM seconds to first token")
+@click.option("--tts-latency", default=0.0, help="Stub TTS seconds per synthesis")
+@click.option(
+    "--anki-latency", default=0.0, help="Fake AnkiConnect seconds per request"
+)
+@click.option("--output", type=click.Path(dir_okay=False), help="Write results as JSON")
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Results JSON from an earlier run to compare with",
+)
+def main(sizes, batch, llm_ttft, tts_latency, anki_latency, output, compare):
+    """Benchmark flashcard ingestion against stub LLM, TTS and Anki backends."""
+    deck_sizes = [int(size) for size in sizes.split(",")]
+    set_model("gpt-4o")
+    set_structured_outputs(True)
+    set_skip_confirm(True)
+
+    results: List[Dict] = []
+    with ExitStack() as stack:
+        llm = stack.enter_context(
+            StubLLMServer(ttft=llm_ttft, tokens_per_second=1e9, content=_flashcard_json)
+        )
+        os.environ["OPENAI_BASE_URL"] = llm.base_url
+        os.environ["OPENAI_API_KEY"] = "stub"
+
+        anki = stack.enter_context(FakeAnkiConnect(latency=anki_latency))
+        anki.add_model(MODEL_NAME, MODEL_FIELDS)
+        anki.decks[DECK] = 2
+        os.environ[ANKI_CONNECT_URL_ENV] = anki.address
+
+        tts = _stub_text_to_speech(tts_latency)
+        stack.enter_context(patch("tutor.utils.azure.text_to_speech", tts))
+        stack.enter_context(patch("tutor.commands.fix_cards.text_to_speech", tts))
+        # Stand in for the user's config file
+        stack.enter_context(
+            patch(
+                "tutor.utils.config._config",
+                SimpleNamespace(
+                    default_deck=DECK,
+                    default_language="mandarin",
+                    learner_level="intermediate",
+                ),
+            )
+        )
+
+        print(
+            f"{'benchmark':<16} {'deck':>7} {'cards':>7} {'seconds':>9} {'cards/s':>12}"
+        )
+        for size in deck_sizes:
+            # New words come after the ones already in the deck
+            new_words = tuple(_word(size + i) for i in range(batch))
+
+            _seed_deck(anki, size)
+            results.append(
+                _measure(
+                    "generate",
+                    size,
+                    batch,
+                    lambda: _generate_flashcard_from_word_impl(DECK, new_words),
+                )
+            )
+
+            _seed_deck(anki, size)
+            flashcards = [_flashcard(word) for word in new_words]
+            results.append(
+                _measure(
+                    "add",
+                    size,
+                    batch,
+                    lambda: maybe_add_flashcards_to_deck(flashcards, DECK, False),
+                )
+            )
+
+            _seed_deck(anki, size)
+            results.append(_measure("fix", size, size, lambda: _fix_cards_impl(DECK)))
+
+    results.extend(_micro_benchmarks(max(deck_sizes)))
+
+    if compare:
+        _compare(results, compare)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(
+                {
+                    "revision": _git_revision(),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "config": {
+                        "sizes": deck_sizes,
+                        "batch": batch,
+                        "llm_ttft": llm_ttft,
+                        "tts_latency": tts_latency,
+                        "anki_latency": anki_latency,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark for parsing LLM flashcard responses.
+
+Compares the cached validate_json path against building a TypeAdapter and
+running json.loads on every response.
+
+Run with:
+    poetry run python benchmarks/bench_parse_flashcards.py [num_responses]
+"""
+
+import json
+import sys
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from tutor.llm.models import MandarinFlashcard, parse_flashcards_json
+
+_RESPONSE = json.dumps(
+    {
+        "word": "学习",
+        "pinyin": "xué xí",
+        "english": "to study, to learn",
+        "sample_usage": "我每天学习中文。",
+        "sample_usage_english": "I study Chinese every day.",
+        "related_words": [
+            {
+                "word": "教育",
+                "pinyin": "jiào yù",
+                "english": "education",
+                "relationship": "related field",
+            },
+            {
+                "word": "考试",
+                "pinyin": "kǎo shì",
+                "english": "exam",
+                "relationship": "common context",
+            },
+        ],
+    },
+    ensure_ascii=False,
+)
+
+
+def _parse_uncached(response: str) -> List[MandarinFlashcard]:
+    response_data = json.loads(response)
+    adapter = TypeAdapter(List[MandarinFlashcard])
+    return adapter.validate_python([response_data])
+
+
+def _parse_cached(response: str) -> List[MandarinFlashcard]:
+    return parse_flashcards_json(response, MandarinFlashcard)
+
+
+def main(num_responses: int = 2_000) -> None:
+    for name, parse in (("uncached", _parse_uncached), ("cached", _parse_cached)):
+        start = time.perf_counter()
+        for _ in range(num_responses):
+            parse(_RESPONSE)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name}: {elapsed / num_responses * 1e6:.1f}us/card "
+            f"over {num_responses} responses"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
@@ -0,0 +1,41 @@
+"""Micro-benchmark for parsing the "Related Words" Anki field.
+
+Run with:
+    poetry run python benchmarks/bench_related_words.py [num_lines]
+"""
+
+import sys
+import time
+
+from tutor.llm.models import LanguageFlashcard, MandarinRelatedWord
+
+_SAMPLE_LINES = [
+    "• 教育 (jiào yù) - education [related field]",
+    "- 考试 (kǎo shì) - exam [common context]",
+    "学习 (xué xí) - to study (formal) [similar usage]",
+    "• 松弛感 (sōng chí gǎn) - sense of ease [commonly paired]",
+]
+
+
+def _make_text(num_lines: int) -> str:
+    return "\n".join(_SAMPLE_LINES[i % len(_SAMPLE_LINES)] for i in range(num_lines))
+
+
+def main(num_lines: int = 100_000) -> None:
+    text = _make_text(num_lines)
+
+    start = time.perf_counter()
+    related_words = LanguageFlashcard._parse_related_words(
+        text, MandarinRelatedWord, "pinyin"
+    )
+    elapsed = time.perf_counter() - start
+
+    assert len(related_words) == num_lines
+    print(
+        f"Parsed {num_lines} related word lines in {elapsed * 1000:.1f}ms "
+        f"({elapsed / num_lines * 1e6:.2f}us/line)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,73 @@
+"""Concurrency benchmark for the async dialogue server.
+
+Runs many dialogue sessions at once against the ASGI app, with the LLM replaced
+by a stub that sleeps for a fixed latency. If requests don't block each other,
+the total time stays close to turns * latency however many sessions there are.
+
+Run with:
+    poetry run python benchmarks/bench_web_concurrency.py [sessions] [turns] [latency_s]
+"""
+
+import asyncio
+import sys
+import time
+from unittest.mock import patch
+
+from tutor.web.app import DialogueResponse
+from tutor.web.async_app import create_async_app
+
+
+def _make_stub_llm(latency: float):
+    async def stub_dialogue_response(session, user_response):
+        await asyncio.sleep(latency)
+        return DialogueResponse(
+            next_line_zh="好的，让我们继续",
+            next_line_pinyin="hǎo de, ràng wǒ men jì xù",
+            next_line_en="Okay, let's continue",
+        )
+
+    return stub_dialogue_response
+
+
+async def _run_session(client, turns: int) -> None:
+    response = await client.post("/api/start-dialogue", json={"scenario": "work"})
+    session_id = (await response.get_json())["session_id"]
+    for turn in range(turns):
+        await client.post(
+            "/api/respond",
+            json={"session_id": session_id, "response": f"第{turn}句"},
+        )
+
+
+async def _run(sessions: int, turns: int) -> float:
+    client = create_async_app().test_client()
+    start = time.perf_counter()
+    await asyncio.gather(*(_run_session(client, turns) for _ in range(sessions)))
+    return time.perf_counter() - start
+
+
+def main(sessions: int = 500, turns: int = 3, latency: float = 1.0) -> None:
+    with (
+        patch(
+            "tutor.web.async_app.get_dialogue_response_async",
+            side_effect=_make_stub_llm(latency),
+        ),
+        patch("tutor.web.app.review_in_background"),
+    ):
+        elapsed = asyncio.run(_run(sessions, turns))
+
+    requests = sessions * turns
+    print(
+        f"{sessions} concurrent sessions x {turns} turns at {latency}s LLM latency: "
+        f"{elapsed:.2f}s total (ideal {turns * latency:.2f}s), "
+        f"{requests / elapsed:.0f} requests/s"
+    )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        int(args[0]) if len(args) > 0 else 500,
+        int(args[1]) if len(args) > 1 else 3,
+        float(args[2]) if len(args) > 2 else 1.0,
+    )
@@ -0,0 +1,251 @@
+"""Load test for the dialogue web API.
+
+Serves the web app on a local port with the LLM replaced by StubLLMServer, then
+replays dialogue sessions from concurrent virtual users: start a dialogue, send
+a number of turns, and ask for the review. Reports p50/p95/p99 latency for each
+endpoint, overall throughput, and the process's peak memory. Background work
+the app does per turn (reviews, summaries) runs against the stub too.
+
+Run with:
+    poetry run python benchmarks/bench_web_load.py [--users 20] [--sessions 3] [--turns 5]
+        [--ttft 0.3] [--tokens-per-second 50] [--stream] [--async] [--output results.json]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import click
+import requests
+
+from stub_llm import StubLLMServer
+from tutor.cli_global_state import set_model
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_USER_LINES = [
+    "我周末想去爬山。",
+    "你有什么推荐的地方吗？",
+    "我比较喜欢安静一点的。",
+    "那我们一起去吧！",
+    "好的，到时候见。",
+]
+
+
+class _Recorder:
+    """Collects request latencies per endpoint from many threads."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            if ok:
+                self.latencies[endpoint].append(seconds)
+            else:
+                self.errors[endpoint] += 1
+
+
+def _post(http, recorder, base_url: str, endpoint: str, payload: dict) -> dict:
+    start = time.perf_counter()
+    response = http.post(f"{base_url}{endpoint}", json=payload)
+    recorder.record(endpoint, time.perf_counter() - start, response.ok)
+    return response.json() if response.ok else {}
+
+
+def _post_stream(http, recorder, base_url: str, payload: dict) -> None:
+    endpoint = "/api/respond-stream"
+    start = time.perf_counter()
+    first_token = None
+    with http.post(f"{base_url}{endpoint}", json=payload, stream=True) as response:
+        # chunk_size=None yields data as soon as it arrives
+        for line in response.iter_lines(chunk_size=None):
+            if first_token is None and line.startswith(b"data: "):
+                first_token = time.perf_counter() - start
+    recorder.record(endpoint, time.perf_counter() - start, response.ok)
+    if first_token is not None:
+        recorder.record(f"{endpoint} (first event)", first_token)
+
+
+def _run_user(
+    base_url: str, recorder: _Recorder, sessions: int, turns: int, stream: bool
+):
+    http = requests.Session()
+    for _ in range(sessions):
+        data = _post(
+            http, recorder, base_url, "/api/start-dialogue", {"scenario": "work"}
+        )
+        session_id = data.get("session_id")
+        for turn in range(turns):
+            payload = {
+                "session_id": session_id,
+                "response": _USER_LINES[turn % len(_USER_LINES)],
+            }
+            if stream:
+                _post_stream(http, recorder, base_url, payload)
+            else:
+                _post(http, recorder, base_url, "/api/respond", payload)
+        _post(http, recorder, base_url, "/api/review", {"session_id": session_id})
+
+
+def _serve_flask(app) -> tuple:
+    from werkzeug.serving import make_server
+
+    # Don't log every request
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+def _serve_async(app) -> tuple:
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.accesslog = None
+    shutdown = threading.Event()
+    loop = asyncio.new_event_loop()
+
+    def run():
+        loop.run_until_complete(
+            serve(
+                app,
+                config,
+                shutdown_trigger=lambda: loop.run_in_executor(None, shutdown.wait),
+            )
+        )
+
+    threading.Thread(target=run, daemon=True).start()
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/api/scenarios", timeout=1)
+            break
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    return base_url, shutdown.set
+
+
+def _peak_memory_mb() -> float:
+    if resource is None:
+        return float("nan")
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _summarize(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    if len(ordered) > 1:
+        percentiles = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+    else:
+        p50 = p95 = p99 = ordered[0]
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "p99_ms": p99 * 1000,
+    }
+
+
+@click.command()
+@click.option("--users", default=20, help="Concurrent virtual users")
+@click.option("--sessions", default=3, help="Dialogue sessions per user")
+@click.option("--turns", default=5, help="Turns per session")
+@click.option("--ttft", default=0.3, help="Stub LLM seconds to first token")
+@click.option("--tokens-per-second", default=50.0, help="Stub LLM generation rate")
+@click.option("--stream", is_flag=True, help="Use /api/respond-stream for turns")
+@click.option("--async", "use_async", is_flag=True, help="Load test the ASGI app")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write results as JSON")
+def main(users, sessions, turns, ttft, tokens_per_second, stream, use_async, output):
+    """Load test the dialogue web API against a stub LLM."""
+    with StubLLMServer(ttft=ttft, tokens_per_second=tokens_per_second) as llm:
+        os.environ["OPENAI_BASE_URL"] = llm.base_url
+        os.environ["OPENAI_API_KEY"] = "stub"
+        set_model("gpt-4o")
+
+        if use_async:
+            from tutor.web.async_app import create_async_app
+
+            base_url, shutdown = _serve_async(create_async_app())
+        else:
+            from tutor.web.app import create_app
+
+            base_url, shutdown = _serve_flask(create_app())
+
+        recorder = _Recorder()
+        memory_before = _peak_memory_mb()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            for future in [
+                executor.submit(_run_user, base_url, recorder, sessions, turns, stream)
+                for _ in range(users)
+            ]:
+                future.result()
+        elapsed = time.perf_counter() - start
+        shutdown()
+        llm_calls = llm.calls
+
+    results = {
+        "config": {
+            "users": users,
+            "sessions": sessions,
+            "turns": turns,
+            "ttft": ttft,
+            "tokens_per_second": tokens_per_second,
+            "stream": stream,
+            "async": use_async,
+        },
+        "elapsed_s": elapsed,
+        "requests": sum(len(v) for k, v in recorder.latencies.items() if "(" not in k),
+        "llm_calls": llm_calls,
+        "peak_memory_mb": _peak_memory_mb(),
+        "memory_growth_mb": _peak_memory_mb() - memory_before,
+        "endpoints": {
+            endpoint: {**_summarize(latencies), "errors": recorder.errors[endpoint]}
+            for endpoint, latencies in sorted(recorder.latencies.items())
+        },
+    }
+    results["throughput_rps"] = results["requests"] / elapsed
+
+    print(
+        f"{'endpoint':<34} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for endpoint, stats in results["endpoints"].items():
+        print(
+            f"{endpoint:<34} {stats['count']:>6} {stats['errors']:>6} "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+    print(
+        f"\n{results['requests']} requests in {elapsed:.2f}s "
+        f"({results['throughput_rps']:.1f} requests/s), {llm_calls} LLM calls, "
+        f"peak memory {results['peak_memory_mb']:.0f} MB "
+        f"(+{results['memory_growth_mb']:.0f} MB during the run)"
+    )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Local stand-in for the OpenAI Chat Completions API, used by the benchmarks.
+
+StubLLMServer serves POST /v1/chat/completions over HTTP, so the code under
+test runs unchanged with OPENAI_BASE_URL pointed at it. Each response waits for
+a configurable time to first token and then "generates" at a configurable
+token rate, streamed or not. Responses are canned, but valid for each kind of
+request the web app makes; pass a content function to answer other requests.
+
+Import it from another benchmark script with:
+    from stub_llm import StubLLMServer
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+from tutor.llm.tokens import count_tokens
+
+# Roughly how many characters of a response each streamed chunk carries
+CHUNK_CHARS = 4
+
+_CANNED_RESPONSES: Dict[str, dict] = {
+    "ConversationReview": {
+        "grammar_feedback": [
+            {
+                "original": "我要去爬山",
+                "correction": "我打算去爬山",
+                "explanation": "打算 sounds more natural for plans.",
+                "example": "我周末打算去看电影。",
+            }
+        ],
+        "vocabulary_review": [
+            {
+                "word": "爬山",
+                "pinyin": "pá shān",
+                "meaning": "to hike",
+                "usage_note": "Used for hiking up mountains or hills.",
+            }
+        ],
+    },
+    "ScenarioOpener": {
+        "situation_zh": "你在医院看病",
+        "situation_en": "You are seeing a doctor",
+        "initial_line_zh": "你哪里不舒服？",
+        "initial_line_pinyin": "nǐ nǎ lǐ bù shū fu?",
+        "initial_line_en": "What's bothering you?",
+    },
+}
+
+_DIALOGUE_RESPONSE = {
+    "next_line_zh": "那你周末一般喜欢做什么呢？有没有什么特别的安排？",
+    "next_line_pinyin": "nà nǐ zhōu mò yì bān xǐ huān zuò shén me ne? yǒu méi yǒu shén me tè bié de ān pái?",
+    "next_line_en": "So what do you usually like to do on weekends? Any special plans?",
+}
+
+_SUMMARY = "The student and the tutor have been chatting about weekend plans."
+
+
+def default_content(request: dict) -> str:
+    """Pick a canned response for a chat completion request from the web app."""
+    response_format = request.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        name = response_format["json_schema"]["name"]
+        return json.dumps(_CANNED_RESPONSES[name], ensure_ascii=False)
+    if response_format.get("type") == "json_object":
+        return json.dumps(_DIALOGUE_RESPONSE, ensure_ascii=False)
+    return _SUMMARY
+
+
+class StubLLMServer:
+    """An in-process HTTP server imitating the Chat Completions API.
+
+    Use as a context manager; base_url is the value for OPENAI_BASE_URL.
+
+    Args:
+        ttft: Seconds before the first token of a response
+        tokens_per_second: Generation rate after the first token
+        content: Function from the request body to the response content
+    """
+
+    def __init__(
+        self,
+        ttft: float = 0.3,
+        tokens_per_second: float = 50.0,
+        content: Callable[[dict], str] = default_content,
+    ) -> None:
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.content = content
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def __enter__(self) -> "StubLLMServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; don't let Nagle's
+            # algorithm hold back the body on kept-alive connections
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._calls_lock:
+                    stub.calls += 1
+                if body.get("stream"):
+                    stub._stream(self, body)
+                else:
+                    stub._respond(self, body)
+
+        return Handler
+
+    def _usage(self, request: dict, content: str) -> dict:
+        prompt_tokens = sum(
+            count_tokens(message.get("content") or "")
+            for message in request["messages"]
+        )
+        completion_tokens = count_tokens(content)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+
+    def _respond(self, handler: BaseHTTPRequestHandler, request: dict) -> None:
+        content = self.content(request)
+        usage = self._usage(request, content)
+        time.sleep(self.ttft + usage["completion_tokens"] / self.tokens_per_second)
+
+        body = json.dumps(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": content,
+                            "refusal": None,
+                        },
+                        "finish_reason": "stop",
+                        "logprobs": None,
+                    }
+                ],
+                "usage": usage,
+            }
+        ).encode()
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _stream(self, handler: BaseHTTPRequestHandler, request: dict) -> None:
+        content = self.content(request)
+        usage = self._usage(request, content)
+        pieces = [
+            content[i : i + CHUNK_CHARS] for i in range(0, len(content), CHUNK_CHARS)
+        ]
+        delay = (
+            usage["completion_tokens"] / self.tokens_per_second / max(len(pieces), 1)
+        )
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send(data: str) -> None:
+            event = f"data: {data}\n\n".encode()
+            handler.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            handler.wfile.flush()
+
+        def chunk(delta: dict, finish_reason=None) -> str:
+            return json.dumps(
+                {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                    ],
+                }
+            )
+
+        time.sleep(self.ttft)
+        send(chunk({"role": "assistant", "content": ""}))
+        for piece in pieces:
+            time.sleep(delay)
+            send(chunk({"content": piece}))
+        send(chunk({}, "stop"))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send(
+                json.dumps(
+                    {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": request["model"],
+                        "choices": [],
+                        "usage": usage,
+                    }
+                )
+            )
+        send("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import click
 from dotenv import load_dotenv
 
@@ -12,9 +14,30 @@ from tutor.commands.run_web import run_web
 from tutor.commands.setup_anki import setup_anki
 from tutor.commands.fix_cards import fix_cards
 from tutor.commands.config import config
-from tutor.llm_flashcards import GPT_3_5_TURBO, GPT_4, GPT_4o
+from tutor.commands.extract_vocabulary import extract_vocabulary
+from tutor.commands.find_duplicates import find_duplicates
+from tutor.commands.frequency_index import frequency_index
+from tutor.commands.pronunciation_index import pronunciation_index
+from tutor.llm.metrics import format_summary, has_llm_calls
+from tutor.llm_flashcards import (
+    GPT_3_5_TURBO,
+    GPT_4,
+    GPT_4o,
+    STRUCTURED_OUTPUT_MODELS,
+)
 
-from tutor.cli_global_state import set_debug, set_model, set_skip_confirm
+from tutor.utils.profiling import (
+    enable_profiling,
+    format_breakdown,
+    span,
+    write_chrome_trace,
+)
+from tutor.cli_global_state import (
+    set_debug,
+    set_model,
+    set_skip_confirm,
+    set_structured_outputs,
+)
 
 load_dotenv()
 
@@ -32,11 +55,58 @@ load_dotenv()
     default=False,
     help="Skip confirmation for commands",
 )
-def main(model: str, debug: bool, skip_confirm: bool) -> None:
+@click.option(
+    "--structured-outputs/--no-structured-outputs",
+    default=True,
+    help="Constrain flashcard generation to a JSON schema (ignored for models without support)",
+)
+@click.option(
+    "--profile/--no-profile",
+    default=False,
+    help="Print where the command spent its time (config, Anki, LLM, TTS, parsing)",
+)
+@click.option(
+    "--profile-trace",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the profile as a Chrome trace JSON file instead (implies --profile)",
+)
+def main(
+    model: str,
+    debug: bool,
+    skip_confirm: bool,
+    structured_outputs: bool,
+    profile: bool,
+    profile_trace: Optional[str],
+) -> None:
     """chinese-tutor tool"""
     set_model(model)
     set_debug(debug)
     set_skip_confirm(skip_confirm)
+    set_structured_outputs(structured_outputs and model in STRUCTURED_OUTPUT_MODELS)
+
+    # Close callbacks run last registered first: the command span ends, then
+    # the profile is reported, then the LLM summary is printed
+    ctx = click.get_current_context()
+    ctx.call_on_close(_print_llm_summary)
+    if profile or profile_trace:
+        enable_profiling()
+        ctx.call_on_close(lambda: _report_profile(profile_trace))
+        ctx.with_resource(span(f"ct {ctx.invoked_subcommand}", "cli"))
+
+
+def _print_llm_summary() -> None:
+    """Print the time and tokens spent on LLM calls, if the command made any."""
+    if has_llm_calls():
+        click.echo(f"\n{format_summary()}", err=True)
+
+
+def _report_profile(trace_path: Optional[str]) -> None:
+    """Print the profile breakdown, or write it as a Chrome trace."""
+    if trace_path:
+        write_chrome_trace(trace_path)
+        click.echo(f"\nWrote profile trace to {trace_path}", err=True)
+    else:
+        click.echo(f"\n{format_breakdown()}", err=True)
 
 
 # Add generate_flashcard_from_word command and shortcut
@@ -57,3 +127,7 @@ main.add_command(list_lesser_known_cards, name="list-lesser-known-cards")
 main.add_command(generate_topics_prompt, name="generate-topics-prompt")
 main.add_command(select_conversation_topic, name="select-conversation-topic")
 main.add_command(config, name="config")
+main.add_command(extract_vocabulary, name="extract")
+main.add_command(find_duplicates, name="find-duplicates")
+main.add_command(frequency_index, name="frequency-index")
+main.add_command(pronunciation_index, name="pronunciation-index")
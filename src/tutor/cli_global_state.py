@@ -4,6 +4,7 @@ __GLOBAL_STATE: Dict[str, Any] = {}
 __MODEL: str = "__MODEL"
 __DEBUG: str = "__DEBUG"
 __SKIP_CONFIRM: str = "__SKIP_CONFIRM"
+__STRUCTURED_OUTPUTS: str = "__STRUCTURED_OUTPUTS"
 
 
 def set_model(model: str) -> None:
@@ -28,3 +29,11 @@ def set_skip_confirm(skip: bool) -> None:
 
 def get_skip_confirm() -> bool:
     return __GLOBAL_STATE.get(__SKIP_CONFIRM, False)
+
+
+def set_structured_outputs(structured_outputs: bool) -> None:
+    __GLOBAL_STATE[__STRUCTURED_OUTPUTS] = structured_outputs
+
+
+def get_structured_outputs() -> bool:
+    return __GLOBAL_STATE.get(__STRUCTURED_OUTPUTS, False)
@@ -14,13 +14,23 @@ from tutor.utils.config import get_config
     "-v",
     help="Set the learner level (e.g., beginner, intermediate, advanced)",
 )
-def config(deck: str = None, language: str = None, learner_level: str = None) -> None:
+@click.option(
+    "--anki-profile",
+    help="Set the Anki profile served at the default AnkiConnect address",
+)
+def config(
+    deck: str = None,
+    language: str = None,
+    learner_level: str = None,
+    anki_profile: str = None,
+) -> None:
     """View or set configuration options.
 
     Use options to specify what to configure:
     --deck: Set the default deck for flashcards
     --language: Set the default language (mandarin or cantonese)
     --learner-level: Set the learner level (beginner, intermediate, advanced, etc.)
+    --anki-profile: Set the Anki profile whose media folder audio is saved to
 
     If no options are provided, shows current configuration.
     """
@@ -42,12 +52,20 @@ def config(deck: str = None, language: str = None, learner_level: str = None) ->
         click.echo(f"Learner level set to: {learner_level}")
         changes_made = True
 
+    if anki_profile:
+        config_obj.anki_profile = anki_profile
+        click.echo(f"Anki profile set to: {anki_profile}")
+        changes_made = True
+
     if not changes_made:
         try:
             # Display current configuration
             click.echo(f"Current default deck: {config_obj.default_deck}")
             click.echo(f"Current default language: {config_obj.default_language}")
             click.echo(f"Current learner level: {config_obj.learner_level}")
+            click.echo(f"Current Anki profile: {config_obj.anki_profile}")
+            for name in config_obj.anki_profiles:
+                click.echo(f"Other Anki profile: {name}")
         except ValueError as e:
             click.echo(str(e), err=True)
             click.echo("Use 'config DECK' to set a default deck")
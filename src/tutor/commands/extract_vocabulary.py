@@ -0,0 +1,259 @@
+import click
+import openai
+from collections import Counter
+from typing import Iterable, List, Optional, Set, TextIO, Tuple
+
+from tutor.language_processing import LanguagePreprocessor
+from tutor.cli_global_state import get_structured_outputs
+from tutor.llm.prompts import get_generate_flashcards_from_words_prompt
+from tutor.llm.rate_limit import is_retryable_error
+from tutor.llm_flashcards import generate_flashcards, maybe_add_flashcards_to_deck
+from tutor.utils.anki import AnkiConnectClient
+from tutor.utils.config import get_config
+from tutor.utils.frequency import get_frequency_index
+from tutor.utils.logging import dprint
+from tutor.utils.segmentation import (
+    Matcher,
+    get_word_matcher,
+    iter_paragraphs,
+    read_chunks,
+    segment,
+)
+
+
+@click.command()
+@click.argument("file", type=click.File("r", encoding="utf-8"))
+@click.option("--deck", type=str, default=None)
+@click.option(
+    "--language",
+    type=click.Choice(["mandarin", "cantonese"]),
+    default=None,
+    help="Language of the text (defaults to config setting)",
+)
+@click.option(
+    "--top", type=click.IntRange(min=1), default=20, help="Number of words to add"
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=10,
+    help="Words per LLM request",
+)
+@click.option(
+    "--min-length",
+    type=click.IntRange(min=1),
+    default=2,
+    help="Skip words with fewer characters",
+)
+@click.option(
+    "--max-rank",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Skip words rarer than this frequency rank (needs `ct frequency-index`)",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="List the words that would be added without calling the LLM",
+)
+def extract_vocabulary(
+    file: TextIO,
+    deck: Optional[str],
+    language: Optional[str],
+    top: int,
+    batch_size: int,
+    min_length: int,
+    max_rank: Optional[int],
+    dry_run: bool,
+) -> None:
+    """Add flashcards for the most useful unknown words in a text FILE.
+
+    The text is segmented locally, a paragraph at a time, so books can be read
+    in bounded memory. Words already in DECK are dropped, and the rest are
+    ranked by how often they appear in the text, then how common they are. Only
+    the top words are sent to the LLM, in batches. Segmentation uses the local
+    pronunciation dictionary or frequency index, so build one first with
+    `ct pronunciation-index` or `ct frequency-index`.
+
+    Examples:
+        ct extract article.txt
+        ct extract --top 50 --max-rank 10000 novel.txt
+        pbpaste | ct extract -
+    """
+    deck_name = deck or get_config().default_deck
+    lang = language or get_config().default_language
+    matcher = get_word_matcher(lang)
+    if matcher is None:
+        raise click.ClickException(
+            f"No {lang} lexicon to segment with; run `ct pronunciation-index` "
+            "or `ct frequency-index` first"
+        )
+
+    _extract_vocabulary_impl(
+        deck_name,
+        read_chunks(file),
+        lang,
+        matcher,
+        top,
+        batch_size,
+        min_length,
+        max_rank,
+        dry_run,
+    )
+
+
+def count_words(
+    text: Iterable[str], language: str, matcher: Matcher, min_length: int = 1
+) -> Counter:
+    """Count the words in a text, reading it a paragraph at a time.
+
+    Memory is bounded by the number of distinct words, which the lexicon
+    bounds, rather than by the length of the text.
+
+    Args:
+        text: The text in pieces of any size, e.g. read_chunks(file)
+        language: The language of the text
+        matcher: From get_word_matcher
+        min_length: Skip words with fewer characters
+
+    Returns:
+        The number of times each word appears
+    """
+    counts: Counter = Counter()
+    for paragraph in iter_paragraphs(text):
+        # Simplified for Mandarin, traditional for Cantonese, to match the deck
+        paragraph = LanguagePreprocessor.process_for_language(paragraph, language)
+        counts.update(
+            word for word in segment(paragraph, matcher) if len(word) >= min_length
+        )
+    return counts
+
+
+def get_deck_words(
+    ankiconnect_client: AnkiConnectClient, deck: str, language: str
+) -> Set[str]:
+    """Get the words already in a deck, in the language's script."""
+    cards = ankiconnect_client.find_notes(f'deck:"{deck}"')
+    # One conversion for the whole deck is far cheaper than one per word
+    words = LanguagePreprocessor.process_for_language(
+        "\n".join(card.word for card in cards), language
+    )
+    return set(words.split("\n")) if cards else set()
+
+
+def rank_unknown_words(
+    counts: Counter,
+    known: Set[str],
+    language: str,
+    max_rank: Optional[int] = None,
+) -> List[Tuple[str, int, Optional[int]]]:
+    """Rank the words of a text that aren't known yet.
+
+    Words are ordered by how often they appear in the text, then by their
+    frequency rank, if a frequency index has been built.
+
+    Args:
+        counts: The number of times each word appears, from count_words
+        known: Words to drop, e.g. from get_deck_words
+        language: The language of the words
+        max_rank: If given, drop words rarer than this frequency rank, including
+            words missing from the frequency index
+
+    Returns:
+        (word, count, frequency rank or None) for each word, best first
+    """
+    index = get_frequency_index(language)
+    candidates = []
+    for word, count in counts.items():
+        if word in known:
+            continue
+        rank = index.rank(word) if index is not None else None
+        if max_rank is not None and index is not None:
+            if rank is None or rank > max_rank:
+                continue
+        candidates.append((word, count, rank))
+    candidates.sort(
+        key=lambda c: (-c[1], c[2] if c[2] is not None else float("inf"), c[0])
+    )
+    return candidates
+
+
+def _extract_vocabulary_impl(
+    deck: str,
+    text: Iterable[str],
+    language: str,
+    matcher: Matcher,
+    top: int = 20,
+    batch_size: int = 10,
+    min_length: int = 2,
+    max_rank: Optional[int] = None,
+    dry_run: bool = False,
+) -> List[str]:
+    """Implementation of the extract command.
+
+    Args:
+        deck: The Anki deck to add flashcards to
+        text: The text in pieces of any size, e.g. read_chunks(file)
+        language: The language of the text ("mandarin" or "cantonese")
+        matcher: From get_word_matcher
+        top: The number of words to add
+        batch_size: The number of words per LLM request
+        min_length: Skip words with fewer characters
+        max_rank: If given, skip words rarer than this frequency rank
+        dry_run: Only list the words, without calling the LLM
+
+    Returns:
+        The words selected for flashcards
+    """
+    if max_rank is not None and get_frequency_index(language) is None:
+        click.secho(
+            f"No {language} frequency index; run `ct frequency-index` to use --max-rank",
+            fg="yellow",
+        )
+    counts = count_words(text, language, matcher, min_length)
+    known = get_deck_words(AnkiConnectClient(), deck, language)
+    candidates = rank_unknown_words(counts, known, language, max_rank)[:top]
+    click.echo(
+        f"{len(counts)} distinct words in the text, {len(known)} cards in {deck}"
+    )
+    if not candidates:
+        click.echo("No unknown words to add")
+        return []
+
+    click.echo(f"{'word':<10} {'count':>6} {'rank':>7}")
+    for word, count, rank in candidates:
+        click.echo(f"{word:<10} {count:>6} {rank if rank is not None else '-':>7}")
+
+    words = [word for word, _, _ in candidates]
+    if dry_run:
+        return words
+
+    # Words whose generation was still throttled or failing after every retry
+    failed: List[str] = []
+    for start in range(0, len(words), batch_size):
+        batch = words[start : start + batch_size]
+        click.secho(f"\nGenerating flashcards for: {', '.join(batch)}", fg="blue")
+        prompt = get_generate_flashcards_from_words_prompt(
+            batch, language, get_structured_outputs()
+        )
+        dprint(prompt)
+        try:
+            flashcards = generate_flashcards(prompt, language)
+        except openai.APIError as e:
+            if not is_retryable_error(e):
+                raise
+            click.secho(f"Failed to generate flashcards for this batch: {e}", fg="red")
+            failed += batch
+            continue
+        dprint(flashcards)
+        if not maybe_add_flashcards_to_deck(flashcards, deck):
+            click.secho("No new flashcards added for this batch", fg="red")
+
+    if failed:
+        click.secho(
+            f"\nCouldn't generate flashcards for {len(failed)} words; to retry them, "
+            f'run: ct g --deck "{deck}" --language {language} {" ".join(failed)}',
+            fg="red",
+        )
+    return words
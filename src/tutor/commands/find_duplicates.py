@@ -0,0 +1,102 @@
+import click
+from typing import Optional
+
+from tutor.llm.models import LanguageFlashcard
+from tutor.utils.anki import AnkiConnectClient
+from tutor.utils.config import get_config
+from tutor.utils.similarity import (
+    DEFAULT_EMBEDDING_MODEL,
+    DEFAULT_THRESHOLD,
+    Duplicate,
+    EmbeddingIndex,
+    build_duplicate_index,
+    load_embedding_model,
+)
+
+
+@click.command()
+@click.option("--deck", type=str, default=None, help="Deck to search in")
+@click.option(
+    "--threshold",
+    type=click.FloatRange(0, 1),
+    default=DEFAULT_THRESHOLD,
+    help="Lowest similarity of word and English to report",
+)
+@click.option(
+    "--embeddings/--no-embeddings",
+    default=False,
+    help="Also find cards with similar meanings, using a local "
+    f"sentence-transformers model ({DEFAULT_EMBEDDING_MODEL} by default)",
+)
+@click.option(
+    "--embedding-model",
+    type=str,
+    default=DEFAULT_EMBEDDING_MODEL,
+    help="The sentence-transformers model name or path for --embeddings",
+)
+def find_duplicates(
+    deck: Optional[str], threshold: float, embeddings: bool, embedding_model: str
+) -> None:
+    """List the near-duplicate cards in DECK.
+
+    Finds traditional/simplified variants of the same word, overlapping words
+    and phrases (学习 and 学习者) and cards with similar words and English.
+
+    Examples:
+        ct find-duplicates
+        ct find-duplicates --threshold 0.3
+        ct find-duplicates --embeddings
+    """
+    deck = deck or get_config().default_deck
+    model = None
+    if embeddings:
+        model = load_embedding_model(embedding_model)
+        if model is None:
+            raise click.ClickException(
+                f"Embedding model {embedding_model} isn't available; install "
+                "sentence-transformers and download the model first"
+            )
+    click.echo(_find_duplicates_impl(deck, threshold, model))
+
+
+def _find_duplicates_impl(deck: str, threshold: float, embedding_model=None) -> str:
+    """Implementation of the find-duplicates command.
+
+    Args:
+        deck: Name of the deck to search in
+        threshold: Lowest Jaccard similarity of word and English to report
+        embedding_model: A model from load_embedding_model, to also report
+            cards with similar meanings
+
+    Returns:
+        The duplicates, one pair per line
+    """
+    cards = AnkiConnectClient().find_notes(f'deck:"{deck}"')
+    index = build_duplicate_index(cards, threshold)
+    pairs = index.find_duplicates()
+    if embedding_model is not None:
+        embedding_index = EmbeddingIndex(embedding_model)
+        embedding_index.build(
+            (card.anki_note_id or card.word, card.word, card.english) for card in cards
+        )
+        found = {(key, duplicate.key) for key, duplicate in pairs}
+        pairs += [
+            (key, duplicate)
+            for key, duplicate in embedding_index.find_duplicates()
+            if (key, duplicate.key) not in found and (duplicate.key, key) not in found
+        ]
+
+    if not pairs:
+        return f"No near-duplicate cards found in deck: {deck}"
+    cards_by_key = {card.anki_note_id or card.word: card for card in cards}
+    return "\n".join(
+        [f"Near-duplicate cards in deck '{deck}':"]
+        + [_format_pair(cards_by_key[key], duplicate) for key, duplicate in pairs]
+    )
+
+
+def _format_pair(card: LanguageFlashcard, duplicate: Duplicate) -> str:
+    return (
+        f"- {card.word} ({card.english}) ~ {duplicate.word} ({duplicate.english})"
+        f" [{duplicate.kind}, {duplicate.similarity:.2f}]"
+    )
@@ -1,18 +1,42 @@
 import click
-from typing import Optional
-from tutor.llm.models import ChineseFlashcard
+import threading
+from functools import partial
+from typing import Optional, Tuple
+from tutor.llm.models import ChineseFlashcard, LanguageFlashcard
 from tutor.utils.anki import AnkiConnectClient
+from tutor.utils.anki_targets import SharedResults, for_each_target, resolve_targets
+from tutor.cli_global_state import get_structured_outputs
 from tutor.llm_flashcards import (
     generate_flashcards,
 )
 from tutor.utils.logging import dprint
 from tutor.llm.prompts import get_generate_flashcard_from_word_prompt
 from tutor.utils.azure import text_to_speech
-from tutor.utils.config import get_config
+from tutor.utils.romanization import (
+    check_reading,
+    fill_pronunciations,
+    get_pronunciation_field,
+)
+
+# Serialises progress output from decks fixed concurrently
+_print_lock = threading.Lock()
 
 
 @click.command()
-@click.option("--deck", type=str, default=None, help="Deck to fix cards in")
+@click.option(
+    "--deck",
+    "decks",
+    type=str,
+    multiple=True,
+    help="Deck to fix cards in; repeat to fix several decks",
+)
+@click.option(
+    "--anki-profile",
+    "anki_profiles",
+    type=str,
+    multiple=True,
+    help="Anki profile from the config's anki_profiles to fix cards in; repeatable",
+)
 @click.option(
     "--dry-run",
     is_flag=True,
@@ -31,20 +55,54 @@ from tutor.utils.config import get_config
     default=False,
     help="Force update all cards even if they have all required fields",
 )
+@click.option(
+    "--check-pronunciation",
+    is_flag=True,
+    default=False,
+    help="Report pinyin/jyutping that doesn't match the local pronunciation dictionary",
+)
 def fix_cards(
-    deck: Optional[str],
+    decks: Tuple[str, ...],
+    anki_profiles: Tuple[str, ...],
     dry_run: bool = False,
     limit: Optional[int] = None,
     force_update: bool = False,
+    check_pronunciation: bool = False,
 ) -> None:
     """Fix all cards in a deck by regenerating them with latest features.
 
-    Only regenerates audio if the sample usage changes.
+    Only regenerates audio if the sample usage changes. Cards only missing
+    pinyin/jyutping are fixed from the local pronunciation dictionary, if one
+    has been built with `ct pronunciation-index`, without the LLM.
+
+    Several decks and profiles are fixed concurrently. A word in more than one
+    of them is regenerated once, and its audio synthesized once.
     """
     # Use default deck from config if not specified
-    deck = deck or get_config().default_deck
-    result = _fix_cards_impl(deck, dry_run, limit, force_update)
-    click.echo(result)
+    try:
+        targets = resolve_targets(decks, anki_profiles)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--anki-profile")
+    shared: SharedResults = SharedResults()
+    results = for_each_target(
+        targets,
+        lambda target: _fix_cards_impl(
+            target.deck,
+            dry_run,
+            limit,
+            force_update,
+            check_pronunciation,
+            target.client,
+            shared,
+            str(target) if len(targets) > 1 else None,
+        ),
+    )
+    if len(targets) == 1:
+        click.echo(results[0])
+    else:
+        for target, result in zip(targets, results):
+            click.secho(f"\n=== {target} ===", bold=True)
+            click.echo(result)
 
 
 def _fix_cards_impl(
@@ -52,6 +110,10 @@ def _fix_cards_impl(
     dry_run: bool = False,
     limit: Optional[int] = None,
     force_update: bool = False,
+    check_pronunciation: bool = False,
+    ankiconnect_client: Optional[AnkiConnectClient] = None,
+    shared: Optional[SharedResults] = None,
+    label: Optional[str] = None,
 ) -> str:
     """Implementation of fix_cards command.
 
@@ -60,11 +122,21 @@ def _fix_cards_impl(
         dry_run: If True, show what would be updated without making changes
         limit: Maximum number of cards to process
         force_update: Force update all cards even if they have all required fields
+        check_pronunciation: Report pronunciations that don't match the local
+            pronunciation dictionary
+        ankiconnect_client: The client for the deck's profile; defaults to the
+            default AnkiConnect address
+        shared: Regenerated flashcards and audio shared with other decks being
+            fixed, so each is only generated once
+        label: Prefixed to each line of progress, to tell decks being fixed
+            concurrently apart
 
     Returns:
         A summary of what was updated
     """
-    ankiconnect_client = AnkiConnectClient()
+    ankiconnect_client = ankiconnect_client or AnkiConnectClient()
+    shared = shared or SharedResults()
+    log = partial(_print_progress, label=label)
 
     # Get all cards in the deck
     # Escape colons in deck name for Anki's query syntax
@@ -76,23 +148,25 @@ def _fix_cards_impl(
     total_cards = len(cards)
     if limit:
         cards = cards[:limit]
-        print(f"Found {total_cards} cards in deck: {deck}, processing first {limit}")
+        log(f"Found {total_cards} cards in deck: {deck}, processing first {limit}")
     else:
-        print(f"Found {total_cards} cards in deck: {deck}")
+        log(f"Found {total_cards} cards in deck: {deck}")
 
     if dry_run:
-        print("DRY RUN: No changes will be made")
+        log("DRY RUN: No changes will be made")
 
     stats = {
         "total": len(cards),
         "updated": 0,
         "audio_updated": 0,
         "skipped": 0,  # Cards that don't need updates
+        "pronunciation_fixed": 0,  # Cards fixed from the pronunciation dictionary
+        "pronunciation_mismatches": 0,
     }
 
     for i, card in enumerate(cards, 1):
         try:
-            print(f"\nProcessing card {i}/{len(cards)}: {card.word}")
+            log(f"\nProcessing card {i}/{len(cards)}: {card.word}")
 
             # Check if card needs content updates
             needs_content_update = False
@@ -104,11 +178,36 @@ def _fix_cards_impl(
             content_fields = ChineseFlashcard.get_content_fields()
             audio_fields = ChineseFlashcard.get_audio_fields()
 
-            # Check content fields
+            # Check content fields. A missing pronunciation alone can be fixed
+            # from the pronunciation dictionary instead of regenerating the card.
+            pronunciation_field = get_pronunciation_field(card.LANGUAGE)
+            pronunciation_anki_field = card.ANKI_FIELD_NAMES[pronunciation_field]
+            needs_pronunciation = False
             for field in content_fields:
                 if field not in fields or not fields[field]:
-                    needs_content_update = True
+                    if field == pronunciation_anki_field:
+                        needs_pronunciation = True
+                    else:
+                        needs_content_update = True
                     reasons.append(f"missing {field}")
+            if any(
+                not getattr(related_word, pronunciation_field)
+                for related_word in card.related_words
+            ):
+                needs_pronunciation = True
+                reasons.append(f"missing related word {pronunciation_anki_field}")
+
+            pronunciation = getattr(card, pronunciation_field)
+            if (
+                check_pronunciation
+                and pronunciation
+                and check_reading(card.word, pronunciation, card.LANGUAGE) is False
+            ):
+                log(
+                    f"{pronunciation_anki_field} '{pronunciation}' doesn't match "
+                    "the pronunciation dictionary"
+                )
+                stats["pronunciation_mismatches"] += 1
 
             # Check audio fields separately
             for field in audio_fields:
@@ -121,21 +220,38 @@ def _fix_cards_impl(
                 needs_content_update = True
                 reasons.append("force update requested")
 
-            # Skip if both content and audio are up to date
-            if not needs_content_update and not needs_audio_only:
-                print("Card is up to date, skipping...")
+            # Skip if content, pronunciation and audio are all up to date
+            if (
+                not needs_content_update
+                and not needs_pronunciation
+                and not needs_audio_only
+            ):
+                log("Card is up to date, skipping...")
                 stats["skipped"] += 1
                 continue
 
-            print(f"Updates needed: {', '.join(reasons)}")
+            log(f"Updates needed: {', '.join(reasons)}")
+
+            # Fix pronunciation locally when nothing else needs regenerating
+            filled_card = None
+            if needs_pronunciation and not needs_content_update:
+                filled_card = fill_pronunciations(card)
+                if filled_card is None:
+                    log(
+                        f"{pronunciation_anki_field} not in the pronunciation "
+                        "dictionary, will regenerate the card"
+                    )
+                    needs_content_update = True
 
             # Generate new card content only if needed
-            if needs_content_update:
-                prompt = get_generate_flashcard_from_word_prompt(card.word)
-                dprint(prompt)
-                flashcards = generate_flashcards(prompt)
-                dprint(flashcards)
-                new_card = flashcards.flashcards[0]
+            if filled_card is not None:
+                new_card = filled_card
+                stats["pronunciation_fixed"] += 1
+            elif needs_content_update:
+                new_card = shared.get(
+                    ("flashcard", card.word, card.LANGUAGE),
+                    lambda: _regenerate_flashcard(card.word, card.LANGUAGE),
+                )
             else:
                 # Use existing card data if only audio needs updating
                 new_card = card
@@ -155,12 +271,12 @@ def _fix_cards_impl(
             )
 
             if need_sample_audio:
-                print("Sample usage changed, will regenerate audio:")
-                print(f"Old: {card.sample_usage}")
-                print(f"New: {new_card.sample_usage}")
+                log("Sample usage changed, will regenerate audio:")
+                log(f"Old: {card.sample_usage}")
+                log(f"New: {new_card.sample_usage}")
 
             if need_word_audio:
-                print("Word audio will be generated")
+                log("Word audio will be generated")
 
             if not dry_run:
                 # Generate audio files as needed
@@ -168,13 +284,13 @@ def _fix_cards_impl(
                 word_audio_filepath = None
 
                 if need_sample_audio:
-                    sample_usage_audio_filepath = text_to_speech(
-                        new_card.sample_usage, new_card.LANGUAGE
+                    sample_usage_audio_filepath = _shared_text_to_speech(
+                        shared, new_card.sample_usage, new_card.LANGUAGE
                     )
 
                 if need_word_audio:
-                    word_audio_filepath = text_to_speech(
-                        new_card.word, new_card.LANGUAGE
+                    word_audio_filepath = _shared_text_to_speech(
+                        shared, new_card.word, new_card.LANGUAGE
                     )
 
                 ankiconnect_client.update_flashcard(
@@ -187,17 +303,17 @@ def _fix_cards_impl(
                 if need_sample_audio or need_word_audio:
                     stats["audio_updated"] += 1
             else:
-                print("Would update card with:")
-                print(new_card)
+                log("Would update card with:")
+                log(str(new_card))
                 if need_sample_audio:
-                    print("Would regenerate sample usage audio")
+                    log("Would regenerate sample usage audio")
                 if need_word_audio:
-                    print("Would regenerate word audio")
+                    log("Would regenerate word audio")
                 stats["updated"] += 1
                 if need_sample_audio or need_word_audio:
                     stats["audio_updated"] += 1
         except Exception as e:
-            print(f"Error processing card {card.word}: {e}")
+            log(f"Error processing card {card.word}: {e}")
             # Fail fast on errors
             raise Exception(
                 f"Failed to process card {card.word}. Fix any issues and try again."
@@ -212,7 +328,43 @@ def _fix_cards_impl(
         f"Audio files regenerated: {stats['audio_updated']}",
     ]
 
+    if stats["pronunciation_fixed"]:
+        summary.append(
+            f"Pronunciations fixed without the LLM: {stats['pronunciation_fixed']}"
+        )
+    if check_pronunciation:
+        summary.append(f"Pronunciation mismatches: {stats['pronunciation_mismatches']}")
+
     if dry_run:
         summary.insert(1, "DRY RUN - No changes were made")
 
     return "\n".join(summary)
+
+
+def _print_progress(text: str, label: Optional[str] = None) -> None:
+    """Print a progress message, with each line prefixed by label if given.
+
+    Messages are printed whole, so lines from concurrent decks don't interleave.
+    """
+    if label:
+        text = "\n".join(
+            f"[{label}] {line}" if line else line for line in text.split("\n")
+        )
+    with _print_lock:
+        print(text)
+
+
+def _regenerate_flashcard(word: str, language: str) -> LanguageFlashcard:
+    """Generate new content for a card's word."""
+    prompt = get_generate_flashcard_from_word_prompt(
+        word, language, get_structured_outputs()
+    )
+    dprint(prompt)
+    flashcards = generate_flashcards(prompt, language)
+    dprint(flashcards)
+    return flashcards[0]
+
+
+def _shared_text_to_speech(shared: SharedResults, text: str, language: str) -> str:
+    """Synthesize audio once for every deck being fixed."""
+    return shared.get(("tts", text, language), lambda: text_to_speech(text, language))
@@ -0,0 +1,32 @@
+import click
+from typing import Optional
+
+from tutor.utils.config import get_config
+from tutor.utils.frequency import build_frequency_index, get_frequency_index_path
+
+
+@click.command()
+@click.argument(
+    "word_list", type=click.Path(exists=True, dir_okay=False), metavar="WORD_LIST"
+)
+@click.option(
+    "--language",
+    type=click.Choice(["mandarin", "cantonese"]),
+    default=None,
+    help="Language of the word list (defaults to config setting)",
+)
+def frequency_index(word_list: str, language: Optional[str]) -> None:
+    """Build the local word frequency index from a corpus WORD_LIST.
+
+    WORD_LIST has one word per line, most common first, or a word followed by
+    its count on each line (e.g. SUBTLEX-CH or jieba's dict.txt). The index is
+    used to put the most common words first in `ct g` and to fill in each
+    flashcard's frequency without the LLM.
+
+    Examples:
+        ct frequency-index SUBTLEX-CH-WF.txt
+        ct frequency-index --language cantonese words_hk.txt
+    """
+    lang = language or get_config().default_language
+    count = build_frequency_index(word_list, lang)
+    click.echo(f"Indexed {count} {lang} words into {get_frequency_index_path(lang)}")
@@ -1,16 +1,24 @@
 import click
+import openai
 import sys
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from tutor.utils.anki import AnkiConnectClient
+from tutor.utils.anki_targets import AnkiTarget, for_each_target, resolve_targets
+from tutor.cli_global_state import get_structured_outputs
 from tutor.llm_flashcards import (
     generate_flashcards,
-    maybe_add_flashcards_to_deck,
+    maybe_add_flashcards_to_targets,
     get_word_exists_query,
 )
 from tutor.llm.prompts import get_generate_flashcard_from_word_prompt
+from tutor.llm.rate_limit import is_retryable_error
+from tutor.llm.streaming import JsonPath
+from tutor.utils.azure import text_to_speech_async
 from tutor.utils.logging import dprint
 from tutor.utils.config import get_config
+from tutor.utils.frequency import get_frequency_index, prioritize_words
+from tutor.utils.similarity import DuplicateIndex, build_duplicate_index
 from tutor.language_processing import LanguagePreprocessor
 
 
@@ -25,17 +33,101 @@ def read_words_from_stdin() -> List[str]:
     return [word for word in content.split() if word]
 
 
+# Display labels for flashcard fields, matching LanguageFlashcard.__str__
+_FIELD_LABELS = {
+    "word": "Word",
+    "pinyin": "Pinyin",
+    "jyutping": "Jyutping",
+    "english": "English",
+    "sample_usage": "Sample Usage",
+    "sample_usage_english": "Sample Usage (English)",
+    "frequency": "Frequency",
+}
+
+
+class StreamingFlashcardPrinter:
+    """Prints flashcard fields as they stream in and starts audio synthesis early.
+
+    Pass an instance as the on_field callback of generate_flashcards.
+    """
+
+    def __init__(self, language: str):
+        self.language = language
+        self.pronunciation_field = "pinyin" if language == "mandarin" else "jyutping"
+        self.related_words: Dict[int, Dict[str, str]] = {}
+
+    def start(self) -> None:
+        click.echo(f"Language: {self.language.capitalize()}")
+
+    def __call__(self, path: JsonPath, value: str) -> None:
+        if len(path) == 1 and path[0] in _FIELD_LABELS:
+            click.echo(f"{_FIELD_LABELS[path[0]]}: {value}")
+            # Start synthesizing audio now, so it is ready when the card is added
+            if path[0] in ("word", "sample_usage"):
+                text_to_speech_async(value, self.language)
+        elif len(path) == 3 and path[0] == "related_words":
+            related_word = self.related_words.setdefault(path[1], {})
+            related_word[path[2]] = value
+            if related_word.keys() >= {
+                "word",
+                "english",
+                "relationship",
+                self.pronunciation_field,
+            }:
+                if len(self.related_words) == 1:
+                    click.echo("Related Words:")
+                click.echo(
+                    f"  • {related_word['word']} ({related_word[self.pronunciation_field]})"
+                    f" - {related_word['english']} [{related_word['relationship']}]"
+                )
+
+
 @click.command()
 @click.argument("words", type=str, nargs=-1)
-@click.option("--deck", type=str, default=None)
+@click.option(
+    "--deck",
+    "decks",
+    type=str,
+    multiple=True,
+    help="Deck to add to; repeat to add each card to several decks",
+)
+@click.option(
+    "--anki-profile",
+    "anki_profiles",
+    type=str,
+    multiple=True,
+    help="Anki profile from the config's anki_profiles to add to; repeatable",
+)
 @click.option(
     "--language",
     type=click.Choice(["mandarin", "cantonese"]),
     default=None,
     help="Language for the flashcard (defaults to config setting)",
 )
+@click.option(
+    "--stream/--no-stream",
+    default=True,
+    help="Show each flashcard field as soon as it is generated",
+)
+@click.option(
+    "--max-rank",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Skip words rarer than this frequency rank (needs `ct frequency-index`)",
+)
+@click.option(
+    "--check-similar/--no-check-similar",
+    default=False,
+    help="Warn about near-duplicate cards in the deck before generating each word",
+)
 def generate_flashcard_from_word(
-    deck: Optional[str], language: Optional[str], words: Tuple[str, ...]
+    decks: Tuple[str, ...],
+    anki_profiles: Tuple[str, ...],
+    language: Optional[str],
+    stream: bool,
+    max_rank: Optional[int],
+    check_similar: bool,
+    words: Tuple[str, ...],
 ) -> None:
     """Add new Anki flashcards for one or more WORDS to DECK.
 
@@ -44,6 +136,14 @@ def generate_flashcard_from_word(
         ct g --language cantonese 你好       # Single word in Cantonese
         ct g 你好 再见 谢谢                 # Multiple space-separated words
         echo "你好\n再见" | ct g             # Read from stdin (newline-separated)
+        ct g --max-rank 5000 < words.txt  # Only the 5000 most common words
+        ct g --check-similar 学习者         # Warn if e.g. 学习 is in the deck
+        ct g --deck HSK --deck Work 你好    # Generate once, add to both decks
+
+    Repeated words are skipped, and once a frequency index has been built with
+    `ct frequency-index` the most common words are generated first. With
+    several decks or profiles, each card is generated once and added to every
+    one that doesn't have it yet.
     """
     # Combine words from arguments and stdin
     all_words = list(words)
@@ -56,52 +156,145 @@ def generate_flashcard_from_word(
         return
 
     # Use provided values or defaults from config
-    deck_name = deck or get_config().default_deck
+    try:
+        targets = resolve_targets(decks, anki_profiles)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--anki-profile")
     lang = language or get_config().default_language
 
-    _generate_flashcard_from_word_impl(deck_name, tuple(all_words), lang)
+    _generate_flashcard_from_word_impl(
+        targets[0].deck,
+        tuple(all_words),
+        lang,
+        stream,
+        max_rank,
+        check_similar,
+        targets,
+    )
 
 
 def _generate_flashcard_from_word_impl(
-    deck: str, words: tuple[str, ...], language: str = "mandarin"
+    deck: str,
+    words: tuple[str, ...],
+    language: str = "mandarin",
+    stream: bool = False,
+    max_rank: Optional[int] = None,
+    check_similar: bool = False,
+    targets: Optional[Sequence[AnkiTarget]] = None,
 ) -> None:
     """Implementation of generate_flashcard_from_word command.
 
-    For each word:
+    Words are deduped and put in frequency order first, so no LLM calls are
+    spent on repeats or on words rarer than max_rank. Then for each word:
     1. Convert traditional characters to simplified (if any)
-    2. Check if the card already exists in Anki
-    3. Generate flashcard content using OpenAI if needed
-    4. Add the flashcard to Anki if it doesn't already exist
+    2. Check if the card already exists in each target, concurrently
+    3. Generate flashcard content using OpenAI if any target needs it
+    4. Add the flashcard to each target that doesn't have it yet
 
     Args:
         deck: The Anki deck to add flashcards to
         words: The words to generate flashcards for
         language: The language to generate flashcards for ("mandarin" or "cantonese")
+        stream: Stream each flashcard, displaying fields as soon as they are generated
+        max_rank: If given, skip words rarer than this frequency rank
+        check_similar: Warn about near-duplicate cards in the (first) deck
+            before generating each word
+        targets: The decks and profiles to add flashcards to, from
+            resolve_targets; defaults to deck at the default AnkiConnect address
     """
-    ankiconnect_client = AnkiConnectClient()
+    if targets is None:
+        targets = [AnkiTarget(deck, client=AnkiConnectClient())]
+    if max_rank is not None and get_frequency_index(language) is None:
+        click.secho(
+            f"No {language} frequency index; run `ct frequency-index` to use --max-rank",
+            fg="yellow",
+        )
+    # Process words based on language (simplified for Mandarin, traditional for
+    # Cantonese) before deduping, so variants of a word count as repeats
+    requested = len(words)
+    words = prioritize_words(
+        [LanguagePreprocessor.process_for_language(word, language) for word in words],
+        language,
+        max_rank,
+    )
     total = len(words)
+    if total < requested:
+        click.echo(f"Skipping {requested - total} repeated or rare words")
 
-    for i, word in enumerate(words, 1):
-        # Process word based on language (simplified for Mandarin, traditional for Cantonese)
-        word = LanguagePreprocessor.process_for_language(word, language)
+    # The deck is fetched and indexed once, then each word is checked in
+    # microseconds
+    similar_index: Optional[DuplicateIndex] = None
+    if check_similar:
+        similar_index = build_duplicate_index(
+            targets[0].client.find_notes(f'deck:"{targets[0].deck}"')
+        )
 
+    # Words whose generation was still throttled or failing after every retry
+    failed: List[str] = []
+    for i, word in enumerate(words, 1):
         if total > 1:
             click.secho(f"\nProcessing word {i}/{total}: {word}", fg="blue")
 
         # Check if card already exists
-        existing_cards = ankiconnect_client.find_notes(
-            get_word_exists_query(word, language)
+        existing = for_each_target(
+            targets,
+            lambda target: target.client.find_notes(
+                get_word_exists_query(word, language, target.deck)
+            ),
         )
-        if existing_cards:
+        missing = [t for t, cards in zip(targets, existing) if not cards]
+        if not missing:
             click.secho(f"Card for '{word}' exists already:", fg="yellow")
-            click.echo(f"{existing_cards[0]}")
+            click.echo(f"{existing[0][0]}")
             continue
+        if len(missing) < len(targets):
+            present = ", ".join(str(t) for t in targets if t not in missing)
+            click.secho(f"Card for '{word}' exists already in {present}", fg="yellow")
+        if similar_index is not None:
+            _warn_similar_cards(similar_index, word)
 
         # Generate new card content
-        prompt = get_generate_flashcard_from_word_prompt(word, language)
+        prompt = get_generate_flashcard_from_word_prompt(
+            word, language, get_structured_outputs()
+        )
         dprint(prompt)
-        flashcards = generate_flashcards(prompt, language)
+        try:
+            if stream:
+                printer = StreamingFlashcardPrinter(language)
+                printer.start()
+                flashcards = generate_flashcards(prompt, language, on_field=printer)
+            else:
+                flashcards = generate_flashcards(prompt, language)
+        except openai.APIError as e:
+            if not is_retryable_error(e):
+                raise
+            click.secho(f"Failed to generate a flashcard for '{word}': {e}", fg="red")
+            failed.append(word)
+            continue
         dprint(flashcards)
 
-        if not maybe_add_flashcards_to_deck(flashcards, deck):
+        # A single streamed flashcard has already been displayed
+        show_flashcards = not stream or len(flashcards) != 1
+        if not maybe_add_flashcards_to_targets(flashcards, missing, show_flashcards):
             click.secho(f"No new flashcard added for '{word}'", fg="red")
+        elif similar_index is not None:
+            # Later words are checked against the new cards too
+            for flashcard in flashcards:
+                if flashcard.word not in similar_index:
+                    similar_index.add(flashcard.word, flashcard.word, flashcard.english)
+
+    if failed:
+        click.secho(
+            f"\nCouldn't generate flashcards for {len(failed)} words; to retry them, "
+            f"run: ct g {' '.join(failed)}",
+            fg="red",
+        )
+
+
+def _warn_similar_cards(index: DuplicateIndex, word: str) -> None:
+    """Print the cards in the deck that a word may duplicate."""
+    duplicates = index.query(word)
+    if duplicates:
+        click.secho(f"Similar cards for '{word}' in the deck:", fg="yellow")
+        for duplicate in duplicates:
+            click.echo(f"  • {duplicate.word} - {duplicate.english} [{duplicate.kind}]")
@@ -0,0 +1,41 @@
+import click
+from typing import Optional, Tuple
+
+from tutor.utils.config import get_config
+from tutor.utils.romanization import (
+    build_pronunciation_dictionary,
+    get_pronunciation_dictionary_path,
+)
+
+
+@click.command()
+@click.argument(
+    "dict_files",
+    type=click.Path(exists=True, dir_okay=False),
+    nargs=-1,
+    required=True,
+    metavar="DICT_FILE...",
+)
+@click.option(
+    "--language",
+    type=click.Choice(["mandarin", "cantonese"]),
+    default=None,
+    help="Language to read pronunciations for (defaults to config setting)",
+)
+def pronunciation_index(dict_files: Tuple[str, ...], language: Optional[str]) -> None:
+    """Build the local pronunciation dictionary from CC-CEDICT style DICT_FILEs.
+
+    Mandarin takes the [pinyin] of each entry, e.g. from cedict_ts.u8, and
+    Cantonese the {jyutping}, e.g. from CC-Canto and its readings file for
+    CC-CEDICT. `ct fix-cards` then fills in missing pinyin and jyutping
+    without the LLM.
+
+    Examples:
+        ct pronunciation-index cedict_ts.u8
+        ct pronunciation-index --language cantonese cccanto-webdist.txt cccedict-canto-readings.txt
+    """
+    lang = language or get_config().default_language
+    count = build_pronunciation_dictionary(dict_files, lang)
+    click.echo(
+        f"Indexed {count} {lang} words into {get_pronunciation_dictionary_path(lang)}"
+    )
@@ -1,4 +1,5 @@
 import click
+import openai
 from tutor.utils.anki import AnkiConnectClient
 from tutor.llm_flashcards import (
     generate_flashcards,
@@ -6,8 +7,9 @@ from tutor.llm_flashcards import (
 )
 from tutor.utils.logging import dprint
 from tutor.llm.prompts import get_generate_flashcard_from_word_prompt
+from tutor.llm.rate_limit import is_retryable_error
 from tutor.utils.azure import text_to_speech
-from tutor.cli_global_state import get_skip_confirm
+from tutor.cli_global_state import get_skip_confirm, get_structured_outputs
 from tutor.utils.config import get_config
 from tutor.language_processing import LanguagePreprocessor
 
@@ -37,7 +39,8 @@ def _regenerate_flashcard_impl(word: str, language: str = "mandarin") -> str:
         language: The language to generate flashcards for ("mandarin" or "cantonese")
 
     Returns:
-        A message describing the result of the operation, or None if operation was cancelled
+        A message describing the result of the operation, or None if operation was
+        cancelled or the flashcard couldn't be generated
     """
     # Process word based on language (simplified for Mandarin, traditional for Cantonese)
     processed_word = LanguagePreprocessor.process_for_language(word, language)
@@ -65,11 +68,23 @@ def _regenerate_flashcard_impl(word: str, language: str = "mandarin") -> str:
             return None
 
     note_id = flashcard.anki_note_id
-    prompt = get_generate_flashcard_from_word_prompt(processed_word, language)
+    prompt = get_generate_flashcard_from_word_prompt(
+        processed_word, language, get_structured_outputs()
+    )
     dprint(prompt)
-    flashcards = generate_flashcards(prompt, language)
+    try:
+        flashcards = generate_flashcards(prompt, language)
+    except openai.APIError as e:
+        if not is_retryable_error(e):
+            raise
+        click.secho(
+            f"Failed to regenerate the flashcard for '{processed_word}': {e}\n"
+            f"To retry, run: ct rg {processed_word}",
+            fg="red",
+        )
+        return None
     dprint(flashcards)
-    new_flashcard = flashcards.flashcards[0]
+    new_flashcard = flashcards[0]
     audio_filepath = text_to_speech(new_flashcard.sample_usage, language)
     ankiconnect_client.update_flashcard(note_id, new_flashcard, audio_filepath)
 
@@ -1,11 +1,34 @@
 import click
 from ..web.app import create_app
+from ..web.sessions import DEFAULT_MAX_SESSIONS, SessionStore
 
 
 @click.command()
 @click.option("--port", default=5001, help="Port to run the web server on")
 @click.option("--debug", is_flag=True, help="Run in debug mode")
-def run_web(port, debug):
+@click.option(
+    "--async",
+    "use_async",
+    is_flag=True,
+    help="Serve with the ASGI app, which doesn't block on LLM calls",
+)
+@click.option(
+    "--max-sessions",
+    default=DEFAULT_MAX_SESSIONS,
+    help="Number of dialogue sessions to keep in memory",
+)
+@click.option(
+    "--session-db",
+    type=click.Path(dir_okay=False),
+    help="SQLite file to persist dialogue sessions to",
+)
+def run_web(port, debug, use_async, max_sessions, session_db):
     """Run the web-based dialogue practice interface."""
-    app = create_app()
+    sessions = SessionStore(max_sessions=max_sessions, db_path=session_db)
+    if use_async:
+        from ..web.async_app import create_async_app
+
+        app = create_async_app(sessions)
+    else:
+        app = create_app(sessions)
     app.run(port=port, debug=debug)
@@ -1,8 +1,17 @@
 """Command to set up Anki note types for Chinese Tutor."""
 
 import click
+import hashlib
+from functools import cache
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
 from tutor.utils.anki import AnkiConnectClient, AnkiAction, AnkiConnectError
+from tutor.utils.anki_targets import for_each_target, get_profile_client
+
+SUPPORTED_LANGUAGES = ("mandarin", "cantonese")
+
+CARD_STYLING_DIR = Path(__file__).parent.parent / "card_styling"
 
 
 @click.command()
@@ -12,12 +21,24 @@ from tutor.utils.anki import AnkiConnectClient, AnkiAction, AnkiConnectError
     default="mandarin,cantonese",
     help="Comma-separated list of languages to set up note types for",
 )
-def setup_anki(languages: str):
+@click.option(
+    "--anki-profile",
+    "anki_profiles",
+    type=str,
+    multiple=True,
+    help="Anki profile from the config's anki_profiles to set up; repeatable",
+)
+def setup_anki(languages: str, anki_profiles: Tuple[str, ...] = ()):
     """Set up Anki note types for Chinese Tutor.
 
     This command creates the required note types in Anki for the specified languages
     and updates existing note types with the latest templates and styling.
     By default, it processes both Mandarin and Cantonese.
+
+    Note types are read in one request and only the styling and templates that
+    differ from the local card_styling files are pushed, all in one more
+    request, so running it again when nothing has changed is a single request.
+    Several profiles are set up concurrently.
     """
     # Parse languages
     language_list = [lang.strip().lower() for lang in languages.split(",")]
@@ -25,119 +46,64 @@ def setup_anki(languages: str):
     # Print header
     click.secho("=== Chinese Tutor - Anki Setup ===\n", fg="green", bold=True)
 
-    # Create Anki client
-    client = AnkiConnectClient()
-    note_type_manager = NoteTypeManager(client)
-
-    # Check connection to Anki
-    try:
-        client.list_decks()
-        click.secho("✓ Connected to Anki successfully.\n", fg="green")
-    except Exception as e:
-        click.secho("✗ Error connecting to Anki:", fg="red", bold=True)
-        click.echo(f"  {e}")
-        click.echo(
-            "  Please make sure Anki is running with the AnkiConnect add-on installed."
-        )
-        return
-
     # Track success/failure for each language
     success_count = 0
     failure_count = 0
 
-    # Process note types for each language
+    supported = []
     for language in language_list:
-        click.secho(f"Processing {language.capitalize()} note type:", bold=True)
-
-        if language not in ["mandarin", "cantonese"]:
-            click.secho(f"  ✗ Unsupported language: {language}. Skipping.", fg="yellow")
+        if language not in SUPPORTED_LANGUAGES:
+            click.secho(f"✗ Unsupported language: {language}. Skipping.", fg="yellow")
             failure_count += 1
-            continue
-
-        try:
-            # Check if note type already exists
-            model_name = f"chinese-tutor-{language}"
-            click.echo(f"  Checking if note type '{model_name}' exists...")
-            models = client.send_request(AnkiAction.MODEL_NAMES, {})
-
-            if model_name in models:
-                # Check if the note type has all the expected fields
-                from tutor.llm_flashcards import get_flashcard_class_for_language
+        else:
+            supported.append(language)
 
-                flashcard_class = get_flashcard_class_for_language(language)
+    # Create an Anki client for each profile
+    profiles = list(dict.fromkeys(anki_profiles)) or [None]
+    try:
+        clients = [get_profile_client(profile) for profile in profiles]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--anki-profile")
 
-                expected_fields = flashcard_class.get_required_anki_fields()
+    def set_up_profile(client: AnkiConnectClient):
+        note_type_manager = NoteTypeManager(client)
+        # Read every note type in one request, which also checks the connection
+        try:
+            updates = note_type_manager.plan_updates(supported)
+        except AnkiConnectError as e:
+            return e
+        # Then make every change in one more request, if anything changed
+        note_type_manager.apply_updates(updates)
+        return updates
+
+    results = for_each_target(clients, set_up_profile)
+
+    for profile, result in zip(profiles, results):
+        if len(profiles) > 1:
+            click.secho(f"--- Profile: {profile or 'default'} ---", bold=True)
+        if isinstance(result, AnkiConnectError):
+            click.secho("✗ Error connecting to Anki:", fg="red", bold=True)
+            click.echo(f"  {result}")
+            click.echo(
+                "  Please make sure Anki is running with the AnkiConnect add-on installed."
+            )
+            if len(profiles) == 1:
+                return
+            click.echo()
+            failure_count += len(supported)
+            continue
+        click.secho("✓ Connected to Anki successfully.\n", fg="green")
 
-                try:
-                    note_fields = client.send_request(
-                        AnkiAction.MODEL_FIELD_NAMES, {"modelName": model_name}
-                    )
-                    missing_fields = [
-                        field for field in expected_fields if field not in note_fields
-                    ]
-
-                    if not missing_fields:
-                        click.secho(
-                            f"  ✓ Note type '{model_name}' already exists with all required fields.",
-                            fg="green",
-                        )
-                        click.echo("  Updating templates and styling...")
-                        # Update the styling and templates
-                        css = get_card_css(language)
-                        templates = get_card_templates(language)
-                        client.update_card_styling_and_templates(
-                            model_name=model_name, css=css, templates=templates
-                        )
-                        click.secho(
-                            "  ✓ Templates and styling updated successfully.\n",
-                            fg="green",
-                        )
-                        success_count += 1
-                        continue
-                    else:
-                        click.secho(
-                            f"  ✗ Note type '{model_name}' exists but is missing fields:",
-                            fg="red",
-                        )
-                        click.echo(f"    {', '.join(missing_fields)}")
-                        click.echo("  Cannot update as it's missing required fields.")
-                        click.echo(
-                            "  Please manually recreate this note type or fix the missing fields.\n"
-                        )
-                        failure_count += 1
-                        continue
-                except Exception as e:
-                    click.secho(f"  ✗ Error checking fields: {e}", fg="red")
-                    click.echo("  Attempting to update templates and styling anyway...")
-                    try:
-                        # Try to update the styling and templates anyway
-                        css = get_card_css(language)
-                        templates = get_card_templates(language)
-                        client.update_card_styling_and_templates(
-                            model_name=model_name, css=css, templates=templates
-                        )
-                        click.secho(
-                            "  ✓ Templates and styling updated successfully.\n",
-                            fg="green",
-                        )
-                        success_count += 1
-                    except Exception as update_error:
-                        click.secho(
-                            f"  ✗ Error updating templates: {update_error}\n", fg="red"
-                        )
-                        failure_count += 1
-                    continue
-
-            # Create note type with templates and CSS
-            click.echo(f"  Creating new note type '{model_name}'...")
-            note_type_manager.create_note_type(language)
+        for update in result:
             click.secho(
-                f"  ✓ Created note type '{model_name}' successfully.\n", fg="green"
+                f"Processing {update.language.capitalize()} note type:", bold=True
             )
-            success_count += 1
-        except Exception as e:
-            click.secho(f"  ✗ Error creating note type: {e}\n", fg="red")
-            failure_count += 1
+            if update.error is not None:
+                click.secho(f"  ✗ {update.error}\n", fg="red")
+                failure_count += 1
+            else:
+                click.secho(f"  ✓ {update.description}\n", fg="green")
+                success_count += 1
 
     # Print summary based on success/failure
     click.secho("=== Setup Summary ===", fg="blue", bold=True)
@@ -179,8 +145,6 @@ def get_card_css(language: str = "mandarin") -> str:
     Returns:
         str: The CSS for the card styling.
     """
-    base_dir = Path(__file__).parent.parent / "card_styling" / "css"
-
     # Common CSS files for all languages
     css_files = ["common.css", "english_front.css"]
 
@@ -192,11 +156,11 @@ def get_card_css(language: str = "mandarin") -> str:
 
     combined_css = []
     for css_file in css_files:
-        try:
-            with open(base_dir / css_file) as f:
-                combined_css.append(f.read())
-        except FileNotFoundError:
+        css = _read_styling_file(f"css/{css_file}")
+        if css is None:
             print(f"Warning: CSS file {css_file} not found, skipping")
+        else:
+            combined_css.append(css)
 
     return "\n\n".join(combined_css)
 
@@ -210,24 +174,57 @@ def get_card_templates(language: str = "mandarin") -> dict:
     Returns:
         dict: The templates for the card styling.
     """
-    base_dir = Path(__file__).parent.parent / "card_styling" / "templates" / language
-    templates = {}
+    base_dir = f"templates/{language}"
+    return {
+        "Chinese front": {
+            "Front": _read_styling_file(f"{base_dir}/chinese_front_front.html", True),
+            "Back": _read_styling_file(f"{base_dir}/chinese_front_back.html", True),
+        },
+        "English front": {
+            "Front": _read_styling_file(f"{base_dir}/english_front_front.html", True),
+            "Back": _read_styling_file(f"{base_dir}/english_front_back.html", True),
+        },
+    }
+
+
+@cache
+def _read_styling_file(relative_path: str, required: bool = False) -> Optional[str]:
+    """Read a card_styling file once per process.
+
+    Args:
+        relative_path: The file's path within card_styling
+        required: Raise if the file is missing, rather than returning None
+
+    Raises:
+        FileNotFoundError: If a required file is missing
+    """
+    try:
+        with open(CARD_STYLING_DIR / relative_path) as f:
+            return f.read()
+    except FileNotFoundError:
+        if required:
+            raise
+        return None
 
-    # Load Chinese front templates
-    with open(base_dir / "chinese_front_front.html") as f:
-        chinese_front = f.read()
-    with open(base_dir / "chinese_front_back.html") as f:
-        chinese_back = f.read()
-    templates["Chinese front"] = {"Front": chinese_front, "Back": chinese_back}
 
-    # Load English front templates
-    with open(base_dir / "english_front_front.html") as f:
-        english_front = f.read()
-    with open(base_dir / "english_front_back.html") as f:
-        english_back = f.read()
-    templates["English front"] = {"Front": english_front, "Back": english_back}
+def content_hash(text: str) -> str:
+    """Hash styling or template text, ignoring line ending differences."""
+    return hashlib.sha256(text.replace("\r\n", "\n").encode()).hexdigest()
 
-    return templates
+
+class NoteTypeUpdate:
+    """The changes needed to bring one language's note type up to date."""
+
+    __slots__ = ("language", "model_name", "actions", "description", "error")
+
+    def __init__(self, language: str) -> None:
+        self.language = language
+        self.model_name = f"chinese-tutor-{language}"
+        # AnkiConnect actions making the changes; none if it's up to date
+        self.actions: List[Tuple[AnkiAction, Dict]] = []
+        self.description = f"Note type '{self.model_name}' is already up to date."
+        # Why the note type can't be set up, if it can't
+        self.error: Optional[str] = None
 
 
 class NoteTypeManager:
@@ -282,46 +279,11 @@ class NoteTypeManager:
         Returns:
             The name of the created note type
         """
-        # Get the appropriate flashcard class for this language
-        from tutor.llm_flashcards import get_flashcard_class_for_language
-
-        flashcard_class = get_flashcard_class_for_language(language)
-
-        # Determine the model name
-        model_name = f"chinese-tutor-{language}"
-
+        params = get_create_model_params(language)
+        model_name = params["modelName"]
         try:
-            # Get the field names from the flashcard class
-            fields = list(flashcard_class.ANKI_FIELD_NAMES.values())
-            # Add fields that aren't in the mapping
-            fields.append("Sample Usage (Audio)")
-            fields.append("Related Words")
-
-            # Get the templates and CSS for this language
-            templates = get_card_templates(language)
-            css = get_card_css(language)
-
             # Create the model with both Chinese front and English front templates
-            self.client.send_request(
-                AnkiAction.CREATE_MODEL,
-                {
-                    "modelName": model_name,
-                    "inOrderFields": fields,
-                    "css": css,
-                    "cardTemplates": [
-                        {
-                            "Name": "Chinese front",
-                            "Front": templates["Chinese front"]["Front"],
-                            "Back": templates["Chinese front"]["Back"],
-                        },
-                        {
-                            "Name": "English front",
-                            "Front": templates["English front"]["Front"],
-                            "Back": templates["English front"]["Back"],
-                        },
-                    ],
-                },
-            )
+            self.client.send_request(AnkiAction.CREATE_MODEL, params)
 
             print(
                 f"Created note type '{model_name}' with Chinese front and English front templates."
@@ -334,3 +296,174 @@ class NoteTypeManager:
                 AnkiAction.CREATE_MODEL.value,
                 str(e),
             )
+
+    def plan_updates(self, languages: List[str]) -> List[NoteTypeUpdate]:
+        """Work out what each language's note type needs, in one request.
+
+        The fields, styling and templates of every note type are fetched
+        together and compared by content hash with the local card_styling
+        files.
+
+        Args:
+            languages: The languages to set up ("mandarin" or "cantonese")
+
+        Returns:
+            The update for each language, to pass to apply_updates
+
+        Raises:
+            AnkiConnectError: If Anki couldn't be reached
+        """
+        from tutor.llm_flashcards import get_flashcard_class_for_language
+
+        updates = [NoteTypeUpdate(language) for language in languages]
+        actions: List[Tuple[AnkiAction, Optional[Dict]]] = [
+            (AnkiAction.MODEL_NAMES, None)
+        ]
+        for update in updates:
+            params = {"modelName": update.model_name}
+            actions += [
+                (AnkiAction.MODEL_FIELD_NAMES, params),
+                (AnkiAction.MODEL_STYLING, params),
+                (AnkiAction.MODEL_TEMPLATES, params),
+            ]
+        results = self.client.multi(actions)
+        if isinstance(results[0], AnkiConnectError):
+            raise results[0]
+        models = set(results[0])
+
+        for i, update in enumerate(updates):
+            if update.model_name not in models:
+                update.actions.append(
+                    (AnkiAction.CREATE_MODEL, get_create_model_params(update.language))
+                )
+                update.description = (
+                    f"Created note type '{update.model_name}' successfully."
+                )
+                continue
+
+            field_names, styling, templates = results[1 + 3 * i : 4 + 3 * i]
+            error = next(
+                (
+                    r
+                    for r in (field_names, styling, templates)
+                    if isinstance(r, AnkiConnectError)
+                ),
+                None,
+            )
+            if error is not None:
+                update.error = f"Error reading note type '{update.model_name}': {error}"
+                continue
+
+            expected_fields = get_flashcard_class_for_language(
+                update.language
+            ).get_required_anki_fields()
+            missing_fields = [f for f in expected_fields if f not in field_names]
+            if missing_fields:
+                update.error = (
+                    f"Note type '{update.model_name}' exists but is missing fields: "
+                    f"{', '.join(missing_fields)}. Please manually recreate this "
+                    "note type or fix the missing fields."
+                )
+                continue
+
+            changes = []
+            css = get_card_css(update.language)
+            if content_hash(styling.get("css", "")) != content_hash(css):
+                update.actions.append(
+                    (
+                        AnkiAction.UPDATE_MODEL_STYLING,
+                        {"model": {"name": update.model_name, "css": css}},
+                    )
+                )
+                changes.append("styling")
+
+            changed_templates = {
+                name: sides
+                for name, sides in get_card_templates(update.language).items()
+                if any(
+                    content_hash(templates.get(name, {}).get(side, ""))
+                    != content_hash(text)
+                    for side, text in sides.items()
+                )
+            }
+            if changed_templates:
+                update.actions.append(
+                    (
+                        AnkiAction.UPDATE_MODEL_TEMPLATES,
+                        {
+                            "model": {
+                                "name": update.model_name,
+                                "templates": changed_templates,
+                            }
+                        },
+                    )
+                )
+                changes.append(f"templates ({', '.join(changed_templates)})")
+
+            if changes:
+                update.description = (
+                    f"Updated {' and '.join(changes)} of '{update.model_name}'."
+                )
+        return updates
+
+    def apply_updates(self, updates: List[NoteTypeUpdate]) -> None:
+        """Make the changes planned by plan_updates, in one request.
+
+        Nothing is sent if every note type is up to date. Failures are recorded
+        in each update's error rather than raised.
+
+        Args:
+            updates: From plan_updates
+        """
+        pending = [u for u in updates if u.error is None and u.actions]
+        actions = [action for update in pending for action in update.actions]
+        try:
+            results = self.client.multi(actions)
+        except AnkiConnectError as e:
+            for update in pending:
+                update.error = f"Error updating note type '{update.model_name}': {e}"
+            return
+
+        for update in pending:
+            update_results, results = (
+                results[: len(update.actions)],
+                results[len(update.actions) :],
+            )
+            error = next(
+                (r for r in update_results if isinstance(r, AnkiConnectError)), None
+            )
+            if error is not None:
+                update.error = (
+                    f"Error updating note type '{update.model_name}': {error}"
+                )
+
+
+def get_create_model_params(language: str) -> Dict:
+    """Get the createModel parameters for a language's note type.
+
+    Args:
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        The parameters, with the fields, templates and CSS for the language
+    """
+    # Get the appropriate flashcard class for this language
+    from tutor.llm_flashcards import get_flashcard_class_for_language
+
+    flashcard_class = get_flashcard_class_for_language(language)
+
+    # The same fields setup-anki checks for, including the audio fields that
+    # aren't in ANKI_FIELD_NAMES
+    fields = list(dict.fromkeys(flashcard_class.get_required_anki_fields()))
+
+    # Get the templates and CSS for this language
+    templates = get_card_templates(language)
+    return {
+        "modelName": f"chinese-tutor-{language}",
+        "inOrderFields": fields,
+        "css": get_card_css(language),
+        "cardTemplates": [
+            {"Name": name, "Front": sides["Front"], "Back": sides["Back"]}
+            for name, sides in templates.items()
+        ],
+    }
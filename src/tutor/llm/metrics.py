@@ -0,0 +1,204 @@
+"""Timing and token usage of LLM calls.
+
+Wrap each call in track_llm_call() to record its latency, token usage, model
+and outcome. The totals can be rendered in the Prometheus text format, for the
+web app's /metrics endpoint, or as a summary table, for the end of CLI runs.
+
+Example:
+    with track_llm_call("dialogue", model) as call:
+        completion = openai_client.chat.completions.create(...)
+        call.record_usage(completion.usage)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from openai.types import CompletionUsage
+
+from tutor.utils.profiling import span
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_REFUSAL = "refusal"
+
+
+class LLMCall:
+    """Measurements for a single LLM call, filled in while it runs."""
+
+    __slots__ = ("outcome", "prompt_tokens", "completion_tokens", "cached_tokens")
+
+    def __init__(self) -> None:
+        self.outcome = OUTCOME_OK
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+
+    def record_usage(self, usage) -> None:
+        """Record the token usage reported with a completion, if any."""
+        if not isinstance(usage, CompletionUsage):
+            return
+        self.prompt_tokens = usage.prompt_tokens or 0
+        self.completion_tokens = usage.completion_tokens or 0
+        details = usage.prompt_tokens_details
+        self.cached_tokens = (details.cached_tokens or 0) if details else 0
+
+
+class _CallStats:
+    """Totals for all calls with the same name, model and outcome."""
+
+    __slots__ = (
+        "count",
+        "latency_sum",
+        "latency_max",
+        "bucket_counts",
+        "prompt_tokens",
+        "completion_tokens",
+        "cached_tokens",
+    )
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+
+    def add(self, latency: float, call: LLMCall) -> None:
+        self.count += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.bucket_counts[i] += 1
+        self.prompt_tokens += call.prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        self.cached_tokens += call.cached_tokens
+
+
+# Keyed by (name, model, outcome)
+_stats: Dict[Tuple[str, str, str], _CallStats] = {}
+_stats_lock = threading.Lock()
+
+
+@contextmanager
+def track_llm_call(name: str, model: str) -> Iterator[LLMCall]:
+    """Record the latency, token usage and outcome of the LLM call in the block.
+
+    The outcome is "ok" unless the block sets another one (e.g. "refusal") on
+    the yielded LLMCall, or "error" if the block raises without setting one.
+
+    Args:
+        name: What the call is for, e.g. "flashcards" or "dialogue"
+        model: The model called
+    """
+    call = LLMCall()
+    start = time.perf_counter()
+    try:
+        with span(f"llm.{name}", "llm"):
+            yield call
+    except BaseException:
+        if call.outcome == OUTCOME_OK:
+            call.outcome = OUTCOME_ERROR
+        raise
+    finally:
+        latency = time.perf_counter() - start
+        with _stats_lock:
+            stats = _stats.setdefault((name, model, call.outcome), _CallStats())
+            stats.add(latency, call)
+
+
+def has_llm_calls() -> bool:
+    """Check whether any LLM calls have been recorded."""
+    with _stats_lock:
+        return bool(_stats)
+
+
+def reset_llm_metrics() -> None:
+    """Forget all recorded LLM calls."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return (
+        "{"
+        + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+        + "}"
+    )
+
+
+def render_prometheus() -> str:
+    """Render the recorded calls in the Prometheus text exposition format."""
+    with _stats_lock:
+        items = sorted(_stats.items())
+        lines: List[str] = [
+            "# HELP tutor_llm_calls_total LLM calls by call, model and outcome.",
+            "# TYPE tutor_llm_calls_total counter",
+        ]
+        for (name, model, outcome), stats in items:
+            labels = _labels(call=name, model=model, outcome=outcome)
+            lines.append(f"tutor_llm_calls_total{labels} {stats.count}")
+
+        lines += [
+            "# HELP tutor_llm_call_duration_seconds Latency of LLM calls.",
+            "# TYPE tutor_llm_call_duration_seconds histogram",
+        ]
+        for (name, model, outcome), stats in items:
+            for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                labels = _labels(call=name, model=model, outcome=outcome, le=str(bound))
+                lines.append(f"tutor_llm_call_duration_seconds_bucket{labels} {count}")
+            labels = _labels(call=name, model=model, outcome=outcome, le="+Inf")
+            lines.append(
+                f"tutor_llm_call_duration_seconds_bucket{labels} {stats.count}"
+            )
+            labels = _labels(call=name, model=model, outcome=outcome)
+            lines.append(
+                f"tutor_llm_call_duration_seconds_sum{labels} {stats.latency_sum}"
+            )
+            lines.append(f"tutor_llm_call_duration_seconds_count{labels} {stats.count}")
+
+        lines += [
+            "# HELP tutor_llm_tokens_total Tokens used by LLM calls, by token type.",
+            "# TYPE tutor_llm_tokens_total counter",
+        ]
+        for (name, model, outcome), stats in items:
+            for token_type, tokens in (
+                ("prompt", stats.prompt_tokens),
+                ("completion", stats.completion_tokens),
+                ("cached", stats.cached_tokens),
+            ):
+                labels = _labels(
+                    call=name, model=model, outcome=outcome, type=token_type
+                )
+                lines.append(f"tutor_llm_tokens_total{labels} {tokens}")
+
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    """Format the recorded calls as a table, one row per call, model and outcome."""
+    header = (
+        f"{'LLM call':<14} {'model':<14} {'outcome':<8} {'calls':>5} "
+        f"{'avg s':>7} {'max s':>7} {'prompt':>8} {'cached':>8} {'output':>8}"
+    )
+    rows = [header, "-" * len(header)]
+    with _stats_lock:
+        for (name, model, outcome), stats in sorted(_stats.items()):
+            rows.append(
+                f"{name:<14} {model:<14} {outcome:<8} {stats.count:>5} "
+                f"{stats.latency_sum / stats.count:>7.2f} {stats.latency_max:>7.2f} "
+                f"{stats.prompt_tokens:>8} {stats.cached_tokens:>8} "
+                f"{stats.completion_tokens:>8}"
+            )
+    return "\n".join(rows)
@@ -1,6 +1,37 @@
-from typing import List, Literal, Union, ClassVar, Dict, Type, Any
+import re
+from functools import cache
+from typing import List, Literal, Optional, Union, ClassVar, Dict, Type, Any
 from pydantic.json_schema import SkipJsonSchema
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, create_model
+
+from tutor.utils.frequency import lookup_frequency
+from tutor.utils.logging import dprint
+from tutor.utils.profiling import span
+
+# Matches a stripped, non-blank line of the "Related Words" Anki field, in the
+# format written by AnkiConnectClient: "• word (pronunciation) - english [relationship]".
+# The leading bullet ("•" or "-") and the dash before the English are optional.
+# Lines are matched one at a time with possessive quantifiers, so a long line that
+# doesn't fit the format fails in linear time instead of backtracking.
+_RELATED_WORD_RE = re.compile(
+    r"""
+    (?:[•-]\s*+)?                       # optional bullet
+    (?P<word>[^(]*+)                    # text before the first "("
+    \((?P<pronunciation>[^)]*+)\)
+    \s*+(?:-\s*+)?                      # optional " - " separator
+    (?P<english>[^\[]*+)                # text before the first "["
+    \[(?P<relationship>.*)
+    """,
+    re.VERBOSE,
+)
+
+
+def _strip_closing_brackets(text: str) -> str:
+    """Strip the trailing "]", and any stray ones or whitespace around it."""
+    end = len(text)
+    while end and (text[end - 1] == "]" or text[end - 1].isspace()):
+        end -= 1
+    return text[:end].strip()
 
 
 class RelatedWord(BaseModel):
@@ -101,58 +132,73 @@ class LanguageFlashcard(BaseModel):
         raise NotImplementedError("Subclasses must implement _from_anki_json")
 
     @staticmethod
-    def _parse_related_words(
+    def _parse_related_words_data(
         related_words_text: str,
-        related_word_class: Type[RelatedWord],
         pronunciation_field: str,
-    ) -> List[RelatedWord]:
-        """Parse related words text into a list of RelatedWord objects.
+        malformed_lines: Optional[List[str]] = None,
+    ) -> List[Dict[str, str]]:
+        """Parse related words text into a list of raw related word dicts.
 
         Args:
             related_words_text: Text containing related words in the format "word (pronunciation) - english [relationship]"
-            related_word_class: The class to use for creating related word objects
             pronunciation_field: The name of the pronunciation field in the related word class
+            malformed_lines: Optional list that lines which could not be parsed are appended to.
+                If not given, malformed lines are reported with dprint.
 
         Returns:
-            List of RelatedWord objects
+            List of dicts with the RelatedWord fields, ready to be validated
         """
         related_words = []
 
-        # Split by lines and process each line
         for line in related_words_text.split("\n"):
             line = line.strip()
             if not line:
                 continue
+            match = _RELATED_WORD_RE.fullmatch(line)
+            if match is None:
+                if malformed_lines is not None:
+                    malformed_lines.append(line)
+                else:
+                    dprint(f"Skipping malformed related word: {line!r}")
+                continue
 
-            # Remove bullet points if present
-            if line.startswith("•") or line.startswith("-"):
-                line = line[1:].strip()
-
-            # Parse format: "word (pronunciation) - english [relationship]"
-            try:
-                # Split into parts
-                word_part, rest = line.split("(", 1)
-                pronunciation_part, rest = rest.split(")", 1)
-                rest = rest.strip()
-                if rest.startswith("-"):
-                    rest = rest[1:].strip()
-                english_part, relationship_part = rest.split("[", 1)
-                relationship_part = relationship_part.rstrip("]").strip()
-
-                # Create RelatedWord object with the appropriate pronunciation field
-                kwargs = {
-                    "word": word_part.strip(),
-                    "english": english_part.strip(),
-                    "relationship": relationship_part,
-                    pronunciation_field: pronunciation_part.strip(),
+            related_words.append(
+                {
+                    "word": match["word"].strip(),
+                    "english": match["english"].strip(),
+                    "relationship": _strip_closing_brackets(match["relationship"]),
+                    pronunciation_field: match["pronunciation"].strip(),
                 }
-                related_words.append(related_word_class(**kwargs))
-            except (ValueError, IndexError):
-                # Skip malformed entries
-                continue
+            )
 
         return related_words
 
+    @staticmethod
+    def _parse_related_words(
+        related_words_text: str,
+        related_word_class: Type[RelatedWord],
+        pronunciation_field: str,
+        malformed_lines: Optional[List[str]] = None,
+    ) -> List[RelatedWord]:
+        """Parse related words text into a list of RelatedWord objects.
+
+        Args:
+            related_words_text: Text containing related words in the format "word (pronunciation) - english [relationship]"
+            related_word_class: The class to use for creating related word objects
+            pronunciation_field: The name of the pronunciation field in the related word class
+            malformed_lines: Optional list that lines which could not be parsed are appended to.
+                If not given, malformed lines are reported with dprint.
+
+        Returns:
+            List of RelatedWord objects
+        """
+        return [
+            related_word_class(**kwargs)
+            for kwargs in LanguageFlashcard._parse_related_words_data(
+                related_words_text, pronunciation_field, malformed_lines
+            )
+        ]
+
     @classmethod
     def get_required_anki_fields(cls) -> List[str]:
         """Get list of required Anki note fields."""
@@ -236,25 +282,26 @@ class MandarinFlashcard(LanguageFlashcard):
         """Create a Mandarin flashcard from Anki note JSON."""
         fields = anki_json["fields"]
 
-        # Extract basic fields
-        instance = cls(
-            anki_note_id=anki_json["noteId"],
-            word=fields["Chinese"]["value"],
-            pinyin=fields["Pinyin"]["value"],
-            english=fields["English"]["value"],
-            sample_usage=fields["Sample Usage"]["value"],
-            sample_usage_english=fields["Sample Usage (English)"]["value"],
-            frequency=None,  # Currently field is only at generation
-        )
-
         # Parse related words if present
+        related_words = []
         if "Related Words" in fields and fields["Related Words"]["value"]:
             related_words_text = fields["Related Words"]["value"]
-            instance.related_words = cls._parse_related_words(
-                related_words_text, MandarinRelatedWord, "pinyin"
-            )
-
-        return instance
+            related_words = cls._parse_related_words_data(related_words_text, "pinyin")
+
+        # Validate the whole note in one pydantic-core call, related words included
+        return cls.model_validate(
+            {
+                "anki_note_id": anki_json["noteId"],
+                "word": fields["Chinese"]["value"],
+                "pinyin": fields["Pinyin"]["value"],
+                "english": fields["English"]["value"],
+                "sample_usage": fields["Sample Usage"]["value"],
+                "sample_usage_english": fields["Sample Usage (English)"]["value"],
+                # Not stored in Anki; filled in from the local index, if built
+                "frequency": lookup_frequency(fields["Chinese"]["value"], cls.LANGUAGE),
+                "related_words": related_words,
+            }
+        )
 
     def __str__(self):
         base_str = f"""
@@ -313,25 +360,28 @@ class CantoneseFlashcard(LanguageFlashcard):
         """Create a Cantonese flashcard from Anki note JSON."""
         fields = anki_json["fields"]
 
-        # Extract basic fields
-        instance = cls(
-            anki_note_id=anki_json["noteId"],
-            word=fields["Chinese"]["value"],
-            jyutping=fields["Jyutping"]["value"],
-            english=fields["English"]["value"],
-            sample_usage=fields["Sample Usage"]["value"],
-            sample_usage_english=fields["Sample Usage (English)"]["value"],
-            frequency=None,  # Currently field is only at generation
-        )
-
         # Parse related words if present
+        related_words = []
         if "Related Words" in fields and fields["Related Words"]["value"]:
             related_words_text = fields["Related Words"]["value"]
-            instance.related_words = cls._parse_related_words(
-                related_words_text, CantoneseRelatedWord, "jyutping"
+            related_words = cls._parse_related_words_data(
+                related_words_text, "jyutping"
             )
 
-        return instance
+        # Validate the whole note in one pydantic-core call, related words included
+        return cls.model_validate(
+            {
+                "anki_note_id": anki_json["noteId"],
+                "word": fields["Chinese"]["value"],
+                "jyutping": fields["Jyutping"]["value"],
+                "english": fields["English"]["value"],
+                "sample_usage": fields["Sample Usage"]["value"],
+                "sample_usage_english": fields["Sample Usage (English)"]["value"],
+                # Not stored in Anki; filled in from the local index, if built
+                "frequency": lookup_frequency(fields["Chinese"]["value"], cls.LANGUAGE),
+                "related_words": related_words,
+            }
+        )
 
     def __str__(self):
         base_str = f"""
@@ -358,6 +408,74 @@ class LanguageFlashcards(BaseModel):
     flashcards: List[LanguageFlashcard]
 
 
+@cache
+def get_flashcards_container_class(
+    flashcard_class: Type[LanguageFlashcard],
+) -> Type[BaseModel]:
+    """Get the cached model for a {"flashcards": [...]} object of one flashcard class.
+
+    Args:
+        flashcard_class: The language-specific flashcard class
+
+    Returns:
+        A model with a single "flashcards" field holding a list of flashcard_class
+    """
+    return create_model(
+        f"{flashcard_class.__name__}s",
+        flashcards=(List[flashcard_class], ...),
+    )
+
+
+@cache
+def get_flashcards_adapter(flashcard_class: Type[LanguageFlashcard]) -> TypeAdapter:
+    """Get the cached TypeAdapter used to parse LLM flashcard responses.
+
+    Building a TypeAdapter compiles a pydantic-core validator, so this is done once
+    per flashcard class. The adapter accepts every response shape we ask for: a list
+    of flashcards, an object with a "flashcards" array, or a single flashcard.
+
+    Args:
+        flashcard_class: The language-specific flashcard class to parse into
+
+    Returns:
+        A TypeAdapter for the union of the supported response shapes
+    """
+    return TypeAdapter(
+        Union[
+            List[flashcard_class],
+            get_flashcards_container_class(flashcard_class),
+            flashcard_class,
+        ]
+    )
+
+
+def parse_flashcards_json(
+    json_data: Union[str, bytes], flashcard_class: Type[LanguageFlashcard]
+) -> List[LanguageFlashcard]:
+    """Parse an LLM JSON response into a list of flashcards.
+
+    The JSON is validated directly by pydantic-core, without going through
+    json.loads and intermediate Python dicts.
+
+    Args:
+        json_data: The raw JSON response
+        flashcard_class: The language-specific flashcard class to parse into
+
+    Returns:
+        List of flashcards
+
+    Raises:
+        pydantic.ValidationError: If the response doesn't match any supported shape
+    """
+    with span("pydantic.parse_flashcards", "pydantic"):
+        parsed = get_flashcards_adapter(flashcard_class).validate_json(json_data)
+    if isinstance(parsed, list):
+        return parsed
+    if isinstance(parsed, flashcard_class):
+        return [parsed]
+    return parsed.flashcards
+
+
 # For backward compatibility
 ChineseFlashcard = MandarinFlashcard
 ChineseFlashcards = LanguageFlashcards
@@ -1,3 +1,5 @@
+from typing import List
+
 from tutor.utils.config import get_config
 
 _LANGUAGE_DESCRIPTIONS = {
@@ -6,11 +8,12 @@ _LANGUAGE_DESCRIPTIONS = {
 }
 
 
-def _get_flashcard_description(language: str) -> str:
+def _get_flashcard_description(language: str, structured_outputs: bool) -> str:
     """Get the flashcard description for the specified language.
 
     Args:
         language: The language to get the description for ("mandarin" or "cantonese")
+        structured_outputs: Whether the response shape is enforced by a JSON schema
 
     Returns:
         The flashcard description for the language
@@ -19,12 +22,21 @@ def _get_flashcard_description(language: str) -> str:
     pronunciation_field = "pinyin" if language.lower() == "mandarin" else "jyutping"
     learner_level = get_config().learner_level
 
-    return f"""
+    description = f"""
 Generate a {language_name} flashcard that helps {learner_level} students understand:
 1. The word's meaning and usage context
 2. How it's naturally used in sentences
 3. Its relationship to other commonly paired words or words with similar patterns
+"""
+
+    # With Structured Outputs, the JSON schema sent alongside the prompt already
+    # describes every field
+    if structured_outputs:
+        return description
 
+    return (
+        description
+        + f"""
 Your response must be a valid JSON object with these fields:
 - "word": The Chinese character(s)
 - "{pronunciation_field}": The pronunciation with tone marks/numbers
@@ -37,67 +49,119 @@ Your response must be a valid JSON object with these fields:
   - "english": The English translation
   - "relationship": How this word relates to the main word (e.g., "synonym", "antonym", "similar pattern")
 """
+    )
+
+
+def _get_response_instructions(multiple: bool, structured_outputs: bool) -> str:
+    """Get the instructions describing the shape of the JSON response.
+
+    Args:
+        multiple: Whether the response should contain multiple flashcards
+        structured_outputs: Whether the response shape is enforced by a JSON schema
+
+    Returns:
+        The instructions, or an empty string when Structured Outputs enforce the shape
+    """
+    if structured_outputs:
+        return ""
+    if multiple:
+        return 'Respond with a valid JSON object that has a "flashcards" array containing multiple flashcard objects, one for each extracted word or phrase.\n'
+    return (
+        "Respond with a single valid JSON object that follows this structure exactly.\n"
+    )
 
 
-def get_generate_flashcard_from_word_prompt(word: str, language: str = "mandarin"):
+def get_generate_flashcard_from_word_prompt(
+    word: str, language: str = "mandarin", structured_outputs: bool = False
+):
     """Generate a prompt for creating a flashcard from a word.
 
     Args:
         word: The word to create a flashcard for
         language: The language of the word ("mandarin" or "cantonese")
+        structured_outputs: Whether the response is requested with Structured
+            Outputs, whose JSON schema already describes the fields
 
     Returns:
         A prompt for generating a flashcard
     """
-    flashcard_description = _get_flashcard_description(language)
+    flashcard_description = _get_flashcard_description(language, structured_outputs)
+    response_instructions = _get_response_instructions(False, structured_outputs)
 
     return f"""Generate a {language} flashcard for the word/phrase {word}. If the input seems wrong, please select the most-likely intended phrase.
 
-Respond with a single valid JSON object that follows this structure exactly.
-{flashcard_description}"""
+{response_instructions}{flashcard_description}"""
 
 
-def get_generate_flashcard_from_paragraph_prompt(text: str, language: str = "mandarin"):
+def get_generate_flashcards_from_words_prompt(
+    words: List[str], language: str = "mandarin", structured_outputs: bool = False
+):
+    """Generate a prompt for creating one flashcard for each of several words.
+
+    Args:
+        words: The words to create flashcards for
+        language: The language of the words ("mandarin" or "cantonese")
+        structured_outputs: Whether the response is requested with Structured
+            Outputs, whose JSON schema already describes the fields
+
+    Returns:
+        A prompt for generating flashcards
+    """
+    flashcard_description = _get_flashcard_description(language, structured_outputs)
+    response_instructions = _get_response_instructions(True, structured_outputs)
+
+    return f"""Generate a {language} flashcard for each of these words/phrases, in order: {", ".join(words)}. If an input seems wrong, please select the most-likely intended phrase.
+
+{response_instructions}{flashcard_description}"""
+
+
+def get_generate_flashcard_from_paragraph_prompt(
+    text: str, language: str = "mandarin", structured_outputs: bool = False
+):
     """Generate a prompt for creating flashcards from a paragraph.
 
     Args:
         text: The paragraph to extract words from
         language: The language of the paragraph ("mandarin" or "cantonese")
+        structured_outputs: Whether the response is requested with Structured
+            Outputs, whose JSON schema already describes the fields
 
     Returns:
         A prompt for generating flashcards
     """
     language_name = _LANGUAGE_DESCRIPTIONS.get(language.lower(), "Mandarin Chinese")
-    flashcard_description = _get_flashcard_description(language)
+    flashcard_description = _get_flashcard_description(language, structured_outputs)
+    response_instructions = _get_response_instructions(True, structured_outputs)
 
     return f"""Below the line is a paragraph from an article in {language_name}. Extract 3-5 key vocabulary and grammar phrases, except proper nouns.
 --
 {text}
 --
 
-Respond with a valid JSON object that has a "flashcards" array containing multiple flashcard objects, one for each extracted word or phrase.
-{flashcard_description}"""
+{response_instructions}{flashcard_description}"""
 
 
 def get_generate_flashcard_from_llm_conversation_prompt(
-    text: str, language: str = "mandarin"
+    text: str, language: str = "mandarin", structured_outputs: bool = False
 ):
     """Generate a prompt for creating flashcards from a conversation.
 
     Args:
         text: The conversation to extract words from
         language: The language of the conversation ("mandarin" or "cantonese")
+        structured_outputs: Whether the response is requested with Structured
+            Outputs, whose JSON schema already describes the fields
 
     Returns:
         A prompt for generating flashcards
     """
     language_name = _LANGUAGE_DESCRIPTIONS.get(language.lower(), "Mandarin Chinese")
-    flashcard_description = _get_flashcard_description(language)
+    flashcard_description = _get_flashcard_description(language, structured_outputs)
+    response_instructions = _get_response_instructions(True, structured_outputs)
 
     return f"""Below the line is a conversation between a language learner and a LLM assistant in {language_name}. Extract 3-5 key vocabulary and grammar phrases, except proper nouns.
 --
 {text}
 --
 
-Respond with a valid JSON object that has a "flashcards" array containing multiple flashcard objects, one for each extracted word or phrase.
-{flashcard_description}"""
+{response_instructions}{flashcard_description}"""
@@ -0,0 +1,149 @@
+"""OpenAI calls through the shared rate limiter (see tutor.utils.rate_limit)."""
+
+from functools import cache
+from typing import Any, Callable, Iterator, TypeVar
+
+import httpx
+import openai
+from openai import DefaultHttpxClient, Stream
+
+from tutor.utils.rate_limit import (
+    AdaptiveLimiter,
+    RetryableError,
+    call_with_backoff,
+    get_limiter,
+    get_retry_after,
+)
+
+T = TypeVar("T")
+
+OPENAI_LIMITER = "openai"
+
+# 503 is Azure OpenAI's "the model is overloaded"; the rest are transient
+THROTTLED_STATUS_CODES = (429, 503)
+TRANSIENT_STATUS_CODES = (408, 409, 500, 502, 504)
+# Sent with a 429 when the account has run out of credit, which waiting won't fix
+FATAL_ERROR_CODES = ("insufficient_quota",)
+
+
+@cache
+def get_openai_http_client() -> httpx.Client:
+    """Get the HTTP client for OpenAI clients, whose responses feed the limiter.
+
+    Pass it as OpenAI(http_client=..., max_retries=0); the client's own retries
+    are replaced by call_openai(). Sharing it also pools connections between
+    calls.
+    """
+    limiter = get_limiter(OPENAI_LIMITER)
+
+    def on_response(response: httpx.Response) -> None:
+        limiter.update_from_headers(response.headers)
+
+    return DefaultHttpxClient(event_hooks={"response": [on_response]})
+
+
+class _LimitedStream:
+    """A stream that stays counted as in flight by the limiter until it has been
+    read to the end or closed, since the generation takes most of the call."""
+
+    def __init__(self, stream: Stream, limiter: AdaptiveLimiter) -> None:
+        self._stream = stream
+        self._limiter = limiter
+        self._released = False
+
+    def _release(self, succeeded: bool = True) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter.release(succeeded=succeeded)
+
+    def __iter__(self) -> Iterator[Any]:
+        succeeded = False
+        try:
+            yield from self._stream
+            succeeded = True
+        except GeneratorExit:
+            # The reader stopped early, which isn't a failed call
+            self._stream.close()
+            succeeded = True
+            raise
+        finally:
+            self._release(succeeded)
+
+    def close(self) -> None:
+        self._stream.close()
+        self._release()
+
+    def __enter__(self) -> "_LimitedStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def __del__(self) -> None:
+        # A stream dropped without being read or closed
+        self._release()
+
+
+def call_openai(call: Callable[[], T]) -> T:
+    """Make an OpenAI API call, waiting and retrying while we're rate limited.
+
+    Args:
+        call: Makes the API request, e.g. a chat.completions.create() call. For
+            streams only opening the stream is retried, since fields may
+            already have been handled once it has started. A stream counts
+            towards the concurrency limit until it is read to the end or closed.
+
+    Returns:
+        The call's result
+
+    Raises:
+        openai.APIError: If the call failed for good, or was still throttled
+            after every retry
+    """
+
+    def attempt() -> T:
+        try:
+            return call()
+        except openai.APIStatusError as e:
+            if e.code in FATAL_ERROR_CODES:
+                raise
+            if e.status_code in THROTTLED_STATUS_CODES:
+                raise RetryableError(str(e), get_retry_after(e.response.headers)) from e
+            if e.status_code in TRANSIENT_STATUS_CODES:
+                raise RetryableError(str(e), throttled=False) from e
+            raise
+        except openai.APIConnectionError as e:
+            # Includes timeouts
+            raise RetryableError(str(e), throttled=False) from e
+
+    limiter = get_limiter(OPENAI_LIMITER)
+    try:
+        result = call_with_backoff(limiter, attempt, hold=True)
+    except RetryableError as e:
+        raise e.__cause__ from None
+    if isinstance(result, Stream):
+        return _LimitedStream(result, limiter)
+    limiter.release()
+    return result
+
+
+def is_retryable_error(error: openai.APIError) -> bool:
+    """Check whether an error from call_openai() may go away if the call is made
+    again later, as opposed to e.g. running out of quota or a bad API key.
+
+    Args:
+        error: The error call_openai() raised
+
+    Returns:
+        Whether the service was throttling us or failed transiently
+    """
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return (
+        isinstance(error, openai.APIStatusError)
+        and error.code not in FATAL_ERROR_CODES
+        and error.status_code in THROTTLED_STATUS_CODES + TRANSIENT_STATUS_CODES
+    )
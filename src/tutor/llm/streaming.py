@@ -0,0 +1,132 @@
+"""Incremental parsing of JSON responses streamed from the LLM.
+
+The parser is a small state machine that consumes the response text as it
+arrives and reports every string value as soon as its closing quote is seen,
+together with its path in the document. This lets callers display fields of a
+flashcard before the rest of the JSON has been generated.
+"""
+
+import json
+from typing import List, Optional, Tuple, Union
+
+JsonPath = Tuple[Union[str, int], ...]
+
+
+class _ObjectFrame:
+    """State for a JSON object being parsed."""
+
+    __slots__ = ("key", "expecting_key")
+
+    def __init__(self) -> None:
+        self.key: Union[str, None] = None
+        self.expecting_key = True
+
+
+class _ArrayFrame:
+    """State for a JSON array being parsed."""
+
+    __slots__ = ("index",)
+
+    def __init__(self) -> None:
+        self.index = 0
+
+
+class IncrementalJsonParser:
+    """Reports completed string values of a JSON document as it is streamed.
+
+    Only string values are reported; numbers, booleans and nulls are skipped.
+    The parser assumes the input is well-formed JSON, which is what the LLM is
+    asked (or constrained) to produce. The complete document should still be
+    validated once the stream has finished.
+
+    Example:
+        parser = IncrementalJsonParser()
+        parser.feed('{"word": "你')   # -> []
+        parser.feed('好", "en')       # -> [(("word",), "你好")]
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[Union[_ObjectFrame, _ArrayFrame]] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_chars: List[str] = []
+
+    def _path(self) -> JsonPath:
+        return tuple(
+            frame.key if isinstance(frame, _ObjectFrame) else frame.index
+            for frame in self._stack
+        )
+
+    def feed(self, text: str) -> List[Tuple[JsonPath, str]]:
+        """Consume the next chunk of the JSON document.
+
+        Args:
+            text: The next chunk of the streamed response
+
+        Returns:
+            (path, value) pairs for every string value completed by this chunk,
+            where path holds the object keys and array indexes leading to the value
+        """
+        completed = []
+
+        for char in text:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    value = json.loads('"' + "".join(self._string_chars) + '"')
+                    self._string_chars = []
+                    frame = self._stack[-1] if self._stack else None
+                    if isinstance(frame, _ObjectFrame) and frame.expecting_key:
+                        frame.key = value
+                        frame.expecting_key = False
+                    else:
+                        completed.append((self._path(), value))
+                    continue
+                self._string_chars.append(char)
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._stack.append(_ObjectFrame())
+            elif char == "[":
+                self._stack.append(_ArrayFrame())
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+            elif char == ",":
+                frame = self._stack[-1] if self._stack else None
+                if isinstance(frame, _ObjectFrame):
+                    frame.expecting_key = True
+                elif isinstance(frame, _ArrayFrame):
+                    frame.index += 1
+
+        return completed
+
+    def partial_value(self) -> Optional[Tuple[JsonPath, str]]:
+        """Get the string value currently being streamed, if any.
+
+        Returns:
+            (path, prefix) for the incomplete string value, where prefix is the
+            decoded text received so far, or None if the parser is not inside a
+            string value. An escape sequence cut off by the end of the chunk is
+            left out of the prefix until the rest of it arrives.
+        """
+        if not self._in_string:
+            return None
+        frame = self._stack[-1] if self._stack else None
+        if isinstance(frame, _ObjectFrame) and frame.expecting_key:
+            return None
+
+        raw = "".join(self._string_chars)
+        if self._escaped:
+            raw = raw[:-1]
+        # An incomplete \uXXXX escape is at most 5 characters long
+        for end in range(len(raw), max(len(raw) - 6, -1), -1):
+            try:
+                return self._path(), json.loads('"' + raw[:end] + '"')
+            except ValueError:
+                continue
+        return None
@@ -0,0 +1,36 @@
+"""Local token counting for prompt budgeting.
+
+Counts use tiktoken, so no API call is needed. If the encoding can't be loaded
+(tiktoken downloads it on first use), counts fall back to an estimate of one
+token per Chinese character and one per four other characters.
+"""
+
+from functools import cache
+from typing import Optional
+
+import tiktoken
+
+from ..utils.chinese import is_han
+from ..utils.logging import dprint
+
+# The encoding used by the gpt-4o family of models
+ENCODING_NAME = "o200k_base"
+
+
+@cache
+def _get_encoding() -> Optional[tiktoken.Encoding]:
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        dprint(f"Could not load {ENCODING_NAME}, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a piece of text."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    han_chars = sum(1 for char in text if is_han(char))
+    return han_chars + (len(text) - han_chars + 3) // 4
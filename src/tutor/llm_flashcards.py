@@ -1,76 +1,227 @@
+import traceback
+from functools import cache
+import openai
 from openai import OpenAI
 import click
-from typing import List, Type
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
 from tutor.utils.logging import dprint
 from tutor.utils.anki import AnkiConnectClient, get_subdeck
-from tutor.llm.models import LanguageFlashcard, MandarinFlashcard, CantoneseFlashcard
-from tutor.cli_global_state import get_model, get_skip_confirm
-from tutor.utils.azure import text_to_speech
+from tutor.utils.anki_targets import AnkiTarget, for_each_target
+from tutor.llm.models import (
+    LanguageFlashcard,
+    MandarinFlashcard,
+    CantoneseFlashcard,
+    get_flashcards_container_class,
+    parse_flashcards_json,
+)
+from tutor.llm.metrics import OUTCOME_REFUSAL, track_llm_call
+from tutor.llm.rate_limit import call_openai, get_openai_http_client
+from tutor.llm.streaming import IncrementalJsonParser, JsonPath
+from tutor.cli_global_state import (
+    get_model,
+    get_skip_confirm,
+    get_structured_outputs,
+)
+from tutor.utils.azure import cancel_text_to_speech, text_to_speech_async
 from tutor.utils.config import get_config
+from tutor.utils.frequency import lookup_frequency
 
 GPT_3_5_TURBO = "gpt-3.5-turbo"
 GPT_4 = "gpt-4"
 GPT_4o = "gpt-4o"
 
+# Number of upcoming flashcards to synthesize audio for while the user confirms
+TTS_PREFETCH_FLASHCARDS = 2
 
-def generate_flashcards(text, language: str = "mandarin"):
+# Models that support Structured Outputs (response_format type "json_schema")
+STRUCTURED_OUTPUT_MODELS = (GPT_4o,)
+
+
+@cache
+def get_flashcards_response_format(
+    flashcard_class: Type[LanguageFlashcard],
+) -> Dict[str, Any]:
+    """Get the cached Structured Outputs response format for a flashcard class.
+
+    The JSON schema is generated once per language and reused for every request.
+
+    :param flashcard_class: The language-specific flashcard class.
+    :return: A response_format parameter for the chat completions API.
+    """
+    container_class = get_flashcards_container_class(flashcard_class)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": container_class.__name__,
+            "schema": _to_strict_json_schema(container_class.model_json_schema()),
+            "strict": True,
+        },
+    }
+
+
+def _to_strict_json_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Adapt a pydantic JSON schema to the subset Structured Outputs accepts.
+
+    In strict mode every object must list all of its properties as required and
+    forbid any others, and defaults aren't supported; optional fields are
+    expressed by allowing null instead, as the flashcard models already do.
+
+    :param schema: A JSON schema, or a subschema of one.
+    :return: A strict copy of the schema.
+    """
+    strict = {key: value for key, value in schema.items() if key != "default"}
+    for key in ("properties", "$defs"):
+        if key in strict:
+            strict[key] = {
+                name: _to_strict_json_schema(subschema)
+                for name, subschema in strict[key].items()
+            }
+    for key in ("anyOf", "allOf"):
+        if key in strict:
+            strict[key] = [
+                _to_strict_json_schema(subschema) for subschema in strict[key]
+            ]
+    if "items" in strict:
+        strict["items"] = _to_strict_json_schema(strict["items"])
+    if strict.get("type") == "object":
+        strict["required"] = list(strict.get("properties", {}))
+        strict["additionalProperties"] = False
+    return strict
+
+
+def generate_flashcards(
+    text,
+    language: str = "mandarin",
+    on_field: Optional[Callable[[JsonPath, str], None]] = None,
+):
     """
     Generates flashcard content from the given text using OpenAI's GPT model.
 
     :param text: The text from which to generate flashcards.
     :param language: The language to generate flashcards for ("mandarin" or "cantonese").
-    :return: Generated flashcard content.
+    :param on_field: If given, the response is streamed and this is called with
+        (path, value) for each string field as soon as it is complete. The path is
+        relative to the flashcard, e.g. ("word",) or ("related_words", 0, "word").
+    :return: Generated flashcard content, or an empty list if the response
+        couldn't be used.
+    :raises openai.APIError: If the OpenAI call failed for good, e.g. it was
+        still throttled after every retry or the account is out of quota.
     """
-    openai_client = OpenAI()
+    # Retries go through the shared rate limiter rather than the client
+    openai_client = OpenAI(max_retries=0, http_client=get_openai_http_client())
 
     # Select the appropriate flashcard class based on language
     flashcard_class = get_flashcard_class_for_language(language)
 
+    # With Structured Outputs the JSON schema constrains the response, so the
+    # prompt doesn't need to describe the fields
+    if get_structured_outputs():
+        response_format = get_flashcards_response_format(flashcard_class)
+    else:
+        response_format = {"type": "json_object"}
+
     try:
         dprint(text)
-        # Use the standard completion API instead of parse
-        completion = openai_client.chat.completions.create(
-            model=get_model(),
-            response_format={"type": "json_object"},
-            messages=[{"role": "user", "content": text}],
-            seed=69,
-        )
-
-        # Extract the JSON content from the response
-        response_content = completion.choices[0].message.content
-        dprint(f"Response content: {response_content}")
-
-        # Parse the JSON content into flashcard objects
-        import json
-        from pydantic import TypeAdapter
-
-        # Parse the JSON response
-        response_data = json.loads(response_content)
-
-        # Handle both single flashcard and list of flashcards
-        if isinstance(response_data, list):
-            flashcards_data = response_data
+        if on_field is not None:
+            response_content = _stream_completion(
+                openai_client, text, response_format, on_field
+            )
         else:
-            # If it's a single object or has a nested structure
-            if "flashcards" in response_data:
-                flashcards_data = response_data["flashcards"]
-            else:
-                # Treat as a single flashcard
-                flashcards_data = [response_data]
-
-        # Use TypeAdapter to convert the JSON data to flashcard objects
-        adapter = TypeAdapter(List[flashcard_class])
-        flashcards = adapter.validate_python(flashcards_data)
+            model = get_model()
+            with track_llm_call("flashcards", model) as call:
+                completion = call_openai(
+                    lambda: openai_client.chat.completions.create(
+                        model=model,
+                        response_format=response_format,
+                        messages=[{"role": "user", "content": text}],
+                        seed=69,
+                    )
+                )
+                call.record_usage(completion.usage)
+
+                # Extract the JSON content from the response
+                message = completion.choices[0].message
+                if message.refusal:
+                    call.outcome = OUTCOME_REFUSAL
+                    raise ValueError(
+                        f"Model refused to generate flashcards: {message.refusal}"
+                    )
+                response_content = message.content
+        dprint(f"Response content: {response_content}")
 
+        # Parse the JSON content into flashcard objects, handling both a single
+        # flashcard and a list of flashcards
+        flashcards = parse_flashcards_json(response_content, flashcard_class)
+        for flashcard in flashcards:
+            if flashcard.frequency is None:
+                flashcard.frequency = lookup_frequency(flashcard.word, language)
         return flashcards
+    except openai.APIError:
+        # The call failed for good after any retries; let the caller report the
+        # words rather than losing them
+        raise
     except Exception as e:
         print(f"Error generating {language} flashcards:", e)
-        import traceback
-
         traceback.print_exc()
         return []
 
 
+def _stream_completion(
+    openai_client: OpenAI,
+    text: str,
+    response_format: Dict[str, Any],
+    on_field: Callable[[JsonPath, str], None],
+) -> str:
+    """Stream a flashcard completion, reporting fields as they are generated.
+
+    :param openai_client: The OpenAI client to use.
+    :param text: The prompt.
+    :param response_format: The response_format parameter for the request.
+    :param on_field: Called with (path, value) for each completed string field,
+        with the path relative to the flashcard.
+    :return: The complete response content.
+    """
+    model = get_model()
+    with track_llm_call("flashcards_stream", model) as call:
+        # Only opening the stream is retried, as fields may have been reported
+        stream = call_openai(
+            lambda: openai_client.chat.completions.create(
+                model=model,
+                response_format=response_format,
+                messages=[{"role": "user", "content": text}],
+                seed=69,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        )
+
+        parser = IncrementalJsonParser()
+        content = []
+        refusal = []
+        for chunk in stream:
+            call.record_usage(chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.refusal:
+                refusal.append(delta.refusal)
+            if not delta.content:
+                continue
+            content.append(delta.content)
+            for path, value in parser.feed(delta.content):
+                # Strip the {"flashcards": [...]} container, if any
+                if path and path[0] == "flashcards":
+                    path = path[2:]
+                on_field(path, value)
+
+        if refusal:
+            call.outcome = OUTCOME_REFUSAL
+            raise ValueError(
+                f"Model refused to generate flashcards: {''.join(refusal)}"
+            )
+    return "".join(content)
+
+
 def get_flashcard_class_for_language(language: str) -> Type[LanguageFlashcard]:
     """
     Returns the appropriate flashcard class for the given language.
@@ -86,15 +237,18 @@ def get_flashcard_class_for_language(language: str) -> Type[LanguageFlashcard]:
         return MandarinFlashcard
 
 
-def get_word_exists_query(word: str, language: str = "mandarin"):
+def get_word_exists_query(
+    word: str, language: str = "mandarin", deck: Optional[str] = None
+):
     """
     Returns a query to check if a word exists in Anki.
 
     :param word: The word to check for.
     :param language: The language of the word.
+    :param deck: The deck to check; defaults to the configured default deck.
     :return: An Anki query string.
     """
-    return f'"deck:{get_config().default_deck}" Chinese:{word}'
+    return f'"deck:{deck or get_config().default_deck}" Chinese:{word}'
 
 
 def get_similar_words_exists_query(word: str):
@@ -102,60 +256,119 @@ def get_similar_words_exists_query(word: str):
 
 
 def maybe_add_flashcards_to_deck(
-    flashcards: List[LanguageFlashcard], deck: str
+    flashcards: List[LanguageFlashcard], deck: str, show_flashcards: bool = True
 ) -> bool:
     """Add flashcards to deck.
 
     The caller should have already checked if the cards exist in Anki.
     This function will only ask for confirmation and add the cards.
 
+    Args:
+        flashcards: The flashcards to add
+        deck: The deck to add them to
+        show_flashcards: Print each flashcard before asking for confirmation. Pass
+            False if the flashcards were already displayed while streaming.
+
+    Returns:
+        bool: True if any cards were added, False if all cards were skipped
+    """
+    return maybe_add_flashcards_to_targets(
+        flashcards, [AnkiTarget(deck, client=AnkiConnectClient())], show_flashcards
+    )
+
+
+def maybe_add_flashcards_to_targets(
+    flashcards: List[LanguageFlashcard],
+    targets: Sequence[AnkiTarget],
+    show_flashcards: bool = True,
+) -> bool:
+    """Add flashcards to several decks or profiles, asking once per card.
+
+    Each card's audio is synthesized once, then the card is added to every
+    target concurrently.
+
+    Args:
+        flashcards: The flashcards to add
+        targets: The decks to add them to, from resolve_targets
+        show_flashcards: As for maybe_add_flashcards_to_deck
+
     Returns:
         bool: True if any cards were added, False if all cards were skipped
     """
-    ankiconnect_client = AnkiConnectClient()
     num_added = 0
 
     try:
-        for f in flashcards:
-            print(f)
+        for i, f in enumerate(flashcards):
+            # Synthesize audio for this and the next few cards in the background
+            # while the user decides, so adding a card doesn't wait on TTS
+            for upcoming in flashcards[i : i + 1 + TTS_PREFETCH_FLASHCARDS]:
+                text_to_speech_async(upcoming.sample_usage, upcoming.LANGUAGE)
+                text_to_speech_async(upcoming.word, upcoming.LANGUAGE)
+
+            if show_flashcards:
+                print(f)
 
             if not get_skip_confirm():
                 try:
                     if not click.confirm("Add this to deck?", err=True, default=True):
                         dprint(" - skipped")
+                        _discard_audio([f])
                         continue
                 except (KeyboardInterrupt, EOFError):
                     print("\nAborted by user")
                     return False
 
             try:
-                # Generate audio for both the word and sample usage
-                sample_usage_audio_filepath = text_to_speech(f.sample_usage, f.LANGUAGE)
-                word_audio_filepath = text_to_speech(f.word, f.LANGUAGE)
-
-                # Add the flashcard with both audio files
-                note_id = ankiconnect_client.add_flashcard(
-                    deck,
-                    f,
-                    sample_usage_audio_filepath=sample_usage_audio_filepath,
-                    word_audio_filepath=word_audio_filepath,
-                )
-                dprint(f" - added with note ID: {note_id}!")
-                num_added += 1
-                click.secho(f"Added {num_added} new card(s)!", fg="green")
+                # Wait for the audio for both the word and sample usage
+                sample_usage_audio_filepath = text_to_speech_async(
+                    f.sample_usage, f.LANGUAGE
+                ).result()
+                word_audio_filepath = text_to_speech_async(f.word, f.LANGUAGE).result()
             except Exception as e:
                 click.secho(
                     f"Error adding flashcard for '{f.word}': {str(e)}", fg="red"
                 )
                 continue
 
+            def add_to_target(target: AnkiTarget) -> bool:
+                try:
+                    # Add the flashcard with both audio files
+                    note_id = target.client.add_flashcard(
+                        target.deck,
+                        f,
+                        sample_usage_audio_filepath=sample_usage_audio_filepath,
+                        word_audio_filepath=word_audio_filepath,
+                    )
+                    dprint(f" - added to {target} with note ID: {note_id}!")
+                    return True
+                except Exception as e:
+                    where = f" to {target}" if len(targets) > 1 else ""
+                    click.secho(
+                        f"Error adding flashcard for '{f.word}'{where}: {str(e)}",
+                        fg="red",
+                    )
+                    return False
+
+            if any(for_each_target(targets, add_to_target)):
+                num_added += 1
+                click.secho(f"Added {num_added} new card(s)!", fg="green")
+
     except KeyboardInterrupt:
         click.secho("\nAborted by user", fg="yellow", bold=True)
         return False
     finally:
+        # Drop any audio still being prefetched for cards that weren't added
+        _discard_audio(flashcards)
         return num_added > 0
 
 
+def _discard_audio(flashcards: List[LanguageFlashcard]) -> None:
+    """Discard background audio synthesis for the given flashcards."""
+    for f in flashcards:
+        cancel_text_to_speech(f.sample_usage, f.LANGUAGE)
+        cancel_text_to_speech(f.word, f.LANGUAGE)
+
+
 def maybe_add_flashcards(flashcards: List[LanguageFlashcard], subdeck: str):
     return maybe_add_flashcards_to_deck(
         flashcards, get_subdeck(get_config().default_deck, subdeck)
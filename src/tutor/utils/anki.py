@@ -1,12 +1,20 @@
 from enum import Enum
 import json
+import os
 from pathlib import Path
 import platform
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
 from tutor.llm.models import LanguageFlashcard
+from tutor.utils.config import DEFAULT_ANKI_PROFILE
+from tutor.utils.profiling import span
+
+DEFAULT_ANKI_CONNECT_URL = "http://localhost:8765"
+# Overrides the default AnkiConnect address, e.g. to point tests and benchmarks
+# at a FakeAnkiConnect
+ANKI_CONNECT_URL_ENV = "ANKI_CONNECT_URL"
 
 
 class AnkiConnectError(Exception):
@@ -49,11 +57,19 @@ class AnkiAction(Enum):
     CREATE_MODEL = "createModel"  # Create a new model
     MODEL_FIELD_NAMES = "modelFieldNames"  # Get field names for a model
     DELETE_MODEL = "deleteModelAndNotes"  # Delete a model and its notes
+    MULTI = "multi"  # Perform several actions in one request
 
 
 class AnkiConnectClient:
-    def __init__(self, address="http://localhost:8765"):
-        self.address = address
+    def __init__(self, address: Optional[str] = None):
+        """
+        Args:
+            address: The AnkiConnect URL; defaults to $ANKI_CONNECT_URL if set,
+                otherwise DEFAULT_ANKI_CONNECT_URL
+        """
+        self.address = address or os.environ.get(
+            ANKI_CONNECT_URL_ENV, DEFAULT_ANKI_CONNECT_URL
+        )
         self.headers = {"Content-Type": "application/json"}
 
     def send_request(self, action: AnkiAction, params: Optional[Dict] = None) -> Dict:
@@ -61,37 +77,74 @@ class AnkiConnectClient:
         if not isinstance(action, AnkiAction):
             raise ValueError("Invalid action type")
 
-        try:
-            payload = json.dumps(
-                {"action": action.value, "version": 6, "params": params or {}}
-            )
-            response = requests.post(self.address, data=payload, headers=self.headers)
+        with span(f"anki.{action.value}", "anki"):
+            try:
+                payload = json.dumps(
+                    {"action": action.value, "version": 6, "params": params or {}}
+                )
+                response = requests.post(
+                    self.address, data=payload, headers=self.headers
+                )
+
+                if response.status_code != 200:
+                    raise AnkiConnectError(
+                        f"Request failed with status {response.status_code}",
+                        action.value,
+                    )
+
+                result = response.json()
+                if "error" in result and result["error"]:
+                    raise AnkiConnectError(result["error"], action.value, result)
 
-            if response.status_code != 200:
+                return result.get("result")
+            except requests.exceptions.ConnectionError:
                 raise AnkiConnectError(
-                    f"Request failed with status {response.status_code}", action.value
+                    "Failed to connect to Anki. Is it running with AnkiConnect?",
+                    action.value,
+                )
+            except json.JSONDecodeError:
+                raise AnkiConnectError(
+                    "Invalid JSON response from AnkiConnect", action.value
                 )
 
-            result = response.json()
-            if "error" in result and result["error"]:
-                raise AnkiConnectError(result["error"], action.value, result)
+    def multi(self, actions: List[Tuple[AnkiAction, Optional[Dict]]]) -> List[Any]:
+        """Send several actions in one request.
 
-            return result.get("result")
-        except requests.exceptions.ConnectionError:
-            raise AnkiConnectError(
-                "Failed to connect to Anki. Is it running with AnkiConnect?",
-                action.value,
-            )
-        except json.JSONDecodeError:
-            raise AnkiConnectError(
-                "Invalid JSON response from AnkiConnect", action.value
-            )
+        Args:
+            actions: (action, params) for each action, run in order
+
+        Returns:
+            Each action's result, or an AnkiConnectError for actions that failed;
+            the other actions still run
+
+        Raises:
+            AnkiConnectError: If the request as a whole failed
+        """
+        if not actions:
+            return []
+        responses = self.send_request(
+            AnkiAction.MULTI,
+            {
+                "actions": [
+                    # Version 6, so failed actions report their errors
+                    {"action": action.value, "version": 6, "params": params or {}}
+                    for action, params in actions
+                ]
+            },
+        )
+        return [
+            AnkiConnectError(response["error"], action.value, response)
+            if response.get("error")
+            else response.get("result")
+            for (action, _), response in zip(actions, responses)
+        ]
 
     def get_note_details(self, note_ids: List[int]) -> List[LanguageFlashcard]:
         """Get detailed information about notes by their IDs."""
         try:
             note_details = self.send_request(AnkiAction.NOTES_INFO, {"notes": note_ids})
-            return [LanguageFlashcard.from_anki_json(nd) for nd in note_details]
+            with span("pydantic.from_anki_json", "pydantic"):
+                return [LanguageFlashcard.from_anki_json(nd) for nd in note_details]
         except AnkiConnectError as e:
             raise AnkiConnectError(
                 f"Failed to get note details for IDs: {note_ids}", e.action, e.response
@@ -454,16 +507,20 @@ def get_subdeck(base_deck_name: str, subdeck_name: str):
 # Note: The NoteTypeManager class has been moved to tutor/commands/setup_anki.py
 
 
-def get_default_anki_media_dir() -> Path:
-    """Returns the default Anki media directory path based on the operating system."""
+def get_default_anki_media_dir(profile: str = DEFAULT_ANKI_PROFILE) -> Path:
+    """Returns an Anki profile's media directory path based on the operating system.
+
+    Args:
+        profile: The Anki profile name
+    """
     system = platform.system()
     home = Path.home()
 
     if system == "Windows":
-        return home / "AppData/Roaming/Anki2/User 1/collection.media"
+        return home / "AppData/Roaming/Anki2" / profile / "collection.media"
     elif system == "Darwin":  # macOS
-        return home / "Library/Application Support/Anki2/User 1/collection.media"
+        return home / "Library/Application Support/Anki2" / profile / "collection.media"
     elif system == "Linux":
-        return home / ".local/share/Anki2/User 1/collection.media"
+        return home / ".local/share/Anki2" / profile / "collection.media"
     else:
         raise NotImplementedError(f"Unsupported operating system: {system}")
@@ -0,0 +1,160 @@
+"""Fanning bulk commands out to several Anki decks and profiles.
+
+A target is a deck in an Anki profile. Each profile is reached through its own
+AnkiConnect server, since AnkiConnect only serves the profile its Anki is
+running; extra profiles are listed in config.yaml with their addresses:
+
+    anki_profiles:
+      work:
+        anki_connect_url: http://localhost:8766
+
+Commands resolve their --deck and --anki-profile options to targets, run the
+per-target work concurrently with for_each_target, and generate content shared
+between targets once through SharedResults.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Sequence, TypeVar
+
+from tutor.utils.anki import AnkiConnectClient
+from tutor.utils.config import get_config
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+# Most targets worked on at once; AnkiConnect handles one request at a time per
+# profile, so more threads than profiles mostly wait
+MAX_TARGET_WORKERS = 8
+
+
+class AnkiTarget:
+    """A deck in an Anki profile, with a client for the profile's AnkiConnect."""
+
+    __slots__ = ("deck", "profile", "client")
+
+    def __init__(
+        self,
+        deck: str,
+        profile: Optional[str] = None,
+        client: Optional[AnkiConnectClient] = None,
+    ) -> None:
+        """
+        Args:
+            deck: The deck name
+            profile: The profile name from config.yaml, or None for the Anki
+                profile at the default AnkiConnect address
+            client: The client for the profile's AnkiConnect; defaults to one
+                for the default address
+        """
+        self.deck = deck
+        self.profile = profile
+        self.client = client or AnkiConnectClient()
+
+    def __str__(self) -> str:
+        return f"{self.profile}/{self.deck}" if self.profile else self.deck
+
+    def __repr__(self) -> str:
+        return f"AnkiTarget({str(self)!r})"
+
+
+def get_profile_client(profile: Optional[str]) -> AnkiConnectClient:
+    """Get an AnkiConnect client for a profile listed in config.yaml.
+
+    Args:
+        profile: The profile name, or None for the default AnkiConnect address
+
+    Raises:
+        ValueError: If the profile isn't in config.yaml
+    """
+    if profile is None:
+        return AnkiConnectClient()
+    profiles = get_config().anki_profiles
+    if profile not in profiles or "anki_connect_url" not in profiles[profile]:
+        raise ValueError(
+            f"Unknown Anki profile '{profile}'. Add its anki_connect_url under "
+            f"anki_profiles in {get_config().config_path}"
+        )
+    return AnkiConnectClient(profiles[profile]["anki_connect_url"])
+
+
+def resolve_targets(
+    decks: Sequence[str], profiles: Sequence[str] = ()
+) -> List[AnkiTarget]:
+    """Get a target for each deck in each profile.
+
+    Args:
+        decks: The deck names; the config's default deck if empty
+        profiles: The profile names; the default AnkiConnect address if empty
+
+    Returns:
+        The targets, in profile then deck order, without repeats
+
+    Raises:
+        ValueError: If a profile isn't in config.yaml
+    """
+    decks = list(dict.fromkeys(decks)) or [get_config().default_deck]
+    targets = []
+    for profile in list(dict.fromkeys(profiles)) or [None]:
+        client = get_profile_client(profile)
+        targets += [AnkiTarget(deck, profile, client) for deck in decks]
+    return targets
+
+
+def for_each_target(targets: Sequence[S], work: Callable[[S], T]) -> List[T]:
+    """Run work for each target concurrently.
+
+    Args:
+        targets: The targets, or anything else worked on per profile, such as
+            AnkiConnect clients
+        work: Called with each target, on a worker thread if there are several
+
+    Returns:
+        Each target's result, in target order
+
+    Raises:
+        Exception: The first exception raised by work, once every target is done
+    """
+    if len(targets) == 1:
+        return [work(targets[0])]
+    workers = min(len(targets), MAX_TARGET_WORKERS)
+    with ThreadPoolExecutor(workers, thread_name_prefix="anki-target") as executor:
+        return list(executor.map(work, targets))
+
+
+class SharedResults(Generic[T]):
+    """Results computed once per key and shared between targets. Thread-safe.
+
+    The first caller for a key computes the result; callers for the same key
+    meanwhile wait for it instead of computing it again. Failures aren't kept,
+    so a later call retries.
+    """
+
+    def __init__(self) -> None:
+        self._futures: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """Get the result for a key, computing it if no caller has yet.
+
+        Args:
+            key: Identifies the result, e.g. ("tts", text, language)
+            compute: Computes the result
+
+        Returns:
+            The result
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._futures[key] = future
+        if is_owner:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                with self._lock:
+                    del self._futures[key]
+                future.set_exception(e)
+        return future.result()
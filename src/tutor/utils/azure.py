@@ -1,8 +1,14 @@
 import os
 import hashlib
-from typing import Dict
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Tuple
 import azure.cognitiveservices.speech as speechsdk
 from tutor.utils.anki import get_default_anki_media_dir
+from tutor.utils.config import get_config
+from tutor.utils.profiling import span
+from tutor.utils.rate_limit import RetryableError, call_with_backoff, get_limiter
 
 # Mapping of languages to Azure voice names
 LANGUAGE_VOICE_MAP: Dict[str, str] = {
@@ -11,17 +17,50 @@ LANGUAGE_VOICE_MAP: Dict[str, str] = {
     # Add more languages and voices as needed
 }
 
+# Background synthesis, keyed by (text, language) so repeated requests share one
+# call. Finished syntheses are kept so a prefetched file can be picked up later,
+# up to MAX_TTS_RESULTS of them; the least recently requested are forgotten first
+_tts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+_tts_futures: OrderedDict[Tuple[str, str], Future] = OrderedDict()
+_tts_futures_lock = threading.Lock()
+MAX_TTS_RESULTS = 256
+
+AZURE_TTS_LIMITER = "azure-tts"
+
+# Cancellations worth retrying: the service throttling us, and transient failures
+_THROTTLED_ERROR_CODES = (
+    speechsdk.CancellationErrorCode.TooManyRequests,
+    speechsdk.CancellationErrorCode.ServiceUnavailable,
+)
+_TRANSIENT_ERROR_CODES = (
+    speechsdk.CancellationErrorCode.ConnectionFailure,
+    speechsdk.CancellationErrorCode.ServiceTimeout,
+)
+
 
 def text_to_speech(text: str, language: str) -> str:
     """Convert text to speech using Azure Text-to-Speech service.
 
+    Syntheses go through the shared Azure TTS rate limiter, and are retried with
+    backoff while the service is throttling us.
+
     Args:
         text: The text to convert to speech
         language: The language of the text (e.g., 'mandarin', 'cantonese')
 
     Returns:
         Path to the generated audio file
+
+    Raises:
+        RetryableError: If the service was still throttling us after every retry
     """
+    return call_with_backoff(
+        get_limiter(AZURE_TTS_LIMITER), lambda: _synthesize(text, language)
+    )
+
+
+def _synthesize(text: str, language: str) -> str:
+    """Make one synthesis request for text_to_speech."""
     speech_key = os.environ.get("AZURE_SPEECH_SERVICE_KEY")
     service_region = os.environ.get("AZURE_SPEECH_SERVICE_REGION")
 
@@ -40,7 +79,7 @@ def text_to_speech(text: str, language: str) -> str:
 
     # Configure the output to save to a file
     filename = str(
-        get_default_anki_media_dir()
+        get_default_anki_media_dir(get_config().anki_profile)
         / f"chinese-tutor-{hashlib.md5(text.encode()).hexdigest()}.wav"
     )
     audio_output = speechsdk.audio.AudioOutputConfig(filename=filename)
@@ -51,7 +90,8 @@ def text_to_speech(text: str, language: str) -> str:
     )
 
     # Perform speech synthesis
-    result = synthesizer.speak_text_async(text).get()
+    with span(f"tts.{language}", "tts"):
+        result = synthesizer.speak_text_async(text).get()
 
     # Check result
     if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
@@ -65,5 +105,70 @@ def text_to_speech(text: str, language: str) -> str:
         dprint(f"Speech synthesis canceled: {cancellation_details.reason}")
         if cancellation_details.reason == speechsdk.CancellationReason.Error:
             dprint(f"Error details: {cancellation_details.error_details}")
+            error_code = cancellation_details.error_code
+            if error_code in _THROTTLED_ERROR_CODES:
+                raise RetryableError(cancellation_details.error_details)
+            if error_code in _TRANSIENT_ERROR_CODES:
+                raise RetryableError(
+                    cancellation_details.error_details, throttled=False
+                )
 
     return filename
+
+
+def text_to_speech_async(text: str, language: str) -> Future:
+    """Start converting text to speech on a background thread.
+
+    Requests for the same text and language share a single synthesis, so audio
+    can be started early (e.g. while a flashcard is still streaming) and picked
+    up later by calling this again and waiting on the result.
+
+    Args:
+        text: The text to convert to speech
+        language: The language of the text (e.g., 'mandarin', 'cantonese')
+
+    Returns:
+        A Future resolving to the path of the generated audio file
+    """
+    key = (text, language.lower())
+    with _tts_futures_lock:
+        future = _tts_futures.get(key)
+        # Retry syntheses that were cancelled or failed
+        if (
+            future is None
+            or future.cancelled()
+            or (future.done() and future.exception() is not None)
+        ):
+            future = _tts_executor.submit(text_to_speech, text, language)
+            _tts_futures[key] = future
+        _tts_futures.move_to_end(key)
+        _prune_tts_futures()
+        return future
+
+
+def _prune_tts_futures() -> None:
+    """Forget the least recently requested finished syntheses over
+    MAX_TTS_RESULTS. Syntheses still running are kept. Call with the lock held.
+    """
+    excess = len(_tts_futures) - MAX_TTS_RESULTS
+    for key in [key for key, future in _tts_futures.items() if future.done()]:
+        if excess <= 0:
+            break
+        del _tts_futures[key]
+        excess -= 1
+
+
+def cancel_text_to_speech(text: str, language: str) -> None:
+    """Discard a synthesis started with text_to_speech_async.
+
+    The synthesis is cancelled if it hasn't started running yet. Either way it is
+    forgotten, so a later request for the same text starts afresh.
+
+    Args:
+        text: The text that was being converted to speech
+        language: The language of the text (e.g., 'mandarin', 'cantonese')
+    """
+    with _tts_futures_lock:
+        future = _tts_futures.pop((text, language.lower()), None)
+    if future is not None:
+        future.cancel()
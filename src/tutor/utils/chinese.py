@@ -3,19 +3,33 @@
 This module provides functions for converting between traditional and simplified Chinese characters.
 """
 
+import unicodedata
+from functools import cache
+
 import opencc
 
 
+@cache
+def _get_converter(config: str) -> opencc.OpenCC:
+    """Get a cached converter, since loading its dictionaries is slow."""
+    return opencc.OpenCC(config)
+
+
+def is_han(character: str) -> bool:
+    """Check whether a character is a Chinese character (a CJK ideograph)."""
+    return unicodedata.name(character, "").startswith(
+        ("CJK UNIFIED IDEOGRAPH", "CJK COMPATIBILITY IDEOGRAPH")
+    )
+
+
 def to_simplified(text: str) -> str:
     """Convert traditional Chinese characters to simplified Chinese characters."""
-    converter = opencc.OpenCC("t2s")  # traditional to simplified
-    return converter.convert(text)
+    return _get_converter("t2s").convert(text)  # traditional to simplified
 
 
 def to_traditional(text: str) -> str:
     """Convert simplified Chinese characters to traditional Chinese characters."""
-    converter = opencc.OpenCC("s2t")  # simplified to traditional
-    return converter.convert(text)
+    return _get_converter("s2t").convert(text)  # simplified to traditional
 
 
 def process_chinese_for_language(text: str, language: str) -> str:
@@ -3,6 +3,22 @@ import yaml
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from tutor.utils.profiling import span
+
+# The profile Anki creates on first run
+DEFAULT_ANKI_PROFILE = "User 1"
+
+
+def get_config_dir() -> Path:
+    """Get the directory holding the config file and local data, creating it if needed."""
+    if os.name == "nt":  # Windows
+        config_dir = Path(os.getenv("APPDATA", "")) / "chinese-tutor"
+    else:  # Unix-like
+        config_dir = Path.home() / ".config" / "chinese-tutor"
+
+    config_dir.mkdir(parents=True, exist_ok=True)
+    return config_dir
+
 
 class Config:
     def __init__(self) -> None:
@@ -16,13 +32,7 @@ class Config:
             )
 
     def _get_config_path(self) -> Path:
-        if os.name == "nt":  # Windows
-            config_dir = Path(os.getenv("APPDATA", "")) / "chinese-tutor"
-        else:  # Unix-like
-            config_dir = Path.home() / ".config" / "chinese-tutor"
-
-        config_dir.mkdir(parents=True, exist_ok=True)
-        return config_dir / "config.yaml"
+        return get_config_dir() / "config.yaml"
 
     def _load_config(self) -> Dict[str, Any]:
         if not self.config_path.exists():
@@ -84,6 +94,37 @@ class Config:
         self._config["learner_level"] = value.lower()
         self.save_config(self._config)
 
+    @property
+    def anki_profile(self) -> str:
+        """Get the Anki profile served at the default AnkiConnect address.
+
+        Audio files are written to this profile's media folder.
+
+        Returns:
+            str: The profile name. Defaults to "User 1", Anki's first profile.
+        """
+        return self._config.get("anki_profile", DEFAULT_ANKI_PROFILE)
+
+    @anki_profile.setter
+    def anki_profile(self, value: str) -> None:
+        """Set the Anki profile served at the default AnkiConnect address.
+
+        Args:
+            value: The profile name, as shown in Anki's profile switcher.
+        """
+        self._config["anki_profile"] = value
+        self.save_config(self._config)
+
+    @property
+    def anki_profiles(self) -> Dict[str, Dict[str, str]]:
+        """Get the other Anki profiles bulk commands can write to.
+
+        Returns:
+            Dict: Profile name -> {"anki_connect_url": address of the AnkiConnect
+            serving it}. Empty if none are configured.
+        """
+        return self._config.get("anki_profiles") or {}
+
 
 # Singleton instance
 _config: Optional[Config] = None
@@ -92,5 +133,6 @@ _config: Optional[Config] = None
 def get_config() -> Config:
     global _config
     if _config is None:
-        _config = Config()
+        with span("config.load", "config"):
+            _config = Config()
     return _config
@@ -0,0 +1,471 @@
+"""In-process stand-in for AnkiConnect, for tests and benchmarks.
+
+FakeAnkiConnect serves the AnkiConnect HTTP API over an in-memory collection of
+decks, note types and notes, so AnkiConnectClient runs unchanged against it on
+a machine without Anki. It implements the actions in AnkiAction plus "multi",
+and can add latency to every request or fail chosen actions.
+
+Example:
+    with FakeAnkiConnect(latency=0.005) as anki:
+        anki.add_model("chinese-tutor-mandarin", [...])
+        client = AnkiConnectClient(anki.address)
+        anki.inject_error("addNote", "cannot create note because it is a duplicate")
+        ...
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from tutor.utils.anki import AnkiAction
+
+DEFAULT_DECK = "Default"
+
+# Tokens of the search syntax: parentheses, or a term with optional quoted parts
+_QUERY_TOKEN_RE = re.compile(r'\s*(\(|\)|-?(?:"[^"]*"|[^\s()"])+)')
+
+
+class _InjectedError:
+    __slots__ = ("message", "status", "remaining")
+
+    def __init__(self, message: str, status: int, remaining: Optional[int]) -> None:
+        self.message = message
+        self.status = status
+        # None for an error that doesn't wear off
+        self.remaining = remaining
+
+
+class _Query:
+    """A parsed Anki search, supporting the syntax the CLI uses.
+
+    Terms are deck:NAME (including subdecks), note:MODEL, FIELD:VALUE and bare
+    text matching any field, with * wildcards, quoting, "-" negation, "OR",
+    implicit AND and parentheses. Other searches (e.g. rated:7:1) match nothing.
+    """
+
+    def __init__(self, query: str) -> None:
+        self._tokens = [t for t in _QUERY_TOKEN_RE.findall(query) if t]
+        self._pos = 0
+        self._matcher = self._parse_or() if self._tokens else (lambda note: True)
+
+    def matches(self, note: Dict[str, Any]) -> bool:
+        return self._matcher(note)
+
+    def _peek(self) -> Optional[str]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _parse_or(self) -> Callable[[Dict[str, Any]], bool]:
+        alternatives = [self._parse_and()]
+        while self._peek() == "OR":
+            self._pos += 1
+            alternatives.append(self._parse_and())
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return lambda note: any(match(note) for match in alternatives)
+
+    def _parse_and(self) -> Callable[[Dict[str, Any]], bool]:
+        terms = []
+        while self._peek() not in (None, ")", "OR"):
+            token = self._tokens[self._pos]
+            self._pos += 1
+            if token == "AND":
+                continue
+            if token == "(":
+                terms.append(self._parse_or())
+                self._pos += 1  # Skip ")"
+            else:
+                terms.append(self._parse_term(token))
+        return lambda note: all(match(note) for match in terms)
+
+    def _parse_term(self, token: str) -> Callable[[Dict[str, Any]], bool]:
+        if token.startswith("-"):
+            term = self._parse_term(token[1:])
+            return lambda note: not term(note)
+
+        token = token.replace('"', "")
+        key, sep, value = token.partition(":")
+        if not sep:
+            pattern = _glob(f"*{token}*")
+            return lambda note: any(
+                pattern.fullmatch(v) for v in note["fields"].values()
+            )
+
+        key = key.lower()
+        if key == "deck":
+            pattern = _glob(value)
+            # A deck search includes the deck's subdecks
+            return lambda note: any(
+                pattern.fullmatch(deck) for deck in _deck_and_parents(note["deckName"])
+            )
+        if key == "note":
+            pattern = _glob(value)
+            return lambda note: bool(pattern.fullmatch(note["modelName"]))
+        if key == "tag":
+            pattern = _glob(value)
+            return lambda note: any(pattern.fullmatch(tag) for tag in note["tags"])
+        if key in ("rated", "prop", "is", "added", "card", "flag"):
+            return lambda note: False
+
+        pattern = _glob(value)
+        return lambda note: any(
+            name.lower() == key and pattern.fullmatch(v)
+            for name, v in note["fields"].items()
+        )
+
+
+def _deck_and_parents(deck: str) -> List[str]:
+    parts = deck.split("::")
+    return ["::".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def _glob(pattern: str) -> "re.Pattern":
+    """Compile an Anki search pattern, where * matches anything, case-insensitively."""
+    return re.compile(
+        ".*".join(re.escape(part) for part in pattern.split("*")),
+        re.IGNORECASE | re.DOTALL,
+    )
+
+
+class FakeAnkiConnect:
+    """An in-process HTTP server imitating AnkiConnect over an in-memory collection.
+
+    Use as a context manager; address is the value for AnkiConnectClient.
+
+    Args:
+        latency: Seconds to wait before answering each HTTP request
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.decks: Dict[str, int] = {DEFAULT_DECK: 1}
+        # Note type name -> {"fields": [...], "css": str, "templates": {...}}
+        self.models: Dict[str, Dict[str, Any]] = {}
+        # Note ID -> {"noteId", "modelName", "deckName", "fields", "tags"}
+        self.notes: Dict[int, Dict[str, Any]] = {}
+        self.media: List[str] = []
+        # Number of times each action was called, including inside "multi"
+        self.calls: Counter = Counter()
+        # Number of HTTP requests received
+        self.requests = 0
+        # (note type, deck, first field) -> note ID, to reject duplicates quickly
+        self._first_fields: Dict[tuple, int] = {}
+        self._errors: Dict[str, _InjectedError] = {}
+        self._next_id = int(time.time() * 1000)
+        self._lock = threading.RLock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def address(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "FakeAnkiConnect":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def inject_error(
+        self,
+        action: str,
+        message: str = "injected error",
+        status: int = 200,
+        count: Optional[int] = 1,
+    ) -> None:
+        """Make the next calls to an action fail.
+
+        Args:
+            action: The action to fail, e.g. "addNote"
+            message: The error AnkiConnect reports
+            status: HTTP status of the failing response; with a status other
+                than 200 the whole request fails, as if AnkiConnect broke
+            count: Number of calls to fail, or None to fail every call
+        """
+        with self._lock:
+            self._errors[action] = _InjectedError(message, status, count)
+
+    def add_model(
+        self,
+        name: str,
+        fields: List[str],
+        css: str = "",
+        templates: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> None:
+        """Add a note type directly, without going through HTTP."""
+        with self._lock:
+            self.models[name] = {
+                "fields": list(fields),
+                "css": css,
+                "templates": dict(templates or {"Card 1": {"Front": "", "Back": ""}}),
+            }
+
+    def add_note(
+        self,
+        deck: str,
+        model: str,
+        fields: Dict[str, str],
+        tags: Optional[List[str]] = None,
+    ) -> int:
+        """Add a note directly, without going through HTTP, and return its ID."""
+        with self._lock:
+            self.decks.setdefault(deck, self._new_id())
+            return self._store_note(
+                deck,
+                model,
+                {name: fields.get(name, "") for name in self.models[model]["fields"]},
+                tags or [],
+            )
+
+    def clear_notes(self) -> None:
+        """Delete every note, keeping decks and note types."""
+        with self._lock:
+            self.notes.clear()
+            self._first_fields.clear()
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _first_field_key(self, note: Dict[str, Any]) -> tuple:
+        first_field = self.models[note["modelName"]]["fields"][0]
+        return (note["modelName"], note["deckName"], note["fields"][first_field])
+
+    def _store_note(
+        self, deck: str, model: str, fields: Dict[str, str], tags: List[str]
+    ) -> int:
+        note_id = self._new_id()
+        note = {
+            "noteId": note_id,
+            "modelName": model,
+            "deckName": deck,
+            "fields": fields,
+            "tags": list(tags),
+        }
+        self.notes[note_id] = note
+        self._first_fields[self._first_field_key(note)] = note_id
+        return note_id
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; don't let Nagle's
+            # algorithm hold back the body on kept-alive connections
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )
+                if fake.latency:
+                    time.sleep(fake.latency)
+                status, response = fake._handle(request)
+                body = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def _take_error(self, action: str) -> Optional[_InjectedError]:
+        error = self._errors.get(action)
+        if error is None:
+            return None
+        if error.remaining is not None:
+            error.remaining -= 1
+            if error.remaining <= 0:
+                del self._errors[action]
+        return error
+
+    def _handle(self, request: Dict[str, Any]) -> tuple:
+        with self._lock:
+            self.requests += 1
+            action = request.get("action")
+            error = self._take_error(action)
+            if error is not None:
+                self.calls[action] += 1
+                return error.status, {"result": None, "error": error.message}
+            return 200, self._call(action, request.get("params") or {})
+
+    def _call(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one action and build its response, with the lock held."""
+        self.calls[action] += 1
+        handler = self._ACTIONS.get(action)
+        if handler is None:
+            return {"result": None, "error": "unsupported action"}
+        try:
+            return {"result": handler(self, **params), "error": None}
+        except (KeyError, ValueError, TypeError) as e:
+            message = e.args[0] if isinstance(e, ValueError) else repr(e)
+            return {"result": None, "error": message}
+
+    def _multi(self, actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = []
+        for request in actions:
+            action = request.get("action")
+            error = self._take_error(action)
+            if error is not None:
+                self.calls[action] += 1
+                results.append({"result": None, "error": error.message})
+            else:
+                results.append(self._call(action, request.get("params") or {}))
+        return results
+
+    def _model(self, name: str) -> Dict[str, Any]:
+        if name not in self.models:
+            raise ValueError(f"model was not found: {name}")
+        return self.models[name]
+
+    def _attach_audio(self, fields: Dict[str, str], audio: List[Dict]) -> None:
+        for attachment in audio:
+            filename = attachment["filename"]
+            self.media.append(filename)
+            for field in attachment.get("fields", []):
+                if field in fields:
+                    fields[field] += f"[sound:{filename}]"
+
+    def _add_note(self, note: Dict[str, Any]) -> int:
+        model = self._model(note["modelName"])
+        deck = note["deckName"]
+        if deck not in self.decks:
+            raise ValueError(f"deck was not found: {deck}")
+
+        # Like AnkiConnect, ignore fields the note type doesn't have
+        fields = {name: note["fields"].get(name, "") for name in model["fields"]}
+        first_field = fields[model["fields"][0]]
+        if not first_field.strip():
+            raise ValueError("cannot create note because it is empty")
+        if (note["modelName"], deck, first_field) in self._first_fields:
+            raise ValueError("cannot create note because it is a duplicate")
+
+        self._attach_audio(fields, note.get("audio", []))
+        return self._store_note(deck, note["modelName"], fields, note.get("tags", []))
+
+    def _notes_info(self, notes: List[int]) -> List[Dict[str, Any]]:
+        infos = []
+        for note_id in notes:
+            note = self.notes.get(note_id)
+            if note is None:
+                infos.append({})
+                continue
+            infos.append(
+                {
+                    "noteId": note_id,
+                    "modelName": note["modelName"],
+                    "tags": list(note["tags"]),
+                    "fields": {
+                        name: {"value": value, "order": order}
+                        for order, (name, value) in enumerate(note["fields"].items())
+                    },
+                    "cards": [],
+                }
+            )
+        return infos
+
+    def _find_notes(self, query: str) -> List[int]:
+        search = _Query(query)
+        return [note_id for note_id, note in self.notes.items() if search.matches(note)]
+
+    def _update_note_fields(self, note: Dict[str, Any]) -> None:
+        existing = self.notes.get(note["id"])
+        if existing is None:
+            raise ValueError(f"Note was not found: {note['id']}")
+        fields = existing["fields"]
+        self._first_fields.pop(self._first_field_key(existing), None)
+        for name, value in note.get("fields", {}).items():
+            if name in fields:
+                fields[name] = value
+        self._attach_audio(fields, note.get("audio", []))
+        self._first_fields[self._first_field_key(existing)] = existing["noteId"]
+
+    def _create_deck(self, deck: str) -> int:
+        return self.decks.setdefault(deck, self._new_id())
+
+    def _create_model(
+        self,
+        modelName: str,
+        inOrderFields: List[str],
+        css: str = "",
+        cardTemplates: Optional[List[Dict[str, str]]] = None,
+        **_,
+    ) -> Dict[str, Any]:
+        if modelName in self.models:
+            raise ValueError("Model name already exists")
+        templates = {
+            template.get("Name", f"Card {i + 1}"): {
+                "Front": template["Front"],
+                "Back": template["Back"],
+            }
+            for i, template in enumerate(cardTemplates or [])
+        }
+        self.add_model(modelName, inOrderFields, css, templates)
+        return {"name": modelName, "flds": [{"name": f} for f in inOrderFields]}
+
+    def _update_model_templates(self, model: Dict[str, Any]) -> None:
+        templates = self._model(model["name"])["templates"]
+        for name, sides in model["templates"].items():
+            if name not in templates:
+                raise ValueError(f"card template was not found: {name}")
+            templates[name].update(sides)
+
+    def _update_model_styling(self, model: Dict[str, Any]) -> None:
+        self._model(model["name"])["css"] = model["css"]
+
+    def _delete_model(self, modelName: str) -> None:
+        self._model(modelName)
+        del self.models[modelName]
+        for note_id in [
+            i for i, n in self.notes.items() if n["modelName"] == modelName
+        ]:
+            self._first_fields.pop(self._first_field_key(self.notes[note_id]), None)
+            del self.notes[note_id]
+
+    _ACTIONS: Dict[str, Callable[..., Any]] = {
+        AnkiAction.ADD_NOTE.value: lambda self, note: self._add_note(note),
+        AnkiAction.NOTES_INFO.value: lambda self, notes: self._notes_info(notes),
+        AnkiAction.FIND_NOTES.value: lambda self, query: self._find_notes(query),
+        AnkiAction.DECK_NAMES.value: lambda self: list(self.decks),
+        AnkiAction.CREATE_DECK.value: lambda self, deck: self._create_deck(deck),
+        AnkiAction.UPDATE_NOTE_FIELDS.value: lambda self, note: (
+            self._update_note_fields(note)
+        ),
+        AnkiAction.MODEL_TEMPLATES.value: lambda self, modelName: {
+            name: dict(sides)
+            for name, sides in self._model(modelName)["templates"].items()
+        },
+        AnkiAction.MODEL_STYLING.value: lambda self, modelName: {
+            "css": self._model(modelName)["css"]
+        },
+        AnkiAction.UPDATE_MODEL_TEMPLATES.value: lambda self, model: (
+            self._update_model_templates(model)
+        ),
+        AnkiAction.UPDATE_MODEL_STYLING.value: lambda self, model: (
+            self._update_model_styling(model)
+        ),
+        AnkiAction.MODEL_NAMES.value: lambda self: list(self.models),
+        AnkiAction.CREATE_MODEL.value: lambda self, **params: self._create_model(
+            **params
+        ),
+        AnkiAction.MODEL_FIELD_NAMES.value: lambda self, modelName: list(
+            self._model(modelName)["fields"]
+        ),
+        AnkiAction.DELETE_MODEL.value: lambda self, modelName: self._delete_model(
+            modelName
+        ),
+        AnkiAction.MULTI.value: lambda self, actions: self._multi(actions),
+    }
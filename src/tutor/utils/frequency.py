@@ -0,0 +1,309 @@
+"""Local word frequency index, built from an offline corpus word list.
+
+The index ranks words by how common they are (rank 1 is the most common), so
+bulk imports can be sorted, deduped and filtered before any LLM calls are made,
+and flashcards can be given a frequency without asking the LLM.
+
+An index is built once per language with `ct frequency-index WORDLIST` from a
+word list such as SUBTLEX-CH, jieba's dict.txt or a plain list of words, most
+common first. It is stored as a sorted array of words with their ranks, which
+is memory-mapped and binary searched, so opening it costs next to nothing and
+lookups never load the whole list into memory.
+
+File layout (integers are little-endian):
+    magic (4 bytes), format version (uint32), word count n (uint32)
+    offsets of each word in the blob (n + 1 uint32), sorted by word
+    rank of each word (n uint32)
+    blob of UTF-8 encoded words
+"""
+
+import mmap
+import os
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tutor.utils.chinese import process_chinese_for_language
+from tutor.utils.config import get_config_dir
+from tutor.utils.sorted_words import SortedWords, pack_uint32s, view_uint32s
+
+_MAGIC = b"TFQI"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sII")
+
+# Largest rank for each LanguageFlashcard.frequency label; rarer words are "very rare"
+FREQUENCY_LABEL_RANKS: Tuple[Tuple[int, str], ...] = (
+    (1000, "very common"),
+    (5000, "common"),
+    (20000, "infrequent"),
+    (50000, "rare"),
+)
+
+
+def frequency_label(rank: int) -> str:
+    """Get the LanguageFlashcard.frequency label for a frequency rank."""
+    for max_rank, label in FREQUENCY_LABEL_RANKS:
+        if rank <= max_rank:
+            return label
+    return "very rare"
+
+
+class FrequencyIndex:
+    """A memory-mapped index of word frequency ranks. Thread-safe for lookups."""
+
+    def __init__(self, path: Path) -> None:
+        """Open an index written by FrequencyIndex.build.
+
+        Args:
+            path: The index file
+
+        Raises:
+            ValueError: If the file isn't a frequency index
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a frequency index: {self.path}")
+        self._count = count
+        view = memoryview(self._mmap)
+        offsets_start = _HEADER.size
+        ranks_start = offsets_start + 4 * (count + 1)
+        self._blob_start = ranks_start + 4 * count
+        self._offsets = view_uint32s(view[offsets_start:ranks_start])
+        self._ranks = view_uint32s(view[ranks_start : self._blob_start])
+        self._words = SortedWords(self._word, count)
+
+    @staticmethod
+    def build(ranked_words: Iterable[str], path: Path) -> int:
+        """Write an index of words, most common first.
+
+        Repeated words keep their first (most common) rank.
+
+        Args:
+            ranked_words: The words, most common first
+            path: The index file to write
+
+        Returns:
+            The number of words in the index
+        """
+        ranks: Dict[str, int] = {}
+        for word in ranked_words:
+            if word not in ranks:
+                ranks[word] = len(ranks) + 1
+
+        entries = sorted((word.encode(), rank) for word, rank in ranks.items())
+        offsets = array("I", [0])
+        rank_array = array("I")
+        for encoded, rank in entries:
+            offsets.append(offsets[-1] + len(encoded))
+            rank_array.append(rank)
+
+        # Write then rename, so an open index is never seen half written
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(entries)))
+            f.write(pack_uint32s(offsets))
+            f.write(pack_uint32s(rank_array))
+            for encoded, _ in entries:
+                f.write(encoded)
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _word(self, i: int) -> bytes:
+        start = self._blob_start
+        return self._mmap[start + self._offsets[i] : start + self._offsets[i + 1]]
+
+    def __contains__(self, word: str) -> bool:
+        return self.rank(word) is not None
+
+    def rank(self, word: str) -> Optional[int]:
+        """Get a word's frequency rank, 1 being the most common.
+
+        Args:
+            word: The word to look up
+
+        Returns:
+            The rank, or None if the word isn't in the index
+        """
+        index = self._words.find(word.encode())
+        return None if index < 0 else self._ranks[index]
+
+    def longest_prefix(self, text: str, start: int = 0) -> Tuple[int, Optional[int]]:
+        """Find the longest word in the index that text continues with.
+
+        Args:
+            text: The text to match
+            start: Where in text to match from
+
+        Returns:
+            The length of the longest matching word in characters, and its
+            rank; (0, None) if no word matches
+        """
+        length, index = self._words.longest_prefix(text, start)
+        return (length, self._ranks[index]) if index >= 0 else (0, None)
+
+    def label(self, word: str) -> Optional[str]:
+        """Get a word's LanguageFlashcard.frequency label.
+
+        Args:
+            word: The word to look up
+
+        Returns:
+            The label, or None if the word isn't in the index
+        """
+        rank = self.rank(word)
+        return None if rank is None else frequency_label(rank)
+
+    def close(self) -> None:
+        """Unmap the index file."""
+        self._offsets.release()
+        self._ranks.release()
+        self._mmap.close()
+
+
+def read_word_list(path: Path, language: str) -> List[str]:
+    """Read a corpus word list, most common words first.
+
+    Each non-blank line holds a word, optionally followed by whitespace-separated
+    columns. If the second column is a number it is taken as the word's count
+    and words are ranked by it (as in SUBTLEX-CH or jieba's dict.txt);
+    otherwise words are ranked in file order. Lines starting with "#" are
+    skipped. Words are converted to simplified characters for Mandarin and
+    traditional characters for Cantonese, to match flashcards.
+
+    Args:
+        path: The word list file
+        language: The language of the index ("mandarin" or "cantonese")
+
+    Returns:
+        The words, most common first
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        # One conversion for the whole file is far cheaper than one per word
+        text = process_chinese_for_language(f.read(), language)
+
+    words: List[Tuple[float, int, str]] = []
+    for position, line in enumerate(text.splitlines()):
+        columns = line.split()
+        if not columns or columns[0].startswith("#"):
+            continue
+        count = 0.0
+        if len(columns) > 1:
+            try:
+                count = float(columns[1])
+            except ValueError:
+                pass
+        words.append((-count, position, columns[0]))
+    words.sort()
+    return [word for _, _, word in words]
+
+
+def get_frequency_index_path(language: str) -> Path:
+    """Get where the frequency index for a language is stored."""
+    return get_config_dir() / f"frequency-{language.lower()}.idx"
+
+
+_indexes: Dict[str, Optional[FrequencyIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_frequency_index(language: str) -> Optional[FrequencyIndex]:
+    """Get the frequency index for a language, opening it on first use.
+
+    Args:
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        The index, or None if none has been built for the language
+    """
+    language = language.lower()
+    with _indexes_lock:
+        if language not in _indexes:
+            path = get_frequency_index_path(language)
+            _indexes[language] = FrequencyIndex(path) if path.exists() else None
+        return _indexes[language]
+
+
+def build_frequency_index(word_list_path: Path, language: str) -> int:
+    """Build the frequency index for a language from a corpus word list.
+
+    Args:
+        word_list_path: The word list, as read by read_word_list
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        The number of words in the index
+    """
+    language = language.lower()
+    words = read_word_list(word_list_path, language)
+    with _indexes_lock:
+        # Unmap any open index first, so it can be replaced
+        index = _indexes.pop(language, None)
+        if index is not None:
+            index.close()
+        return FrequencyIndex.build(words, get_frequency_index_path(language))
+
+
+def reset_frequency_indexes() -> None:
+    """Close the open frequency indexes, so the next use reopens them.
+
+    Useful after the config directory, and with it the index paths, changes.
+    """
+    with _indexes_lock:
+        for index in _indexes.values():
+            if index is not None:
+                index.close()
+        _indexes.clear()
+
+
+def lookup_frequency(word: str, language: str) -> Optional[str]:
+    """Get a word's LanguageFlashcard.frequency label from the local index.
+
+    Args:
+        word: The word to look up
+        language: The language of the word
+
+    Returns:
+        The label, or None if the word or the language's index is missing
+    """
+    index = get_frequency_index(language)
+    return None if index is None else index.label(word)
+
+
+def prioritize_words(
+    words: Iterable[str], language: str, max_rank: Optional[int] = None
+) -> List[str]:
+    """Dedupe candidate words and order them most common first.
+
+    Words missing from the index keep their order after the ranked ones. Without
+    an index for the language, words are only deduped.
+
+    Args:
+        words: The candidate words
+        language: The language of the words
+        max_rank: If given, drop words rarer than this rank, including words
+            missing from the index
+
+    Returns:
+        The words to process, in order
+    """
+    unique = list(dict.fromkeys(words))
+    index = get_frequency_index(language)
+    if index is None:
+        return unique
+
+    ranked = [(index.rank(word), word) for word in unique]
+    if max_rank is not None:
+        ranked = [(rank, word) for rank, word in ranked if rank and rank <= max_rank]
+    # sorted() is stable, so unranked words keep their order
+    ranked.sort(key=lambda item: item[0] if item[0] is not None else float("inf"))
+    return [word for _, word in ranked]
@@ -0,0 +1,233 @@
+"""Span-based profiling of a `ct` command.
+
+Code wraps the steps worth measuring in span(), e.g.
+
+    with span("anki.findNotes", "anki"):
+        ...
+
+Spans cost next to nothing until profiling is enabled with enable_profiling()
+(the CLI's --profile option). Once enabled, every span is recorded with its
+thread and nesting, and format_breakdown() and write_chrome_trace() report
+where the command's wall time went.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+class SpanRecord:
+    """A finished span."""
+
+    __slots__ = (
+        "name",
+        "category",
+        "path",
+        "start",
+        "duration",
+        "thread_id",
+        "thread_name",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        path: Tuple[str, ...],
+        start: float,
+        duration: float,
+        thread_id: int,
+        thread_name: str,
+    ) -> None:
+        self.name = name
+        self.category = category
+        # Names of the enclosing spans on the same thread, outermost first
+        self.path = path
+        # Seconds since profiling was enabled
+        self.start = start
+        self.duration = duration
+        self.thread_id = thread_id
+        self.thread_name = thread_name
+
+
+_enabled = False
+_origin = 0.0
+_records: List[SpanRecord] = []
+_records_lock = threading.Lock()
+# Per-thread stack of the names of open spans
+_local = threading.local()
+
+
+class _Span:
+    __slots__ = ("name", "category", "start", "path")
+
+    def __init__(self, name: str, category: str) -> None:
+        self.name = name
+        self.category = category
+
+    def __enter__(self) -> "_Span":
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.path = tuple(stack)
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        thread = threading.current_thread()
+        record = SpanRecord(
+            self.name,
+            self.category,
+            self.path,
+            self.start - _origin,
+            duration,
+            thread.ident,
+            thread.name,
+        )
+        with _records_lock:
+            _records.append(record)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, category: str = ""):
+    """Time the enclosed block as a span, if profiling is enabled.
+
+    Args:
+        name: What the block does, e.g. "anki.findNotes" or "llm.flashcards"
+        category: The kind of work, e.g. "anki", "llm" or "tts"
+
+    Returns:
+        A context manager
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, category)
+
+
+def enable_profiling() -> None:
+    """Start recording spans, discarding any recorded before."""
+    global _enabled, _origin
+    with _records_lock:
+        _records.clear()
+    _origin = time.perf_counter()
+    _enabled = True
+
+
+def disable_profiling() -> None:
+    """Stop recording spans."""
+    global _enabled
+    _enabled = False
+
+
+def is_profiling_enabled() -> bool:
+    """Check whether spans are being recorded."""
+    return _enabled
+
+
+def get_span_records() -> List[SpanRecord]:
+    """Get the spans finished so far, in the order they finished."""
+    with _records_lock:
+        return list(_records)
+
+
+def format_breakdown(wall_time: Optional[float] = None) -> str:
+    """Format the recorded spans as a flame-style tree of where time went.
+
+    Spans with the same name under the same parents are merged. Each line shows
+    the total time, its share of the wall time, the number of spans and the
+    time not spent in child spans. Spans on worker threads appear as their own
+    roots, so shares can add up to more than 100%.
+
+    Args:
+        wall_time: The time to compare against; defaults to the time since
+            profiling was enabled
+
+    Returns:
+        The breakdown, one line per node
+    """
+    if wall_time is None:
+        wall_time = time.perf_counter() - _origin
+    wall_time = max(wall_time, 1e-9)
+
+    totals: Dict[Tuple[str, ...], float] = defaultdict(float)
+    counts: Dict[Tuple[str, ...], int] = defaultdict(int)
+    children: Dict[Tuple[str, ...], set] = defaultdict(set)
+    for record in get_span_records():
+        node = record.path + (record.name,)
+        totals[node] += record.duration
+        counts[node] += 1
+        children[record.path].add(node)
+        # Make sure parents still open when reporting are part of the tree
+        for depth in range(len(record.path)):
+            children[record.path[:depth]].add(record.path[: depth + 1])
+
+    header = f"{'total s':>9} {'%':>6} {'count':>6} {'self s':>9}  span"
+    lines = [f"Profile ({wall_time:.3f}s wall time)", header, "-" * len(header)]
+
+    def add_lines(node: Tuple[str, ...]) -> None:
+        total = totals[node]
+        self_time = total - sum(totals[child] for child in children[node])
+        lines.append(
+            f"{total:>9.3f} {100 * total / wall_time:>5.1f}% {counts[node]:>6} "
+            f"{max(self_time, 0.0):>9.3f}  {'  ' * (len(node) - 1)}{node[-1]}"
+        )
+        for child in sorted(children[node], key=lambda c: -totals[c]):
+            add_lines(child)
+
+    for root in sorted(children[()], key=lambda c: -totals[c]):
+        add_lines(root)
+    return "\n".join(lines)
+
+
+def write_chrome_trace(path: str) -> None:
+    """Write the recorded spans as a Chrome trace, for chrome://tracing or Perfetto.
+
+    Args:
+        path: The JSON file to write
+    """
+    pid = os.getpid()
+    records = get_span_records()
+    events = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": thread_id,
+            "args": {"name": thread_name},
+        }
+        for thread_id, thread_name in sorted(
+            {(r.thread_id, r.thread_name) for r in records}
+        )
+    ]
+    events.extend(
+        {
+            "name": record.name,
+            "cat": record.category,
+            "ph": "X",
+            "ts": record.start * 1e6,
+            "dur": record.duration * 1e6,
+            "pid": pid,
+            "tid": record.thread_id,
+        }
+        for record in sorted(records, key=lambda r: r.start)
+    )
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
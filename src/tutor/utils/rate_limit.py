@@ -0,0 +1,337 @@
+"""Adaptive rate limiting for calls to rate-limited services (OpenAI, Azure TTS).
+
+Each service gets one shared AdaptiveLimiter (see get_limiter()), which bounds
+the calls in flight in three ways:
+
+- AIMD concurrency: the number of calls allowed in flight grows by one for
+  every window of successful calls and halves when the service throttles us,
+  so bulk runs climb up to the quota and back off as soon as they hit it
+- A token bucket pacing calls to the request quota, once the service has told
+  us what it is through x-ratelimit-limit-requests
+- A pause until the quota resets, when x-ratelimit-remaining-requests or
+  x-ratelimit-remaining-tokens runs out, or the service sent retry-after
+
+call_with_backoff() runs a call through a limiter, retrying RetryableErrors
+with jittered exponential backoff so throttled work is delayed, not lost.
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional, TypeVar
+
+from tutor.utils.logging import dprint
+
+T = TypeVar("T")
+
+DEFAULT_MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 60.0
+# Concurrency is halved at most once per this many seconds, so a burst of
+# throttled responses to calls that were in flight together counts once
+DECREASE_COOLDOWN_SECONDS = 1.0
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class RetryableError(Exception):
+    """A call failed in a way that is worth retrying after a delay."""
+
+    def __init__(
+        self,
+        message: str,
+        retry_after: Optional[float] = None,
+        throttled: bool = True,
+    ) -> None:
+        """
+        Args:
+            message: What went wrong
+            retry_after: Seconds the service asked us to wait, if it said
+            throttled: Whether the service was rejecting calls for going over
+                its quota, as opposed to a transient failure such as a timeout
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate limit duration header into seconds.
+
+    Accepts plain seconds ("20", "0.5") as sent in retry-after and Azure's
+    headers, and OpenAI's x-ratelimit-reset-* format ("1s", "6m0s", "20ms").
+
+    Args:
+        value: The header value, if present
+
+    Returns:
+        The duration in seconds, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts or "".join(n + unit for n, unit in parts) != value:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def get_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Get how long a throttled response asked us to wait, in seconds.
+
+    Args:
+        headers: The response headers (case-insensitive, as from httpx)
+
+    Returns:
+        The delay from retry-after-ms or retry-after, or None if neither is set
+    """
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms), 0.0) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: Optional[float] = None,
+    base: float = BACKOFF_BASE_SECONDS,
+    cap: float = BACKOFF_MAX_SECONDS,
+) -> float:
+    """Get the delay before retrying a failed call.
+
+    Uses full jitter, a random delay up to an exponentially growing ceiling, so
+    calls throttled together don't retry together. A retry-after from the
+    service is honoured, with a little jitter on top.
+
+    Args:
+        attempt: The number of attempts that have failed so far, from 1
+        retry_after: Seconds the service asked us to wait, if it said
+        base: The ceiling after the first failure
+        cap: The largest ceiling
+
+    Returns:
+        The delay in seconds
+    """
+    if retry_after is not None:
+        return min(retry_after, cap) + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class AdaptiveLimiter:
+    """Limits calls to one service, adapting to its rate limits. Thread-safe."""
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 4,
+        max_concurrency: int = 64,
+        min_concurrency: int = 1,
+    ) -> None:
+        """
+        Args:
+            name: The service, for debug output
+            concurrency: The number of calls allowed in flight to begin with
+            max_concurrency: The most calls ever allowed in flight
+            min_concurrency: The fewest calls allowed in flight when throttled
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.in_flight = 0
+        # Counts of finished calls, for reporting
+        self.successes = 0
+        self.throttles = 0
+        self._limit = float(concurrency)
+        self._condition = threading.Condition()
+        # time.monotonic() before which no call may start
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        # Token bucket pacing calls to the request quota, once known
+        self._rate: Optional[float] = None
+        self._capacity = 1.0
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+
+    @property
+    def concurrency(self) -> int:
+        """The number of calls currently allowed in flight."""
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        """Wait until a call may start, and count it as in flight."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0 and self._rate is not None and self._tokens < 1:
+                    wait = (1 - self._tokens) / self._rate
+                if wait <= 0 and self.in_flight < self.concurrency:
+                    self.in_flight += 1
+                    if self._rate is not None:
+                        self._tokens -= 1
+                    return
+                # Without a wait, a finishing call notifies us
+                self._condition.wait(wait if wait > 0 else None)
+
+    def release(
+        self,
+        succeeded: bool = True,
+        throttled: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Finish a call started with acquire().
+
+        Args:
+            succeeded: Whether the call succeeded; only successes raise the
+                concurrency
+            throttled: Whether the service throttled the call
+            retry_after: Seconds the service asked us to wait, if it said
+        """
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.throttles += 1
+                if now - self._last_decrease >= DECREASE_COOLDOWN_SECONDS:
+                    self._limit = max(float(self.min_concurrency), self._limit / 2)
+                    self._last_decrease = now
+                    dprint(
+                        f"{self.name} throttled; concurrency down to {self.concurrency}"
+                    )
+                if retry_after is not None:
+                    self._pause(now + retry_after)
+            elif succeeded:
+                self.successes += 1
+                # Additive increase: +1 for every window of successful calls
+                self._limit = min(
+                    float(self.max_concurrency), self._limit + 1 / self._limit
+                )
+            self._condition.notify_all()
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapt to the rate limit headers of a response.
+
+        Reads OpenAI's and Azure OpenAI's x-ratelimit-limit-requests,
+        x-ratelimit-remaining-{requests,tokens} and
+        x-ratelimit-reset-{requests,tokens}.
+
+        Args:
+            headers: The response headers (case-insensitive, as from httpx)
+        """
+        limit_requests = _header_int(headers, "x-ratelimit-limit-requests")
+        with self._condition:
+            now = time.monotonic()
+            if limit_requests:
+                # The quota is per minute; allow a burst of one second's worth
+                self._refill(now)
+                self._rate = limit_requests / 60
+                self._capacity = max(1.0, self._rate)
+                self._tokens = min(self._tokens, self._capacity)
+            for kind in ("requests", "tokens"):
+                if _header_int(headers, f"x-ratelimit-remaining-{kind}") == 0:
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    # Azure doesn't say when the quota resets
+                    self._pause(now + (reset if reset is not None else 1.0))
+            self._condition.notify_all()
+
+    def _refill(self, now: float) -> None:
+        if self._rate is not None:
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._last_refill) * self._rate
+            )
+        self._last_refill = now
+
+    def _pause(self, until: float) -> None:
+        if until > self._paused_until:
+            self._paused_until = until
+            dprint(f"{self.name} paused for {until - time.monotonic():.2f}s")
+
+
+def call_with_backoff(
+    limiter: AdaptiveLimiter,
+    call: Callable[[], T],
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    hold: bool = False,
+) -> T:
+    """Run a call through a limiter, retrying it while it fails retryably.
+
+    Args:
+        limiter: The limiter for the service being called
+        call: Makes the call; raises RetryableError if it should be retried
+        max_attempts: The most times to make the call
+        hold: Keep the successful call counted as in flight, e.g. while its
+            streamed result is read; the caller then calls limiter.release()
+
+    Returns:
+        The call's result
+
+    Raises:
+        RetryableError: If the last attempt failed retryably
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        limiter.acquire()
+        try:
+            result = call()
+        except RetryableError as e:
+            limiter.release(
+                succeeded=False, throttled=e.throttled, retry_after=e.retry_after
+            )
+            if attempt >= max_attempts:
+                raise
+            delay = backoff_delay(attempt, e.retry_after)
+            dprint(
+                f"{limiter.name} call failed ({e}); "
+                f"retry {attempt}/{max_attempts - 1} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+            continue
+        except BaseException:
+            limiter.release(succeeded=False)
+            raise
+        if not hold:
+            limiter.release()
+        return result
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, concurrency: int = 4) -> AdaptiveLimiter:
+    """Get the limiter shared by all calls to a service, creating it if needed.
+
+    Args:
+        name: The service, e.g. "openai" or "azure-tts"
+        concurrency: The number of calls allowed in flight to begin with, if
+            the limiter is created
+
+    Returns:
+        The service's limiter
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = AdaptiveLimiter(name, concurrency)
+        return limiter
@@ -0,0 +1,489 @@
+"""Offline pinyin and jyutping from CC-CEDICT and CC-Canto style dictionaries.
+
+A pronunciation dictionary is built once per language with
+`ct pronunciation-index DICT_FILE...` from dictionary files in the CC-CEDICT
+format:
+
+    傳統 传统 [chuan2 tong3] /tradition/
+    傳統 传统 [chuan2 tong3] {cyun4 tung2} /tradition/   (CC-Canto)
+
+Mandarin readings are taken from [...] and Cantonese readings from {...}, as
+in CC-Canto and its readings file for CC-CEDICT. The dictionary is stored as a
+sorted array of words with their readings, which is memory-mapped and walked
+as a prefix trie (see tutor.utils.sorted_words), narrowing the range of words
+sharing a prefix one character at a time. romanize() segments a word by longest match to give its reading in
+microseconds, so pronunciation-only fixes need no LLM call.
+
+File layout (integers are little-endian):
+    magic (4 bytes), format version (uint32), word count n (uint32)
+    offsets of each word in the blob (n + 1 uint32), sorted by word
+    offsets of each word's readings in the blob (n + 1 uint32)
+    blob of UTF-8 encoded words, followed by their readings
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from tutor.llm.models import LanguageFlashcard
+from tutor.utils.chinese import is_han
+from tutor.utils.config import get_config_dir
+from tutor.utils.sorted_words import SortedWords, pack_uint32s, view_uint32s
+
+_MAGIC = b"TRDI"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sII")
+# Separates the readings of a word with several
+_READING_SEPARATOR = "/"
+
+_CEDICT_LINE_RE = re.compile(
+    r"^(?P<traditional>\S+) (?P<simplified>\S+) \[(?P<pinyin>[^\]]*)\]"
+    r"(?: \{(?P<jyutping>[^}]*)\})?"
+)
+_NUMBERED_SYLLABLE_RE = re.compile(r"([a-zü:]+?)([1-5])")
+
+_TONE_MARKS = {
+    "a": "āáǎà",
+    "e": "ēéěè",
+    "i": "īíǐì",
+    "o": "ōóǒò",
+    "u": "ūúǔù",
+    "ü": "ǖǘǚǜ",
+}
+# Combining marks left by NFD decomposition of tone-marked vowels
+_COMBINING_TONES = {"\u0304": "1", "\u0301": "2", "\u030c": "3", "\u0300": "4"}
+# Characters whose Mandarin tone changes with the next syllable (tone sandhi),
+# so cards may mark them either way
+_SANDHI_CHARACTERS = "一不"
+
+_PRONUNCIATION_FIELDS = {"mandarin": "pinyin", "cantonese": "jyutping"}
+
+
+def get_pronunciation_field(language: str) -> str:
+    """Get the flashcard field holding a language's romanization."""
+    return _PRONUNCIATION_FIELDS[language.lower()]
+
+
+def _normalize_syllable(syllable: str) -> str:
+    """Lowercase a pinyin syllable, spelling ü as ü rather than u: or v."""
+    return syllable.lower().replace("u:", "ü").replace("v", "ü")
+
+
+def numbered_to_marked(syllable: str) -> str:
+    """Convert a numbered pinyin syllable ("hao3", "lu:4") to tone marks ("hǎo", "lǜ").
+
+    Syllables that aren't numbered pinyin are returned as they are.
+    """
+    syllable = _normalize_syllable(syllable)
+    match = _NUMBERED_SYLLABLE_RE.fullmatch(syllable)
+    if not match:
+        return syllable
+    base, tone = match.group(1), int(match.group(2))
+    if tone == 5:
+        return base
+    # The mark goes on a or e, on the o of ou, and otherwise on the last vowel
+    for vowel in ("a", "e"):
+        if vowel in base:
+            position = base.index(vowel)
+            break
+    else:
+        if "ou" in base:
+            position = base.index("o")
+        else:
+            positions = [i for i, c in enumerate(base) if c in _TONE_MARKS]
+            if not positions:
+                return base
+            position = positions[-1]
+    marked = _TONE_MARKS[base[position]][tone - 1]
+    return base[:position] + marked + base[position + 1 :]
+
+
+def marked_to_numbered(syllable: str) -> str:
+    """Convert a tone-marked pinyin syllable ("hǎo") to numbered pinyin ("hao3").
+
+    Syllables that are already numbered, such as jyutping, are only lowercased.
+    """
+    syllable = _normalize_syllable(syllable)
+    if syllable[-1:].isdigit():
+        return syllable
+    tone = "5"
+    letters = []
+    for c in unicodedata.normalize("NFD", syllable):
+        if c in _COMBINING_TONES:
+            tone = _COMBINING_TONES[c]
+        else:
+            letters.append(c)
+    return unicodedata.normalize("NFC", "".join(letters)) + tone
+
+
+def split_reading(reading: str) -> List[str]:
+    """Split a written reading into numbered syllables, e.g. "nǐ hǎo" -> ["ni3", "hao3"]."""
+    return [marked_to_numbered(s) for s in re.split(r"[\s'’·-]+", reading) if s]
+
+
+def format_reading(syllables: Sequence[str], language: str) -> str:
+    """Write numbered syllables the way flashcards show them.
+
+    Pinyin gets tone marks ("nǐ hǎo"); jyutping keeps tone numbers ("nei5 hou2").
+    """
+    if language.lower() == "mandarin":
+        syllables = [numbered_to_marked(s) for s in syllables]
+    return " ".join(syllables)
+
+
+class PronunciationDictionary:
+    """A memory-mapped dictionary of word readings. Thread-safe for lookups."""
+
+    def __init__(self, path: Path) -> None:
+        """Open a dictionary written by PronunciationDictionary.build.
+
+        Args:
+            path: The dictionary file
+
+        Raises:
+            ValueError: If the file isn't a pronunciation dictionary
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a pronunciation dictionary: {self.path}")
+        self._count = count
+        view = memoryview(self._mmap)
+        word_offsets_start = _HEADER.size
+        reading_offsets_start = word_offsets_start + 4 * (count + 1)
+        self._blob_start = reading_offsets_start + 4 * (count + 1)
+        self._word_offsets = view_uint32s(
+            view[word_offsets_start:reading_offsets_start]
+        )
+        self._reading_offsets = view_uint32s(
+            view[reading_offsets_start : self._blob_start]
+        )
+        self._words = SortedWords(self._word, count)
+
+    @staticmethod
+    def build(entries: Iterable[Tuple[str, str]], path: Path) -> int:
+        """Write a dictionary of (word, numbered reading) entries.
+
+        A word's readings keep the order they were first seen in.
+
+        Args:
+            entries: The words with their readings, as space-separated numbered
+                syllables, e.g. ("你好", "ni3 hao3")
+            path: The dictionary file to write
+
+        Returns:
+            The number of words in the dictionary
+        """
+        readings: Dict[str, List[str]] = {}
+        for word, reading in entries:
+            word_readings = readings.setdefault(word, [])
+            if reading not in word_readings:
+                word_readings.append(reading)
+
+        keys = sorted(word.encode() for word in readings)
+        values = [
+            _READING_SEPARATOR.join(readings[key.decode()]).encode() for key in keys
+        ]
+        word_offsets = array("I", [0])
+        for key in keys:
+            word_offsets.append(word_offsets[-1] + len(key))
+        reading_offsets = array("I", [word_offsets[-1]])
+        for value in values:
+            reading_offsets.append(reading_offsets[-1] + len(value))
+
+        # Write then rename, so an open dictionary is never seen half written
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(keys)))
+            f.write(pack_uint32s(word_offsets))
+            f.write(pack_uint32s(reading_offsets))
+            f.writelines(keys)
+            f.writelines(values)
+        os.replace(tmp_path, path)
+        return len(keys)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _word(self, i: int) -> bytes:
+        start = self._blob_start
+        return self._mmap[
+            start + self._word_offsets[i] : start + self._word_offsets[i + 1]
+        ]
+
+    def _readings(self, i: int) -> List[str]:
+        start = self._blob_start
+        value = self._mmap[
+            start + self._reading_offsets[i] : start + self._reading_offsets[i + 1]
+        ]
+        return value.decode().split(_READING_SEPARATOR)
+
+    def readings(self, word: str) -> List[str]:
+        """Get a word's readings, as space-separated numbered syllables.
+
+        Args:
+            word: The word to look up
+
+        Returns:
+            The readings, most likely first, or [] if the word isn't listed
+        """
+        length, readings = self.longest_prefix(word)
+        return readings if length == len(word) else []
+
+    def longest_prefix(self, text: str, start: int = 0) -> Tuple[int, List[str]]:
+        """Find the longest word in the dictionary that text continues with.
+
+        Args:
+            text: The text to match
+            start: Where in text to match from
+
+        Returns:
+            The length of the longest matching word in characters, and its
+            readings; (0, []) if no word matches
+        """
+        length, index = self._words.longest_prefix(text, start)
+        if index < 0:
+            return 0, []
+        return length, self._readings(index)
+
+    def segment(self, text: str) -> Optional[List[Tuple[str, List[str]]]]:
+        """Split text into dictionary words by longest match.
+
+        Characters other than Chinese characters, such as punctuation, are
+        skipped.
+
+        Args:
+            text: The text to segment
+
+        Returns:
+            (word, readings) for each word, or None if a Chinese character
+            isn't in the dictionary
+        """
+        segments = []
+        position = 0
+        while position < len(text):
+            length, readings = self.longest_prefix(text, position)
+            if length == 0:
+                if is_han(text[position]):
+                    return None
+                position += 1
+                continue
+            segments.append((text[position : position + length], readings))
+            position += length
+        return segments
+
+    def close(self) -> None:
+        """Unmap the dictionary file."""
+        self._word_offsets.release()
+        self._reading_offsets.release()
+        self._mmap.close()
+
+
+def read_cedict(path: Path, language: str) -> Iterator[Tuple[str, str]]:
+    """Read the (word, numbered reading) entries of a CC-CEDICT style file.
+
+    Both the traditional and simplified forms of each word are included, with
+    the [pinyin] reading for Mandarin or the {jyutping} reading for Cantonese.
+    Lines without a reading for the language are skipped.
+
+    Args:
+        path: The dictionary file
+        language: "mandarin" or "cantonese"
+
+    Yields:
+        (word, reading) pairs, with readings as lowercase numbered syllables
+    """
+    group = get_pronunciation_field(language)
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            match = _CEDICT_LINE_RE.match(line)
+            if not match or not match.group(group):
+                continue
+            reading = " ".join(
+                _normalize_syllable(s) for s in match.group(group).split()
+            )
+            yield match.group("traditional"), reading
+            if match.group("simplified") != match.group("traditional"):
+                yield match.group("simplified"), reading
+
+
+def get_pronunciation_dictionary_path(language: str) -> Path:
+    """Get where the pronunciation dictionary for a language is stored."""
+    return get_config_dir() / f"pronunciation-{language.lower()}.idx"
+
+
+_dictionaries: Dict[str, Optional[PronunciationDictionary]] = {}
+_dictionaries_lock = threading.Lock()
+
+
+def get_pronunciation_dictionary(language: str) -> Optional[PronunciationDictionary]:
+    """Get the pronunciation dictionary for a language, opening it on first use.
+
+    Args:
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        The dictionary, or None if none has been built for the language
+    """
+    language = language.lower()
+    with _dictionaries_lock:
+        if language not in _dictionaries:
+            path = get_pronunciation_dictionary_path(language)
+            _dictionaries[language] = (
+                PronunciationDictionary(path) if path.exists() else None
+            )
+        return _dictionaries[language]
+
+
+def build_pronunciation_dictionary(dict_paths: Sequence[Path], language: str) -> int:
+    """Build the pronunciation dictionary for a language from dictionary files.
+
+    Args:
+        dict_paths: CC-CEDICT style files, as read by read_cedict; readings
+            from earlier files come first
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        The number of words in the dictionary
+    """
+    language = language.lower()
+    entries = (entry for path in dict_paths for entry in read_cedict(path, language))
+    with _dictionaries_lock:
+        # Unmap any open dictionary first, so it can be replaced
+        dictionary = _dictionaries.pop(language, None)
+        if dictionary is not None:
+            dictionary.close()
+        return PronunciationDictionary.build(
+            entries, get_pronunciation_dictionary_path(language)
+        )
+
+
+def reset_pronunciation_dictionaries() -> None:
+    """Close the open pronunciation dictionaries, so the next use reopens them.
+
+    Useful after the config directory, and with it the dictionary paths, changes.
+    """
+    with _dictionaries_lock:
+        for dictionary in _dictionaries.values():
+            if dictionary is not None:
+                dictionary.close()
+        _dictionaries.clear()
+
+
+def romanize(text: str, language: str) -> Optional[str]:
+    """Get the reading of a word or phrase from the local dictionary.
+
+    Args:
+        text: The word or phrase
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        The reading as flashcards write it, e.g. "nǐ hǎo" or "nei5 hou2"; None
+        if there's no dictionary, a character is missing from it, or part of
+        the text has several readings and can't be romanized reliably
+    """
+    dictionary = get_pronunciation_dictionary(language)
+    if dictionary is None:
+        return None
+    segments = dictionary.segment(text)
+    if not segments:
+        return None
+    syllables: List[str] = []
+    for _, readings in segments:
+        if len(readings) != 1:
+            return None
+        syllables.extend(readings[0].split())
+    return format_reading(syllables, language)
+
+
+def check_reading(text: str, reading: str, language: str) -> Optional[bool]:
+    """Check a written reading of a word or phrase against the local dictionary.
+
+    Any of a word's readings is accepted, and for Mandarin the tone of 一 and 不
+    isn't checked, since it changes with the next syllable.
+
+    Args:
+        text: The word or phrase
+        reading: Its reading, with tone marks or numbers
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        Whether the reading matches, or None if the text can't be checked
+    """
+    dictionary = get_pronunciation_dictionary(language)
+    if dictionary is None:
+        return None
+    segments = dictionary.segment(text)
+    if not segments:
+        return None
+    written = split_reading(reading)
+    position = 0
+    for word, readings in segments:
+        for candidate in readings:
+            syllables = candidate.split()
+            if _syllables_match(
+                word, syllables, written[position : position + len(syllables)]
+            ):
+                position += len(syllables)
+                break
+        else:
+            return False
+    return position == len(written)
+
+
+def _syllables_match(word: str, expected: List[str], written: List[str]) -> bool:
+    if len(expected) != len(written):
+        return False
+    for i, (e, w) in enumerate(zip(expected, written)):
+        if e == w:
+            continue
+        # One syllable per character, so the character is known
+        sandhi = len(expected) == len(word) and word[i] in _SANDHI_CHARACTERS
+        if not (sandhi and e[:-1] == w[:-1]):
+            return False
+    return True
+
+
+def fill_pronunciations(flashcard: LanguageFlashcard) -> Optional[LanguageFlashcard]:
+    """Fill in a flashcard's missing pronunciations from the local dictionary.
+
+    Both the flashcard's own pronunciation and those of its related words are
+    filled in, if empty.
+
+    Args:
+        flashcard: The flashcard
+
+    Returns:
+        A copy of the flashcard with the pronunciations filled in, or None if
+        any missing pronunciation couldn't be found
+    """
+    field = get_pronunciation_field(flashcard.LANGUAGE)
+    update = {}
+    if not getattr(flashcard, field):
+        reading = romanize(flashcard.word, flashcard.LANGUAGE)
+        if reading is None:
+            return None
+        update[field] = reading
+
+    related_words = []
+    for related_word in flashcard.related_words:
+        if not getattr(related_word, field):
+            reading = romanize(related_word.word, flashcard.LANGUAGE)
+            if reading is None:
+                return None
+            related_word = related_word.model_copy(update={field: reading})
+        related_words.append(related_word)
+    update["related_words"] = related_words
+    return flashcard.model_copy(update=update)
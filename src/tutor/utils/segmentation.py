@@ -0,0 +1,145 @@
+"""Local Chinese word segmentation, using the offline word indexes as its lexicon.
+
+Text is split into words by longest match against the pronunciation dictionary
+(`ct pronunciation-index`) or, failing that, the frequency index
+(`ct frequency-index`). Characters in neither are single-character words, and
+anything other than Chinese characters separates words.
+"""
+
+import re
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+
+from tutor.utils.chinese import is_han
+from tutor.utils.frequency import get_frequency_index
+from tutor.utils.romanization import get_pronunciation_dictionary
+
+# Paragraphs longer than this are split, so a text without blank lines can't
+# make a paragraph the size of the whole text
+MAX_PARAGRAPH_CHARS = 10_000
+# Characters read from a file at a time by read_chunks
+READ_CHUNK_CHARS = 64 * 1024
+
+# Where a long paragraph can be cut: line ends and sentence-ending punctuation
+_BREAK_RE = re.compile(r"[\n。！？!?]")
+
+Matcher = Callable[[str, int], int]
+
+
+def get_word_matcher(language: str) -> Optional[Matcher]:
+    """Get the longest-match function for a language's local lexicon.
+
+    Args:
+        language: The language ("mandarin" or "cantonese")
+
+    Returns:
+        A function giving the length of the longest word at a position in a
+        text (0 if none), or None if no lexicon has been built
+    """
+    dictionary = get_pronunciation_dictionary(language)
+    if dictionary is not None:
+        return lambda text, start: dictionary.longest_prefix(text, start)[0]
+    index = get_frequency_index(language)
+    if index is not None:
+        return lambda text, start: index.longest_prefix(text, start)[0]
+    return None
+
+
+def segment(text: str, matcher: Matcher) -> List[str]:
+    """Split text into words by longest match.
+
+    Args:
+        text: The text to segment
+        matcher: From get_word_matcher
+
+    Returns:
+        The words, in order; anything other than Chinese characters is dropped
+    """
+    words = []
+    position = 0
+    while position < len(text):
+        if not is_han(text[position]):
+            position += 1
+            continue
+        length = max(matcher(text, position), 1)
+        word = text[position : position + length]
+        # Words in the lexicon may contain other characters, e.g. 卡拉OK
+        words.append(word)
+        position += length
+    return words
+
+
+def read_chunks(file: TextIO, size: int = READ_CHUNK_CHARS) -> Iterator[str]:
+    """Read a text file in fixed-size chunks, whatever its line lengths.
+
+    Args:
+        file: The open file
+        size: The most characters to read at a time
+
+    Yields:
+        The chunks, in order
+    """
+    return iter(partial(file.read, size), "")
+
+
+def _iter_sentences(
+    text: Iterable[str], max_chars: int = MAX_PARAGRAPH_CHARS
+) -> Iterator[str]:
+    """Split text into pieces ending at a line end or sentence-ending
+    punctuation, or cut at max_chars if there is none before then."""
+    pending = ""
+    for chunk in text:
+        pending += chunk
+        start = 0
+        for match in _BREAK_RE.finditer(pending):
+            while match.end() - start > max_chars:
+                yield pending[start : start + max_chars]
+                start += max_chars
+            yield pending[start : match.end()]
+            start = match.end()
+        pending = pending[start:]
+        while len(pending) > max_chars:
+            yield pending[:max_chars]
+            pending = pending[max_chars:]
+    if pending:
+        yield pending
+
+
+def iter_paragraphs(
+    text: Iterable[str], max_chars: int = MAX_PARAGRAPH_CHARS
+) -> Iterator[str]:
+    """Split text into paragraphs, reading it lazily.
+
+    Paragraphs end at blank lines, and are cut at the end of a sentence or line
+    once they reach max_chars (or mid-sentence for longer sentences), so memory
+    stays bounded however the text is laid out, even with no line breaks at all.
+
+    Args:
+        text: The text in pieces of any size, e.g. read_chunks(file) or the
+            lines of an open file
+        max_chars: The most characters to hold in a paragraph
+
+    Yields:
+        The paragraphs, with line breaks removed
+    """
+    parts: List[str] = []
+    size = 0
+    # Whether the last piece ended a line, so a blank piece is a blank line
+    at_line_start = True
+    for piece in _iter_sentences(text, max_chars):
+        ends_line = piece.endswith("\n")
+        stripped = piece.strip()
+        if not stripped:
+            if ends_line and at_line_start and parts:
+                yield "".join(parts)
+                parts, size = [], 0
+            at_line_start = at_line_start or ends_line
+            continue
+        at_line_start = ends_line
+        parts.append(stripped)
+        size += len(stripped)
+        if size >= max_chars:
+            yield "".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts)
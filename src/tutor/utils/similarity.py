@@ -0,0 +1,433 @@
+"""Near-duplicate detection across a deck's flashcards.
+
+DuplicateIndex finds cards that are near-duplicates of each other or of a new
+word: traditional/simplified variants, overlapping phrases (学习 and 学习者) and
+cards with the same word and a similar meaning. Each card is reduced to a set
+of shingles, the characters and character bigrams of its word (in simplified
+form, so variants coincide) plus the words of its English, and candidates are
+found with MinHash and locality-sensitive hashing (LSH) before their Jaccard
+similarity is computed exactly. A query touches only a handful of LSH buckets,
+so it takes microseconds however large the deck.
+
+EmbeddingIndex optionally adds semantic matches from a local
+sentence-transformers model, when one is installed and downloaded.
+"""
+
+import random
+import re
+from collections import defaultdict
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from tutor.llm.models import LanguageFlashcard
+from tutor.utils.chinese import to_simplified
+from tutor.utils.logging import dprint
+
+# Embeddings are optional, and importing sentence-transformers (and torch) takes
+# seconds, so it is only imported when a model is loaded
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+DEFAULT_NUM_PERM = 32
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_EMBEDDING_THRESHOLD = 0.9
+
+# Duplicate kinds, from most to least certain
+KIND_VARIANT = "variant"  # The same word, e.g. in traditional and simplified
+KIND_OVERLAP = "overlap"  # One word of 2+ characters contains the other
+KIND_SIMILAR = "similar"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_ENGLISH_WORD_RE = re.compile(r"[a-z0-9']+")
+# Words too common in definitions to say anything about meaning
+_ENGLISH_STOPWORDS = frozenset(
+    "a an the to of or and in on for be is as at by with sb sth".split()
+)
+
+
+def word_shingles(word: str) -> FrozenSet[str]:
+    """Get the shingles of a word: its characters and character bigrams."""
+    return _char_shingles(to_simplified(word.strip()))
+
+
+def _char_shingles(word: str) -> FrozenSet[str]:
+    shingles = {f"c:{c}" for c in word}
+    shingles.update(f"b:{word[i : i + 2]}" for i in range(len(word) - 1))
+    return frozenset(shingles)
+
+
+def english_shingles(english: str) -> FrozenSet[str]:
+    """Get the shingles of an English definition: its meaningful words."""
+    return frozenset(
+        f"e:{w}"
+        for w in _ENGLISH_WORD_RE.findall(english.lower())
+        if w not in _ENGLISH_STOPWORDS
+    )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Get the Jaccard similarity of two sets."""
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _LSHTable:
+    """MinHash signatures of sets, banded into buckets of likely-similar sets."""
+
+    __slots__ = ("_hash_params", "_bands", "_rows", "_buckets")
+
+    def __init__(self, num_perm: int, bands: int, seed: int) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = random.Random(seed)
+        self._hash_params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._buckets: Dict[Tuple, List[Hashable]] = defaultdict(list)
+
+    def _band_keys(self, shingles: FrozenSet[str]) -> List[Tuple]:
+        hashes = [hash(s) & _MAX_HASH for s in shingles]
+        signature = [
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._hash_params
+        ]
+        rows = self._rows
+        return [
+            (band,) + tuple(signature[band * rows : (band + 1) * rows])
+            for band in range(self._bands)
+        ]
+
+    def add(self, key: Hashable, shingles: FrozenSet[str]) -> List[Tuple]:
+        if not shingles:
+            return []
+        band_keys = self._band_keys(shingles)
+        for band_key in band_keys:
+            self._buckets[band_key].append(key)
+        return band_keys
+
+    def candidates(
+        self, shingles: FrozenSet[str], band_keys: Optional[List[Tuple]] = None
+    ) -> Set[Hashable]:
+        if band_keys is None:
+            band_keys = self._band_keys(shingles) if shingles else []
+        found: Set[Hashable] = set()
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket:
+                found.update(bucket)
+        return found
+
+
+class _Entry:
+    __slots__ = (
+        "order",
+        "word",
+        "english",
+        "simplified",
+        "word_shingles",
+        "shingles",
+        "word_bands",
+        "bands",
+    )
+
+    def __init__(self, word: str, english: str, order: int = -1) -> None:
+        self.order = order
+        self.word = word
+        self.english = english
+        self.simplified = to_simplified(word.strip())
+        self.word_shingles = _char_shingles(self.simplified)
+        self.shingles = self.word_shingles | english_shingles(english)
+        # LSH band keys, kept so find_duplicates needn't hash every card again
+        self.word_bands: List[Tuple] = []
+        self.bands: List[Tuple] = []
+
+
+class Duplicate:
+    """A likely duplicate of a card or query."""
+
+    __slots__ = ("key", "word", "english", "similarity", "kind")
+
+    def __init__(
+        self, key: Hashable, word: str, english: str, similarity: float, kind: str
+    ) -> None:
+        self.key = key
+        self.word = word
+        self.english = english
+        # Jaccard similarity of the shingles, or cosine similarity of embeddings
+        self.similarity = similarity
+        self.kind = kind
+
+    def __repr__(self) -> str:
+        return f"Duplicate({self.word!r}, {self.kind}, {self.similarity:.2f})"
+
+
+def _duplicate_kind(a: str, b: str) -> str:
+    if a == b:
+        return KIND_VARIANT
+    # A single character is in too many words for that to mean much
+    if min(len(a), len(b)) > 1 and (a in b or b in a):
+        return KIND_OVERLAP
+    return KIND_SIMILAR
+
+
+class DuplicateIndex:
+    """MinHash/LSH index of flashcards for finding near-duplicates."""
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+    ) -> None:
+        """
+        Args:
+            threshold: The lowest Jaccard similarity reported as a duplicate;
+                variants and overlapping words are reported regardless
+            num_perm: The number of MinHash permutations
+            bands: The number of LSH bands; with 32 permutations in 16 bands,
+                sets with a Jaccard similarity of 0.3 are found half the time
+                and of 0.5 nearly always
+        """
+        self.threshold = threshold
+        self._entries: Dict[Hashable, _Entry] = {}
+        # Words alone, for queries before a card has been generated
+        self._words = _LSHTable(num_perm, bands, seed=1)
+        # Words with their English
+        self._cards = _LSHTable(num_perm, bands, seed=2)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def add(self, key: Hashable, word: str, english: str = "") -> None:
+        """Add a card to the index.
+
+        Args:
+            key: Identifies the card, e.g. its Anki note ID
+            word: The card's word
+            english: The card's English
+        """
+        if key in self._entries:
+            raise ValueError(f"Card {key!r} is already in the index")
+        entry = _Entry(word, english, len(self._entries))
+        self._entries[key] = entry
+        entry.word_bands = self._words.add(key, entry.word_shingles)
+        entry.bands = self._cards.add(key, entry.shingles)
+
+    def query(self, word: str, english: Optional[str] = None) -> List[Duplicate]:
+        """Find the cards a word, or a card, would duplicate.
+
+        Args:
+            word: The word
+            english: Its English, if known; without it only words are compared
+
+        Returns:
+            The likely duplicates, most similar first
+        """
+        entry = _Entry(word, english or "")
+        if english:
+            table, shingles = self._cards, entry.shingles
+        else:
+            table, shingles = self._words, entry.word_shingles
+        duplicates = []
+        for key in table.candidates(shingles):
+            other = self._entries[key]
+            other_shingles = other.shingles if english else other.word_shingles
+            duplicate = self._compare(key, entry, other, shingles, other_shingles)
+            if duplicate is not None:
+                duplicates.append(duplicate)
+        duplicates.sort(key=lambda d: -d.similarity)
+        return duplicates
+
+    def find_duplicates(self) -> List[Tuple[Hashable, Duplicate]]:
+        """Find all near-duplicate pairs of cards in the index.
+
+        Returns:
+            (key, duplicate of that card) for each pair, most similar first
+        """
+        found = []
+        # Each card is compared with the cards added after it in its buckets,
+        # so every pair is compared once without collecting the pairs first
+        for key, entry in self._entries.items():
+            candidates = self._words.candidates(entry.word_shingles, entry.word_bands)
+            candidates |= self._cards.candidates(entry.shingles, entry.bands)
+            for other_key in candidates:
+                other = self._entries[other_key]
+                if other.order <= entry.order:
+                    continue
+                duplicate = self._compare(
+                    other_key, entry, other, entry.shingles, other.shingles
+                )
+                if duplicate is not None:
+                    found.append((key, duplicate))
+        found.sort(key=lambda pair: -pair[1].similarity)
+        return found
+
+    def _compare(
+        self,
+        key: Hashable,
+        entry: _Entry,
+        other: _Entry,
+        shingles: FrozenSet[str],
+        other_shingles: FrozenSet[str],
+    ) -> Optional[Duplicate]:
+        similarity = jaccard(shingles, other_shingles)
+        kind = _duplicate_kind(entry.simplified, other.simplified)
+        if kind == KIND_SIMILAR and similarity < self.threshold:
+            return None
+        return Duplicate(key, other.word, other.english, similarity, kind)
+
+
+def build_duplicate_index(
+    cards: Iterable[LanguageFlashcard], threshold: float = DEFAULT_THRESHOLD
+) -> DuplicateIndex:
+    """Index flashcards, e.g. a whole deck, keyed by their Anki note IDs.
+
+    Args:
+        cards: The flashcards
+        threshold: As for DuplicateIndex
+
+    Returns:
+        The index
+    """
+    index = DuplicateIndex(threshold)
+    for card in cards:
+        index.add(card.anki_note_id or card.word, card.word, card.english)
+    return index
+
+
+def load_embedding_model(
+    name: str = DEFAULT_EMBEDDING_MODEL,
+) -> Optional["SentenceTransformer"]:
+    """Load a local sentence-transformers model, if available.
+
+    Only models already downloaded are used, so this never goes to the network.
+
+    Args:
+        name: The model name or path
+
+    Returns:
+        The model, or None if sentence-transformers isn't installed or the model
+        isn't available locally
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    try:
+        return SentenceTransformer(name, local_files_only=True)
+    except Exception as e:
+        dprint(f"Embedding model {name} not available: {e}")
+        return None
+
+
+class EmbeddingIndex:
+    """Semantic near-duplicates from sentence embeddings of word and English."""
+
+    # Rows of the similarity matrix computed at once, bounding memory
+    BLOCK_SIZE = 1024
+
+    def __init__(
+        self,
+        model: "SentenceTransformer",
+        threshold: float = DEFAULT_EMBEDDING_THRESHOLD,
+    ) -> None:
+        """
+        Args:
+            model: From load_embedding_model
+            threshold: The lowest cosine similarity reported as a duplicate
+        """
+        self.model = model
+        self.threshold = threshold
+        self._keys: List[Hashable] = []
+        self._cards: List[Tuple[str, str]] = []
+        self._vectors = None
+
+    def build(self, cards: Iterable[Tuple[Hashable, str, str]]) -> None:
+        """Embed cards, replacing any embedded before.
+
+        Args:
+            cards: (key, word, english) for each card
+        """
+        self._keys, self._cards = [], []
+        texts = []
+        for key, word, english in cards:
+            self._keys.append(key)
+            self._cards.append((word, english))
+            texts.append(f"{word}: {english}")
+        self._vectors = self.model.encode(
+            texts, normalize_embeddings=True, convert_to_numpy=True
+        )
+
+    def query(self, word: str, english: str = "") -> List[Duplicate]:
+        """Find the cards most similar in meaning to a word.
+
+        Args:
+            word: The word
+            english: Its English, if known
+
+        Returns:
+            The likely duplicates, most similar first
+        """
+        if self._vectors is None or not len(self._keys):
+            return []
+        import numpy as np
+
+        text = f"{word}: {english}" if english else word
+        vector = self.model.encode([text], normalize_embeddings=True)[0]
+        similarities = self._vectors @ vector
+        return [
+            self._duplicate(i, float(similarities[i]), word)
+            for i in np.argsort(-similarities)
+            if similarities[i] >= self.threshold
+        ]
+
+    def find_duplicates(self) -> List[Tuple[Hashable, Duplicate]]:
+        """Find all pairs of cards with similar meanings.
+
+        Returns:
+            (key, duplicate of that card) for each pair, most similar first
+        """
+        found = []
+        if self._vectors is None:
+            return found
+        import numpy as np
+
+        for start in range(0, len(self._keys), self.BLOCK_SIZE):
+            block = self._vectors[start : start + self.BLOCK_SIZE] @ self._vectors.T
+            for row, col in zip(*np.nonzero(block >= self.threshold)):
+                i = start + int(row)
+                if int(col) > i:
+                    found.append(
+                        (
+                            self._keys[i],
+                            self._duplicate(
+                                int(col), float(block[row, col]), self._cards[i][0]
+                            ),
+                        )
+                    )
+        found.sort(key=lambda pair: -pair[1].similarity)
+        return found
+
+    def _duplicate(self, i: int, similarity: float, word: str) -> Duplicate:
+        other_word, other_english = self._cards[i]
+        kind = _duplicate_kind(to_simplified(word), to_simplified(other_word))
+        return Duplicate(self._keys[i], other_word, other_english, similarity, kind)
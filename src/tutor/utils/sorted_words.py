@@ -0,0 +1,134 @@
+"""Searches over a sorted array of UTF-8 encoded words.
+
+Shared by the memory-mapped word indexes (tutor.utils.frequency and
+tutor.utils.romanization), which give access to their i-th word through a
+word_at(i) function rather than holding the words in a list. The indexes store
+their integers as little-endian uint32, whatever the byte order of the host;
+pack_uint32s and view_uint32s convert them.
+"""
+
+import sys
+from array import array
+from typing import Callable, Dict, Tuple
+
+WordAt = Callable[[int], bytes]
+
+
+def pack_uint32s(values: array) -> bytes:
+    """Encode an array("I") as little-endian uint32 for an index file."""
+    if sys.byteorder == "big":
+        values = array("I", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def view_uint32s(data: memoryview) -> memoryview:
+    """View little-endian uint32 read from an index file as integers.
+
+    The view shares the file's memory, except on big-endian hosts, which get a
+    byte-swapped copy.
+    """
+    if sys.byteorder == "little":
+        return data.cast("I")
+    values = array("I", data.tobytes())
+    values.byteswap()
+    return memoryview(values)
+
+
+class SortedWords:
+    """Binary and prefix searches over words in sorted order. Thread-safe."""
+
+    __slots__ = ("_word_at", "_count", "_char_ranges")
+
+    def __init__(self, word_at: WordAt, count: int) -> None:
+        """
+        Args:
+            word_at: Gets the i-th word, in sorted order
+            count: The number of words
+        """
+        self._word_at = word_at
+        self._count = count
+        # Range of the words starting with each character seen so far. Most of
+        # a prefix search is spent narrowing to the first character, and texts
+        # use a few thousand distinct characters at most.
+        self._char_ranges: Dict[str, Tuple[int, int]] = {}
+
+    def find(self, word: bytes) -> int:
+        """Find a word by binary search.
+
+        Args:
+            word: The word to find
+
+        Returns:
+            The word's position, or -1 if it isn't there
+        """
+        word_at = self._word_at
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = word_at(mid)
+            if candidate < word:
+                lo = mid + 1
+            elif candidate > word:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def longest_prefix(self, text: str, start: int = 0) -> Tuple[int, int]:
+        """Find the longest word that text continues with.
+
+        Walks the sorted words like a trie: each further character narrows the
+        range of words sharing the prefix, until no word does.
+
+        Args:
+            text: The text to match
+            start: Where in text to match from
+
+        Returns:
+            The length of the longest matching word in characters and its
+            position; (0, -1) if no word matches
+        """
+        if start >= len(text):
+            return 0, -1
+        first = text[start]
+        prefix = first.encode()
+        char_range = self._char_ranges.get(first)
+        if char_range is None:
+            char_range = self._char_ranges[first] = self._narrow(0, self._count, prefix)
+        lo, hi = char_range
+
+        best_length, best_index = 0, -1
+        end = start
+        while lo < hi:
+            if self._word_at(lo) == prefix:
+                best_length, best_index = end - start + 1, lo
+            end += 1
+            if end >= len(text):
+                break
+            prefix += text[end].encode()
+            lo, hi = self._narrow(lo, hi, prefix)
+        return best_length, best_index
+
+    def _narrow(self, lo: int, hi: int, prefix: bytes) -> Tuple[int, int]:
+        """Narrow a range of words to those starting with prefix."""
+        word_at = self._word_at
+        size = len(prefix)
+        # First word >= prefix
+        left, right = lo, hi
+        while left < right:
+            mid = (left + right) // 2
+            if word_at(mid) < prefix:
+                left = mid + 1
+            else:
+                right = mid
+        lo = left
+        # First word not starting with prefix
+        right = hi
+        while left < right:
+            mid = (left + right) // 2
+            if word_at(mid)[:size] <= prefix:
+                left = mid + 1
+            else:
+                right = mid
+        return lo, left
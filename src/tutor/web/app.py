@@ -1,11 +1,40 @@
+import asyncio
+import json
 import pathlib
+import threading
+from concurrent.futures import Future, wait
+from functools import cache
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, Response, abort, jsonify, request
 from flask_cors import CORS
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 from ..cli_global_state import get_model
+from ..utils.logging import dprint
+from ..llm.metrics import LLMCall, render_prometheus, track_llm_call
+from ..llm.streaming import IncrementalJsonParser
+from .assets import INDEX, StaticAssets
+from .context import maybe_summarize
+from .scenarios import (
+    DEFAULT_SCENARIO,
+    SCENARIOS,
+    ScenarioOpener,
+    cache_generated_opener,
+    can_generate_scenario,
+    get_generated_opener,
+    get_scenario_names,
+)
+from .sessions import DialogueSession, SessionStore
 
 # Load environment variables
 load_dotenv()
@@ -54,63 +83,426 @@ class ConversationReview(BaseModel):
     )
 
 
+def get_scenario(scenario: str) -> Dict[str, str]:
+    """Get the opening situation and line for a built-in scenario, defaulting to the restaurant."""
+    return SCENARIOS.get(scenario, SCENARIOS[DEFAULT_SCENARIO])
+
+
+@cache
+def _get_async_openai_client() -> AsyncOpenAI:
+    """Get the AsyncOpenAI client shared by all requests, so connections are pooled."""
+    return AsyncOpenAI()
+
+
+def _get_opener_messages(scenario: str) -> List[dict]:
+    """Build the chat messages for generating a scenario's opener."""
+    return [
+        {
+            "role": "system",
+            "content": "You are a Chinese language tutor setting up conversation practice for an intermediate student.",
+        },
+        {
+            "role": "user",
+            "content": f"Set up a dialogue practice scenario: {scenario}\n\nDescribe the situation the student is in, and write the opening line of the other person in the conversation, whom you will play.",
+        },
+    ]
+
+
+def get_scenario_opener(scenario: str) -> Dict[str, str]:
+    """Get the opener for a scenario, generating one if it isn't built in.
+
+    Generated openers are cached, so each scenario is only generated once. If
+    generation fails, the default scenario's opener is used.
+    """
+    if scenario in SCENARIOS or not can_generate_scenario(scenario):
+        return get_scenario(scenario)
+    opener = get_generated_opener(scenario)
+    if opener is not None:
+        return opener
+
+    try:
+        openai_client = OpenAI()
+        model = get_model()
+        with track_llm_call("scenario_opener", model) as call:
+            completion = openai_client.beta.chat.completions.parse(
+                model=model,
+                response_format=ScenarioOpener,
+                messages=_get_opener_messages(scenario),
+            )
+            call.record_usage(completion.usage)
+        return cache_generated_opener(scenario, completion.choices[0].message.parsed)
+    except Exception as e:
+        print(f"Error generating scenario opener: {e}")
+        return get_scenario(scenario)
+
+
+async def get_scenario_opener_async(scenario: str) -> Dict[str, str]:
+    """Get the opener for a scenario without blocking, generating one if it isn't built in.
+
+    Generated openers are cached, so each scenario is only generated once. If
+    generation fails, the default scenario's opener is used.
+    """
+    if scenario in SCENARIOS or not can_generate_scenario(scenario):
+        return get_scenario(scenario)
+    opener = get_generated_opener(scenario)
+    if opener is not None:
+        return opener
+
+    try:
+        openai_client = _get_async_openai_client()
+        model = get_model()
+        with track_llm_call("scenario_opener", model) as call:
+            completion = await openai_client.beta.chat.completions.parse(
+                model=model,
+                response_format=ScenarioOpener,
+                messages=_get_opener_messages(scenario),
+            )
+            call.record_usage(completion.usage)
+        return cache_generated_opener(scenario, completion.choices[0].message.parsed)
+    except Exception as e:
+        print(f"Error generating scenario opener: {e}")
+        return get_scenario(scenario)
+
+
+def start_session(
+    sessions: SessionStore, scenario: str, opener: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """Create a session for a scenario, seeded with the tutor's opening line.
+
+    Args:
+        sessions: The store to create the session in
+        scenario: The scenario to practice
+        opener: The scenario's opener, if already looked up or generated;
+            defaults to the built-in one
+
+    Returns:
+        The scenario's opening situation and line, plus the new session_id
+    """
+    if opener is None:
+        opener = get_scenario(scenario)
+    session = sessions.create(scenario)
+    session.add_turn(
+        "tutor",
+        opener["initial_line_zh"],
+        DialogueResponse(
+            next_line_zh=opener["initial_line_zh"],
+            next_line_pinyin=opener["initial_line_pinyin"],
+            next_line_en=opener["initial_line_en"],
+        ).model_dump_json(),
+    )
+    sessions.save(session)
+    return {**opener, "session_id": session.session_id}
+
+
+def _add_turns(
+    sessions: SessionStore,
+    session: DialogueSession,
+    user_response: str,
+    response: DialogueResponse,
+) -> DialogueSession:
+    """Add the user's turn and the tutor's reply to the stored copy of a session.
+
+    The stored copy is used in case the session was evicted and reloaded while
+    the reply was generated.
+
+    Returns:
+        The session the turns were added to
+    """
+    with sessions.lock(session.session_id):
+        session = sessions.get(session.session_id) or session
+        session.add_turn("user", user_response)
+        session.add_turn("tutor", response.next_line_zh, response.model_dump_json())
+        sessions.save(session)
+    maybe_summarize(sessions, session)
+    return session
+
+
+def record_turn(
+    sessions: SessionStore,
+    session: DialogueSession,
+    user_response: str,
+    response: DialogueResponse,
+) -> None:
+    """Add the user's turn and the tutor's reply to a session.
+
+    The new turns are then reviewed in the background, so the review at the end
+    of the session has little or nothing left to do.
+    """
+    session = _add_turns(sessions, session, user_response, response)
+    review_in_background(sessions, session)
+
+
+async def record_turn_async(
+    sessions: SessionStore,
+    session: DialogueSession,
+    user_response: str,
+    response: DialogueResponse,
+) -> None:
+    """Record a turn as record_turn does, without blocking.
+
+    The turns are saved on a worker thread, since saving the session and
+    counting its tokens would otherwise block the event loop, and the review is
+    awaited on the event loop.
+    """
+    session = await asyncio.to_thread(
+        _add_turns, sessions, session, user_response, response
+    )
+    review_in_background_async(sessions, session)
+
+
+def _get_review_messages(session: DialogueSession) -> List[dict]:
+    """Build the chat messages for reviewing the turns since the last review."""
+    summary = (
+        f"Summary of the conversation so far, for context:\n{session.summary}\n\n"
+        if session.summary
+        else ""
+    )
+
+    return [
+        {
+            "role": "system",
+            "content": "You are a Chinese language tutor focusing on helping students achieve native-like expression. Pay special attention to phrases that sound unnatural or non-native.",
+        },
+        {
+            "role": "user",
+            "content": f"Review this Chinese conversation practice. Scenario: {session.scenario}\n\n{summary}Conversation:\n{session.unreviewed_transcript}",
+        },
+    ]
+
+
+def _stored_conversation_review(session: DialogueSession) -> ConversationReview:
+    """The review of every turn reviewed so far, also returned when the LLM call fails."""
+    return ConversationReview(
+        grammar_feedback=session.grammar_feedback,
+        vocabulary_review=session.vocabulary_review,
+    )
+
+
+def _get_review_request(
+    sessions: SessionStore, session: DialogueSession
+) -> Tuple[List[dict], int]:
+    """Get the review messages for a session's new turns.
+
+    Returns:
+        The messages, and the length of the transcript they cover; both are
+        taken under the session's lock, so no turn is added in between
+    """
+    with sessions.lock(session.session_id):
+        return _get_review_messages(session), len(session.transcript)
+
+
+def _record_review(
+    sessions: SessionStore,
+    session: DialogueSession,
+    review: ConversationReview,
+    reviewed_length: int,
+) -> ConversationReview:
+    """Merge the review of new turns into the session's stored review.
+
+    Feedback on a phrase that has already been corrected, and words that have
+    already been reviewed, are dropped. The review is merged into the stored
+    copy of the session, so turns recorded during the review are kept.
+    """
+    with sessions.update(session.session_id) as stored:
+        if stored is not None:
+            session = stored
+        _merge_review(session, review, reviewed_length)
+        return _stored_conversation_review(session)
+
+
+def _merge_review(
+    session: DialogueSession, review: ConversationReview, reviewed_length: int
+) -> None:
+    corrections = {(f["original"], f["correction"]) for f in session.grammar_feedback}
+    for feedback in review.grammar_feedback:
+        if (feedback.original, feedback.correction) not in corrections:
+            corrections.add((feedback.original, feedback.correction))
+            session.grammar_feedback.append(feedback.model_dump())
+
+    words = {item["word"] for item in session.vocabulary_review}
+    for item in review.vocabulary_review:
+        if item.word not in words:
+            words.add(item.word)
+            session.vocabulary_review.append(item.model_dump())
+
+    # Another review of later turns may have finished first
+    session.reviewed_length = max(session.reviewed_length, reviewed_length)
+
+
 def get_conversation_review(
-    dialogue_history: List[dict], scenario: str
+    sessions: SessionStore, session: DialogueSession
 ) -> ConversationReview:
-    """Generate a comprehensive review of the entire conversation."""
+    """Generate a comprehensive review of the entire conversation.
+
+    Only the turns added since the last review are sent to the LLM; their review
+    is merged into the one stored on the session.
+    """
+    if not session.unreviewed_transcript:
+        return _stored_conversation_review(session)
+
     openai_client = OpenAI()
+    messages, reviewed_length = _get_review_request(sessions, session)
 
-    # Format dialogue history for the prompt
-    history_text = "\n".join(
-        f"{'Tutor' if msg['role'] == 'tutor' else 'User'}: {msg['content']}"
-        for msg in dialogue_history
+    try:
+        model = get_model()
+        with track_llm_call("review", model) as call:
+            completion = openai_client.beta.chat.completions.parse(
+                model=model,
+                response_format=ConversationReview,
+                messages=messages,
+                seed=69,
+            )
+            call.record_usage(completion.usage)
+        review = completion.choices[0].message.parsed
+    except Exception as e:
+        print(f"Error generating conversation review: {e}")
+        return _stored_conversation_review(session)
+
+    return _record_review(sessions, session, review, reviewed_length)
+
+
+async def get_conversation_review_async(
+    sessions: SessionStore, session: DialogueSession
+) -> ConversationReview:
+    """Generate a comprehensive review of the entire conversation without blocking.
+
+    Only the turns added since the last review are sent to the LLM; their review
+    is merged into the one stored on the session.
+    """
+    if not session.unreviewed_transcript:
+        return _stored_conversation_review(session)
+
+    openai_client = _get_async_openai_client()
+    messages, reviewed_length = await asyncio.to_thread(
+        _get_review_request, sessions, session
     )
 
     try:
-        completion = openai_client.beta.chat.completions.parse(
-            model=get_model(),
-            response_format=ConversationReview,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a Chinese language tutor focusing on helping students achieve native-like expression. Pay special attention to phrases that sound unnatural or non-native.",
-                },
-                {
-                    "role": "user",
-                    "content": f"Review this Chinese conversation practice. Scenario: {scenario}\n\nConversation:\n{history_text}",
-                },
-            ],
-            seed=69,
-        )
-        return completion.choices[0].message.parsed
+        model = get_model()
+        with track_llm_call("review", model) as call:
+            completion = await openai_client.beta.chat.completions.parse(
+                model=model,
+                response_format=ConversationReview,
+                messages=messages,
+                seed=69,
+            )
+            call.record_usage(completion.usage)
+        review = completion.choices[0].message.parsed
     except Exception as e:
         print(f"Error generating conversation review: {e}")
-        return ConversationReview(
-            grammar_feedback=[],
-            vocabulary_review=[],
-        )
+        return _stored_conversation_review(session)
 
+    return await asyncio.to_thread(
+        _record_review, sessions, session, review, reviewed_length
+    )
 
-def get_dialogue_response(
-    user_response: str,
-    dialogue_history: List[dict],
-    scenario: str,
-) -> DialogueResponse:
-    """Generate the next dialogue response using OpenAI."""
-    openai_client = OpenAI()
 
-    # Format dialogue history for the prompt
-    history_text = "\n".join(
-        f"{'Tutor' if msg['role'] == 'tutor' else 'User'}: {msg['content']}"
-        for msg in dialogue_history
-    )
+# Background reviews in progress, keyed by session ID
+_review_futures: Dict[str, Future] = {}
+_review_futures_lock = threading.Lock()
+# Background reviews in progress in the async app, keyed by session ID; only
+# used from the event loop
+_review_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _review_new_turns(sessions: SessionStore, session_id: str) -> None:
+    """Review turns until none are left, including any added during a review.
+
+    The session is re-fetched by ID for each review, rather than kept, since it
+    may be evicted and reloaded in the meantime.
+    """
+    while True:
+        session = sessions.get(session_id)
+        if session is None or not session.unreviewed_transcript:
+            break
+        reviewed_length = session.reviewed_length
+        get_conversation_review(sessions, session)
+        session = sessions.get(session_id)
+        if session is None or session.reviewed_length == reviewed_length:
+            # The review failed; the turns are retried by the next review
+            break
+
+
+async def _review_new_turns_async(sessions: SessionStore, session_id: str) -> None:
+    """Review turns as _review_new_turns does, without blocking."""
+    while True:
+        session = await asyncio.to_thread(sessions.get, session_id)
+        if session is None or not session.unreviewed_transcript:
+            break
+        reviewed_length = session.reviewed_length
+        await get_conversation_review_async(sessions, session)
+        session = await asyncio.to_thread(sessions.get, session_id)
+        if session is None or session.reviewed_length == reviewed_length:
+            # The review failed; the turns are retried by the next review
+            break
+
+
+def review_in_background(sessions: SessionStore, session: DialogueSession) -> None:
+    """Start reviewing a session's new turns, unless a review is already running.
+
+    Each session's review runs on its own thread, so it never waits behind the
+    reviews of other sessions.
+    """
+    session_id = session.session_id
+    with _review_futures_lock:
+        future = _review_futures.get(session_id)
+        if future is not None and not future.done():
+            return
+        future = Future()
+        _review_futures[session_id] = future
+
+    def forget(done: Future) -> None:
+        with _review_futures_lock:
+            if _review_futures.get(session_id) is done:
+                del _review_futures[session_id]
+
+    def run() -> None:
+        try:
+            _review_new_turns(sessions, session_id)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+    future.add_done_callback(forget)
+    threading.Thread(target=run, name=f"review-{session_id}", daemon=True).start()
 
-    prompt = f"""You are helping a student practice Chinese conversation. The scenario is: {scenario}.
 
-Conversation history:
-{history_text}
+def review_in_background_async(
+    sessions: SessionStore, session: DialogueSession
+) -> None:
+    """Start reviewing a session's new turns as a task on the running event loop,
+    unless a review is already running."""
+    session_id = session.session_id
+    task = _review_tasks.get(session_id)
+    if task is not None and not task.done():
+        return
+    task = asyncio.create_task(_review_new_turns_async(sessions, session_id))
+    _review_tasks[session_id] = task
 
-User's response: {user_response}
+    def forget(done: asyncio.Task) -> None:
+        if _review_tasks.get(session_id) is done:
+            del _review_tasks[session_id]
+        if not done.cancelled() and done.exception() is not None:
+            print(f"Error reviewing dialogue: {done.exception()}")
+
+    task.add_done_callback(forget)
+
+
+def wait_for_background_review(session: DialogueSession) -> None:
+    """Wait for a session's background review, if one is running.
+
+    A failed background review is not raised; its turns are reviewed again.
+    """
+    with _review_futures_lock:
+        future = _review_futures.get(session.session_id)
+    if future is not None:
+        wait([future])
+
+
+# Kept identical across sessions and turns so the provider can cache the prompt
+# prefix; everything that varies comes after it
+DIALOGUE_SYSTEM_PROMPT = """You are a helpful Chinese language tutor, helping a student practice Chinese conversation. Always respond in the exact JSON format requested.
 
 Provide the next line of dialogue naturally. Follow these rules:
 1. Continue the dialogue naturally based on the scenario
@@ -123,108 +515,314 @@ Format your response as a JSON object with these fields:
 - next_line_pinyin: Pinyin for the next line
 - next_line_en: English translation"""
 
-    try:
-        completion = openai_client.chat.completions.create(
-            model=get_model(),  # Use the same model as flashcards
-            response_format={"type": "json_object"},
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful Chinese language tutor. Always respond in the exact JSON format requested.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+
+def _get_dialogue_messages(session: DialogueSession, user_response: str) -> List[dict]:
+    """Build the chat messages for generating the next dialogue line.
+
+    The messages are the fixed system prompt, then the scenario, then the
+    conversation as alternating turns, so each turn only adds to the end of the
+    previous turn's prompt. Once older turns have been folded into the session's
+    summary, the summary takes their place.
+    """
+    messages = [
+        {"role": "system", "content": DIALOGUE_SYSTEM_PROMPT},
+        {"role": "system", "content": f"The scenario is: {session.scenario}."},
+    ]
+    if session.summary:
+        messages.append(
+            {
+                "role": "system",
+                "content": f"Summary of the conversation so far:\n{session.summary}",
+            }
         )
-        response_json = completion.choices[0].message.content
-        return DialogueResponse.model_validate_json(response_json)
+    messages.extend(session.recent_messages)
+    messages.append({"role": "user", "content": user_response})
+    return messages
+
+
+def _log_usage(call: LLMCall) -> None:
+    """Log token usage for a dialogue turn, including prompt tokens served from cache."""
+    dprint(
+        f"Dialogue turn used {call.prompt_tokens} prompt tokens "
+        f"({call.cached_tokens} cached) and {call.completion_tokens} completion tokens"
+    )
+
+
+def _fallback_dialogue_response() -> DialogueResponse:
+    """Fallback dialogue line returned when the LLM call fails."""
+    return DialogueResponse(
+        next_line_zh="好的，让我们继续",
+        next_line_pinyin="hǎo de, ràng wǒ men jì xù",
+        next_line_en="Okay, let's continue",
+    )
+
+
+def get_dialogue_response(
+    session: DialogueSession, user_response: str
+) -> DialogueResponse:
+    """Generate the next dialogue response using OpenAI."""
+    openai_client = OpenAI()
+
+    try:
+        model = get_model()  # Use the same model as flashcards
+        with track_llm_call("dialogue", model) as call:
+            completion = openai_client.chat.completions.create(
+                model=model,
+                response_format={"type": "json_object"},
+                messages=_get_dialogue_messages(session, user_response),
+            )
+            call.record_usage(completion.usage)
+            _log_usage(call)
+            response_json = completion.choices[0].message.content
+            return DialogueResponse.model_validate_json(response_json)
     except Exception as e:
         print(f"Error generating dialogue response: {e}")
         # Return a fallback response
-        return DialogueResponse(
-            next_line_zh="好的，让我们继续",
-            next_line_pinyin="hǎo de, ràng wǒ men jì xù",
-            next_line_en="Okay, let's continue",
-        )
+        return _fallback_dialogue_response()
+
+
+async def get_dialogue_response_async(
+    session: DialogueSession, user_response: str
+) -> DialogueResponse:
+    """Generate the next dialogue response using OpenAI without blocking."""
+    openai_client = _get_async_openai_client()
+
+    try:
+        model = get_model()  # Use the same model as flashcards
+        with track_llm_call("dialogue", model) as call:
+            completion = await openai_client.chat.completions.create(
+                model=model,
+                response_format={"type": "json_object"},
+                messages=_get_dialogue_messages(session, user_response),
+            )
+            call.record_usage(completion.usage)
+            _log_usage(call)
+            response_json = completion.choices[0].message.content
+            return DialogueResponse.model_validate_json(response_json)
+    except Exception as e:
+        print(f"Error generating dialogue response: {e}")
+        # Return a fallback response
+        return _fallback_dialogue_response()
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Stop proxies from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse(event: dict) -> str:
+    """Format an event as a server-sent event."""
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+class _DialogueStreamEncoder:
+    """Turns a streamed DialogueResponse JSON document into server-sent events.
+
+    The Chinese line is sent as "delta" events while it is generated, and the
+    pinyin and English as "field" events once each is complete. The caller ends
+    the stream with a "done" event holding the validated response.
+    """
+
+    def __init__(self) -> None:
+        self._parser = IncrementalJsonParser()
+        self._content: List[str] = []
+        self._sent_zh = 0
+
+    def _zh_delta(self, text: str) -> List[str]:
+        delta = text[self._sent_zh :]
+        if not delta:
+            return []
+        self._sent_zh = len(text)
+        return [_sse({"type": "delta", "field": "next_line_zh", "text": delta})]
+
+    def feed(self, text: str) -> List[str]:
+        """Consume the next chunk of the response and get the events to send."""
+        self._content.append(text)
+        events = []
 
+        for path, value in self._parser.feed(text):
+            if path == ("next_line_zh",):
+                events.extend(self._zh_delta(value))
+            elif path in (("next_line_pinyin",), ("next_line_en",)):
+                events.append(_sse({"type": "field", "field": path[0], "value": value}))
+
+        partial = self._parser.partial_value()
+        if partial and partial[0] == ("next_line_zh",):
+            events.extend(self._zh_delta(partial[1]))
+
+        return events
+
+    def response(self) -> DialogueResponse:
+        """Validate the complete response once the stream has finished."""
+        return DialogueResponse.model_validate_json("".join(self._content))
+
+
+def stream_dialogue_response(
+    session: DialogueSession,
+    user_response: str,
+    on_response: Optional[Callable[[DialogueResponse], None]] = None,
+) -> Iterator[str]:
+    """Generate the next dialogue response as a stream of server-sent events.
+
+    on_response, if given, is called with the complete response before the
+    final "done" event is sent.
+    """
+    openai_client = OpenAI()
+    encoder = _DialogueStreamEncoder()
+
+    try:
+        model = get_model()
+        with track_llm_call("dialogue_stream", model) as call:
+            stream = openai_client.chat.completions.create(
+                model=model,
+                response_format={"type": "json_object"},
+                messages=_get_dialogue_messages(session, user_response),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for chunk in stream:
+                if chunk.usage is not None:
+                    call.record_usage(chunk.usage)
+                    _log_usage(call)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield from encoder.feed(chunk.choices[0].delta.content)
+            response = encoder.response()
+    except Exception as e:
+        print(f"Error generating dialogue response: {e}")
+        response = _fallback_dialogue_response()
+
+    if on_response is not None:
+        on_response(response)
+    yield _sse({"type": "done", "response": response.model_dump()})
+
+
+async def stream_dialogue_response_async(
+    session: DialogueSession,
+    user_response: str,
+    on_response: Optional[Callable[[DialogueResponse], Awaitable[None]]] = None,
+) -> AsyncIterator[str]:
+    """Generate the next dialogue response as a stream of server-sent events without blocking.
+
+    on_response, if given, is called with the complete response and awaited
+    before the final "done" event is sent.
+    """
+    openai_client = _get_async_openai_client()
+    encoder = _DialogueStreamEncoder()
+
+    try:
+        model = get_model()
+        with track_llm_call("dialogue_stream", model) as call:
+            stream = await openai_client.chat.completions.create(
+                model=model,
+                response_format={"type": "json_object"},
+                messages=_get_dialogue_messages(session, user_response),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    call.record_usage(chunk.usage)
+                    _log_usage(call)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    for event in encoder.feed(chunk.choices[0].delta.content):
+                        yield event
+            response = encoder.response()
+    except Exception as e:
+        print(f"Error generating dialogue response: {e}")
+        response = _fallback_dialogue_response()
+
+    if on_response is not None:
+        await on_response(response)
+    yield _sse({"type": "done", "response": response.model_dump()})
+
+
+def create_app(sessions: Optional[SessionStore] = None):
+    if sessions is None:
+        sessions = SessionStore()
 
-def create_app():
     # Get the directory containing web assets
     web_dir = pathlib.Path(__file__).parent
     static_dir = web_dir / "static"
 
-    # Create Flask app with explicit static file configuration
-    app = Flask(
-        __name__,
-        static_folder=str(static_dir),
-        static_url_path="",
-        template_folder=str(static_dir),
-    )
+    # Static files are read and compressed once, then served from memory
+    assets = StaticAssets(static_dir)
+
+    app = Flask(__name__, static_folder=None)
     CORS(app)
 
-    @app.route("/")
-    def serve_index():
-        try:
-            print("Serving index.html...")
-            return app.send_static_file("index.html")
-        except Exception as e:
-            print(f"Error serving index.html: {e}")
-            return str(e), 500
+    @app.route("/", defaults={"filename": INDEX})
+    @app.route("/<path:filename>")
+    def serve_static(filename):
+        result = assets.response(
+            filename,
+            request.headers.get("Accept-Encoding", ""),
+            request.headers.get("If-None-Match", ""),
+        )
+        if result is None:
+            abort(404)
+        body, status, headers = result
+        return Response(body, status=status, headers=headers)
+
+    @app.route("/api/scenarios")
+    def list_scenarios():
+        """List the built-in scenarios."""
+        return jsonify(get_scenario_names())
+
+    @app.route("/metrics")
+    def metrics():
+        """Expose LLM call metrics in the Prometheus text format."""
+        return Response(render_prometheus(), mimetype=PROMETHEUS_CONTENT_TYPE)
 
     @app.route("/api/start-dialogue", methods=["POST"])
     def start_dialogue():
         """Start a new dialogue simulation."""
-        scenario = request.json.get("scenario", "restaurant")
-
-        # Mock data for testing
-        scenarios = {
-            "restaurant": {
-                "situation_zh": "你在一家中国餐馆",
-                "situation_en": "You are in a Chinese restaurant",
-                "initial_line_zh": "您好，请问想吃点什么？",
-                "initial_line_pinyin": "nín hǎo, qǐng wèn xiǎng chī diǎn shén me?",
-                "initial_line_en": "Hello, what would you like to eat?",
-            },
-            "shopping": {
-                "situation_zh": "你在商场里找衣服",
-                "situation_en": "You are looking for clothes in a mall",
-                "initial_line_zh": "需要我帮您找什么吗？",
-                "initial_line_pinyin": "xū yào wǒ bāng nín zhǎo shén me ma?",
-                "initial_line_en": "Can I help you find something?",
-            },
-            "travel": {
-                "situation_zh": "你在火车站买票",
-                "situation_en": "You are buying tickets at the train station",
-                "initial_line_zh": "您要去哪里？",
-                "initial_line_pinyin": "nín yào qù nǎ lǐ?",
-                "initial_line_en": "Where would you like to go?",
-            },
-            "work": {
-                "situation_zh": "你在办公室和同事聊天",
-                "situation_en": "You are chatting with a colleague at the office",
-                "initial_line_zh": "周末有什么计划吗？",
-                "initial_line_pinyin": "zhōu mò yǒu shén me jì huà ma?",
-                "initial_line_en": "Do you have any plans for the weekend?",
-            },
-        }
-
-        return jsonify(scenarios.get(scenario, scenarios["restaurant"]))
+        scenario = request.json.get("scenario", DEFAULT_SCENARIO)
+        opener = get_scenario_opener(scenario)
+        return jsonify(start_session(sessions, scenario, opener))
 
     @app.route("/api/respond", methods=["POST"])
     def respond_to_dialogue():
         """Process user's response and continue the dialogue."""
+        session = sessions.get(request.json.get("session_id"))
+        if session is None:
+            return jsonify({"error": "Unknown session"}), 404
         user_response = request.json.get("response", "")
-        history = request.json.get("history", [])
-        scenario = request.json.get("scenario", "restaurant")
-        response = get_dialogue_response(user_response, history, scenario)
+        response = get_dialogue_response(session, user_response)
+        record_turn(sessions, session, user_response, response)
         return jsonify(response.model_dump())
 
+    @app.route("/api/respond-stream", methods=["POST"])
+    def respond_to_dialogue_stream():
+        """Continue the dialogue, streaming the next line as server-sent events."""
+        session = sessions.get(request.json.get("session_id"))
+        if session is None:
+            return jsonify({"error": "Unknown session"}), 404
+        user_response = request.json.get("response", "")
+        return Response(
+            stream_dialogue_response(
+                session,
+                user_response,
+                lambda response: record_turn(
+                    sessions, session, user_response, response
+                ),
+            ),
+            mimetype="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+
     @app.route("/api/review", methods=["POST"])
     def review_conversation():
-        """Generate a comprehensive review of the conversation."""
-        history = request.json.get("history", [])
-        scenario = request.json.get("scenario", "restaurant")
+        """Generate a comprehensive review of the conversation.
+
+        Returns the review stored by the background reviews, merged with a
+        review of any turns they haven't reached yet.
+        """
+        session = sessions.get(request.json.get("session_id"))
+        if session is None:
+            return jsonify({"error": "Unknown session"}), 404
 
-        review = get_conversation_review(history, scenario)
+        review = get_conversation_review(sessions, session)
         return jsonify(review.model_dump())
 
     return app
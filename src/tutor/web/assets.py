@@ -0,0 +1,148 @@
+"""Static assets for the web app, prepared once at startup.
+
+Every file is read, hashed and compressed (brotli and gzip) when the app is
+created, so requests are served from memory. index.html refers to the other
+assets by content-hashed names like app.1a2b3c4d5e6f.js, which can be cached
+forever since a new version gets a new name; index.html itself is revalidated
+with its ETag on every load.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import brotli
+
+INDEX = "index.html"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Files smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 512
+
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json")
+# Preferred first
+_ENCODINGS = ("br", "gzip")
+
+_REFERENCE_RE = re.compile(r'(?P<attr>src|href)="(?P<name>[^":]+)"')
+
+
+class StaticAsset:
+    """A static file, with its content hash and compressed variants."""
+
+    __slots__ = ("content_type", "digest", "bodies")
+
+    def __init__(self, body: bytes, content_type: str) -> None:
+        self.content_type = content_type
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        # Body for each content encoding, keeping only variants that are smaller
+        self.bodies: Dict[str, bytes] = {"identity": body}
+
+        if len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(
+            _COMPRESSIBLE_TYPES
+        ):
+            for encoding, compressed in (
+                ("br", brotli.compress(body, quality=11)),
+                ("gzip", gzip.compress(body, compresslevel=9, mtime=0)),
+            ):
+                if len(compressed) < len(body):
+                    self.bodies[encoding] = compressed
+
+
+def _hashed_name(name: str, digest: str) -> str:
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def _content_type(name: str) -> str:
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        encoding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00"):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """The web app's static files, served from memory with caching headers."""
+
+    def __init__(self, static_dir: Path) -> None:
+        self._assets: Dict[str, StaticAsset] = {}
+        # Content-hashed name -> name
+        self._hashed_names: Dict[str, str] = {}
+
+        for path in sorted(static_dir.rglob("*")):
+            name = path.relative_to(static_dir).as_posix()
+            if path.is_file() and name != INDEX:
+                asset = StaticAsset(path.read_bytes(), _content_type(name))
+                self._assets[name] = asset
+                self._hashed_names[_hashed_name(name, asset.digest)] = name
+
+        index_path = static_dir / INDEX
+        if index_path.exists():
+            index = _REFERENCE_RE.sub(
+                self._hash_reference, index_path.read_text(encoding="utf-8")
+            )
+            self._assets[INDEX] = StaticAsset(index.encode(), _content_type(INDEX))
+
+    def _hash_reference(self, match: re.Match) -> str:
+        name = match.group("name")
+        if name in self._assets:
+            name = _hashed_name(name, self._assets[name].digest)
+        return f'{match.group("attr")}="{name}"'
+
+    def response(
+        self, path: str, accept_encoding: str = "", if_none_match: str = ""
+    ) -> Optional[Tuple[bytes, int, Dict[str, str]]]:
+        """Build the response for a request for a static file.
+
+        Args:
+            path: The requested path, relative to the static directory
+            accept_encoding: The request's Accept-Encoding header
+            if_none_match: The request's If-None-Match header
+
+        Returns:
+            (body, status, headers) for the response, or None if there is no
+            such file
+        """
+        path = path.lstrip("/") or INDEX
+        name = self._hashed_names.get(path)
+        immutable = name is not None
+        asset = self._assets.get(name or path)
+        if asset is None:
+            return None
+
+        accepted = _accepted_encodings(accept_encoding)
+        encoding = next(
+            (e for e in _ENCODINGS if e in asset.bodies and e in accepted), "identity"
+        )
+        etag = (
+            f'"{asset.digest}"'
+            if encoding == "identity"
+            else f'"{asset.digest}-{encoding}"'
+        )
+        headers = {
+            "Content-Type": asset.content_type,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL
+            if immutable
+            else REVALIDATE_CACHE_CONTROL,
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if etag in if_none_match or if_none_match.strip() == "*":
+            return b"", 304, headers
+        return asset.bodies[encoding], 200, headers
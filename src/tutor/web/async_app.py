@@ -0,0 +1,128 @@
+"""ASGI version of the dialogue practice web app.
+
+This serves the same routes as tutor.web.app, but with Quart so that handlers
+await the LLM calls instead of holding a worker for the whole OpenAI latency.
+A single process can then serve many concurrent dialogue sessions. Session
+store calls, which may hit SQLite and count tokens, run on worker threads so they
+don't block the event loop either.
+"""
+
+import asyncio
+import pathlib
+from typing import Optional
+
+from quart import Quart, Response, abort, jsonify, request
+from quart_cors import cors
+
+from .app import (
+    DEFAULT_SCENARIO,
+    PROMETHEUS_CONTENT_TYPE,
+    SSE_HEADERS,
+    get_conversation_review_async,
+    get_dialogue_response_async,
+    get_scenario_opener_async,
+    record_turn_async,
+    start_session,
+    stream_dialogue_response_async,
+)
+from ..llm.metrics import render_prometheus
+from .assets import INDEX, StaticAssets
+from .scenarios import get_scenario_names
+from .sessions import SessionStore
+
+
+def create_async_app(sessions: Optional[SessionStore] = None) -> Quart:
+    if sessions is None:
+        sessions = SessionStore()
+
+    # Get the directory containing web assets
+    web_dir = pathlib.Path(__file__).parent
+    static_dir = web_dir / "static"
+
+    # Static files are read and compressed once, then served from memory
+    assets = StaticAssets(static_dir)
+
+    app = Quart(__name__, static_folder=None)
+    app = cors(app)
+
+    @app.route("/", defaults={"filename": INDEX})
+    @app.route("/<path:filename>")
+    async def serve_static(filename):
+        result = assets.response(
+            filename,
+            request.headers.get("Accept-Encoding", ""),
+            request.headers.get("If-None-Match", ""),
+        )
+        if result is None:
+            abort(404)
+        body, status, headers = result
+        return Response(body, status=status, headers=headers)
+
+    @app.route("/api/scenarios")
+    async def list_scenarios():
+        """List the built-in scenarios."""
+        return jsonify(get_scenario_names())
+
+    @app.route("/metrics")
+    async def metrics():
+        """Expose LLM call metrics in the Prometheus text format."""
+        return Response(render_prometheus(), mimetype=PROMETHEUS_CONTENT_TYPE)
+
+    @app.route("/api/start-dialogue", methods=["POST"])
+    async def start_dialogue():
+        """Start a new dialogue simulation."""
+        data = await request.get_json()
+        scenario = data.get("scenario", DEFAULT_SCENARIO)
+        opener = await get_scenario_opener_async(scenario)
+        return jsonify(
+            await asyncio.to_thread(start_session, sessions, scenario, opener)
+        )
+
+    @app.route("/api/respond", methods=["POST"])
+    async def respond_to_dialogue():
+        """Process user's response and continue the dialogue."""
+        data = await request.get_json()
+        session = await asyncio.to_thread(sessions.get, data.get("session_id"))
+        if session is None:
+            return jsonify({"error": "Unknown session"}), 404
+        user_response = data.get("response", "")
+        response = await get_dialogue_response_async(session, user_response)
+        await record_turn_async(sessions, session, user_response, response)
+        return jsonify(response.model_dump())
+
+    @app.route("/api/respond-stream", methods=["POST"])
+    async def respond_to_dialogue_stream():
+        """Continue the dialogue, streaming the next line as server-sent events."""
+        data = await request.get_json()
+        session = await asyncio.to_thread(sessions.get, data.get("session_id"))
+        if session is None:
+            return jsonify({"error": "Unknown session"}), 404
+        user_response = data.get("response", "")
+        return Response(
+            stream_dialogue_response_async(
+                session,
+                user_response,
+                lambda response: record_turn_async(
+                    sessions, session, user_response, response
+                ),
+            ),
+            mimetype="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+
+    @app.route("/api/review", methods=["POST"])
+    async def review_conversation():
+        """Generate a comprehensive review of the conversation.
+
+        Returns the review stored by the background reviews, merged with a
+        review of any turns they haven't reached yet.
+        """
+        data = await request.get_json()
+        session = await asyncio.to_thread(sessions.get, data.get("session_id"))
+        if session is None:
+            return jsonify({"error": "Unknown session"}), 404
+
+        review = await get_conversation_review_async(sessions, session)
+        return jsonify(review.model_dump())
+
+    return app
@@ -0,0 +1,114 @@
+"""Context window management for long dialogue sessions.
+
+Once the verbatim part of a conversation grows past a token budget, all but the
+most recent turns are folded into a running summary that replaces them in the
+prompt. Folding runs in a background thread after a turn is recorded, so it
+doesn't add to the latency of any turn, and folds many turns at once, so the
+prompt prefix stays the same (and cacheable) between folds.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set
+
+from openai import OpenAI
+
+from ..cli_global_state import get_model
+from ..llm.metrics import track_llm_call
+from .sessions import DialogueSession, SessionStore, format_turn
+
+# Fold older turns into the summary once the verbatim messages exceed this
+DIALOGUE_CONTEXT_TOKENS = 1500
+# Number of most recent messages always kept verbatim
+DIALOGUE_RECENT_MESSAGES = 8
+
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+# IDs of sessions with a summary being generated
+_summarizing: Set[str] = set()
+_summarizing_lock = threading.Lock()
+
+
+def needs_summary(session: DialogueSession) -> bool:
+    """Check whether a session's verbatim messages have outgrown the token budget."""
+    start = session.summarized_messages
+    return (
+        len(session.messages) - start > DIALOGUE_RECENT_MESSAGES
+        and sum(session.message_tokens[start:]) > DIALOGUE_CONTEXT_TOKENS
+    )
+
+
+def _get_summary_messages(session: DialogueSession, end: int) -> List[dict]:
+    """Build the chat messages for folding turns up to end into the summary."""
+    turns = "\n".join(
+        format_turn(**turn)
+        for turn in session.history[session.summarized_messages : end]
+    )
+    previous_summary = (
+        f"Summary so far:\n{session.summary}\n\n" if session.summary else ""
+    )
+
+    return [
+        {
+            "role": "system",
+            "content": "You summarize Chinese conversation practice sessions for the tutor continuing them. In a few sentences of English, keep the topics, facts and decisions that later turns may refer to.",
+        },
+        {
+            "role": "user",
+            "content": f"Scenario: {session.scenario}\n\n{previous_summary}New turns:\n{turns}\n\nWrite the updated summary.",
+        },
+    ]
+
+
+def summarize_session(sessions: SessionStore, session_id: str) -> None:
+    """Fold all but the most recent messages of a session into its summary.
+
+    The session is re-fetched by ID, and only its summary is written back, so
+    turns recorded while the summary was being generated are kept.
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return
+    with sessions.lock(session_id):
+        start = session.summarized_messages
+        end = len(session.messages) - DIALOGUE_RECENT_MESSAGES
+        if end <= start:
+            return
+        messages = _get_summary_messages(session, end)
+
+    try:
+        model = get_model()
+        with track_llm_call("summary", model) as call:
+            completion = OpenAI().chat.completions.create(
+                model=model, messages=messages
+            )
+            call.record_usage(completion.usage)
+        summary = completion.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Error summarizing dialogue: {e}")
+        return
+
+    with sessions.update(session_id) as session:
+        # Skip the summary if the session was dropped or summarized meanwhile
+        if session is not None and session.summarized_messages == start:
+            session.summary = summary
+            session.summarized_messages = end
+
+
+def maybe_summarize(sessions: SessionStore, session: DialogueSession) -> None:
+    """Start summarizing a session in the background if its prompt has grown too large."""
+    if not needs_summary(session):
+        return
+
+    with _summarizing_lock:
+        if session.session_id in _summarizing:
+            return
+        _summarizing.add(session.session_id)
+
+    def run() -> None:
+        try:
+            summarize_session(sessions, session.session_id)
+        finally:
+            with _summarizing_lock:
+                _summarizing.discard(session.session_id)
+
+    _summary_executor.submit(run)
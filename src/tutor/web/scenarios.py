@@ -0,0 +1,76 @@
+"""Registry of dialogue practice scenarios.
+
+The built-in scenarios are loaded once from scenarios.yaml. Any other scenario
+the learner asks for gets an opener generated by the LLM, which is cached here
+so that each scenario is only generated once per server.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from pydantic import BaseModel, Field
+
+SCENARIOS_PATH = Path(__file__).parent / "scenarios.yaml"
+
+DEFAULT_SCENARIO = "restaurant"
+
+# Longest scenario name that will be sent to the LLM
+MAX_SCENARIO_LENGTH = 100
+# Number of generated openers to keep
+MAX_GENERATED_SCENARIOS = 256
+
+
+class ScenarioOpener(BaseModel):
+    """The situation and opening line for a dialogue scenario"""
+
+    situation_zh: str = Field(description="The situation, in Chinese")
+    situation_en: str = Field(description="English translation of the situation")
+    initial_line_zh: str = Field(description="The tutor's opening line in Chinese")
+    initial_line_pinyin: str = Field(description="Pinyin for the opening line")
+    initial_line_en: str = Field(description="English translation of the opening line")
+
+
+def _load_scenarios(path: Path) -> Dict[str, Dict[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return {
+            name: ScenarioOpener(**opener).model_dump()
+            for name, opener in yaml.safe_load(f).items()
+        }
+
+
+SCENARIOS: Dict[str, Dict[str, str]] = _load_scenarios(SCENARIOS_PATH)
+
+_generated_openers: OrderedDict[str, Dict[str, str]] = OrderedDict()
+_generated_openers_lock = threading.Lock()
+
+
+def get_scenario_names() -> List[str]:
+    """Get the names of the built-in scenarios."""
+    return list(SCENARIOS)
+
+
+def can_generate_scenario(scenario: str) -> bool:
+    """Check whether an opener may be generated for a scenario not built in."""
+    return bool(scenario.strip()) and len(scenario) <= MAX_SCENARIO_LENGTH
+
+
+def get_generated_opener(scenario: str) -> Optional[Dict[str, str]]:
+    """Get the cached generated opener for a scenario, if there is one."""
+    with _generated_openers_lock:
+        opener = _generated_openers.get(scenario)
+        if opener is not None:
+            _generated_openers.move_to_end(scenario)
+        return opener
+
+
+def cache_generated_opener(scenario: str, opener: ScenarioOpener) -> Dict[str, str]:
+    """Cache a generated opener for a scenario, dropping the least recently used."""
+    with _generated_openers_lock:
+        _generated_openers[scenario] = opener.model_dump()
+        _generated_openers.move_to_end(scenario)
+        while len(_generated_openers) > MAX_GENERATED_SCENARIOS:
+            _generated_openers.popitem(last=False)
+        return _generated_openers[scenario]
@@ -0,0 +1,198 @@
+"""Server-side storage for dialogue practice sessions.
+
+The client only sends a session ID and the new user turn; the server keeps the
+conversation so far. Sessions live in an in-memory LRU, and can optionally be
+written through to SQLite so they survive a server restart or LRU eviction.
+
+A session is changed by the request thread recording a turn and by background
+summaries and reviews. Each holds the session's lock from the store while it
+changes it, and background work re-fetches the session by ID rather than keeping
+the object it started with, which may have been evicted and reloaded since.
+"""
+
+import sqlite3
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ..llm.tokens import count_tokens
+
+DEFAULT_MAX_SESSIONS = 1000
+
+
+def format_turn(role: str, content: str) -> str:
+    """Format a single dialogue turn for a prompt."""
+    return f"{'Tutor' if role == 'tutor' else 'User'}: {content}"
+
+
+class DialogueSession(BaseModel):
+    """A dialogue practice session and its transcript."""
+
+    session_id: str = Field(description="Unique ID the client uses for the session")
+    scenario: str = Field(description="The scenario being practiced")
+    history: List[Dict[str, str]] = Field(
+        default_factory=list, description="The turns so far, as role/content dicts"
+    )
+    transcript: str = Field(
+        default="", description="The turns so far, formatted for a prompt"
+    )
+    messages: List[Dict[str, str]] = Field(
+        default_factory=list,
+        description="The turns so far, as chat messages for the dialogue prompt",
+    )
+    message_tokens: List[int] = Field(
+        default_factory=list, description="Token count of each chat message"
+    )
+    summary: str = Field(
+        default="", description="Running summary of turns folded out of the prompt"
+    )
+    summarized_messages: int = Field(
+        default=0, description="Number of leading messages covered by the summary"
+    )
+    reviewed_length: int = Field(
+        default=0, description="Length of the transcript that has been reviewed"
+    )
+    grammar_feedback: List[Dict[str, str]] = Field(
+        default_factory=list, description="Grammar feedback from earlier reviews"
+    )
+    vocabulary_review: List[Dict[str, str]] = Field(
+        default_factory=list, description="Vocabulary from earlier reviews"
+    )
+
+    @property
+    def recent_messages(self) -> List[Dict[str, str]]:
+        """The chat messages that haven't been folded into the summary."""
+        return self.messages[self.summarized_messages :]
+
+    @property
+    def unreviewed_transcript(self) -> str:
+        """The part of the transcript added since the last review."""
+        return self.transcript[self.reviewed_length :].lstrip("\n")
+
+    def add_turn(self, role: str, content: str, message: Optional[str] = None) -> None:
+        """Append a turn, extending the transcript rather than rebuilding it.
+
+        Args:
+            role: "tutor" or "user"
+            content: The text of the turn
+            message: The chat message content for the turn, if it differs from
+                the text (e.g. the tutor's full JSON response)
+        """
+        if message is None:
+            message = content
+        self.history.append({"role": role, "content": content})
+        self.messages.append(
+            {"role": "assistant" if role == "tutor" else "user", "content": message}
+        )
+        self.message_tokens.append(count_tokens(message))
+        line = format_turn(role, content)
+        self.transcript = f"{self.transcript}\n{line}" if self.transcript else line
+
+
+class SessionStore:
+    """Dialogue sessions kept in an in-memory LRU, optionally backed by SQLite.
+
+    Without a database, the least recently used sessions are dropped once more
+    than max_sessions are held. With a database, every saved session is written
+    through to it, and sessions missing from memory are loaded back on demand.
+    """
+
+    def __init__(
+        self, max_sessions: int = DEFAULT_MAX_SESSIONS, db_path: Optional[str] = None
+    ):
+        self._max_sessions = max_sessions
+        self._sessions: OrderedDict[str, DialogueSession] = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-session locks, kept while anyone holds or waits for them
+        self._session_locks: weakref.WeakValueDictionary[str, threading.RLock] = (
+            weakref.WeakValueDictionary()
+        )
+        self._db: Optional[sqlite3.Connection] = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS dialogue_sessions "
+                "(session_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, session: DialogueSession) -> None:
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self._max_sessions:
+            self._sessions.popitem(last=False)
+
+    def create(self, scenario: str) -> DialogueSession:
+        """Start a new, empty session for a scenario."""
+        session = DialogueSession(session_id=uuid.uuid4().hex, scenario=scenario)
+        self.save(session)
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[DialogueSession]:
+        """Get a session by ID, or None if it doesn't exist or has been evicted."""
+        if not session_id:
+            return None
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT data FROM dialogue_sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            session = DialogueSession.model_validate_json(row[0])
+            self._remember(session)
+            return session
+
+    def lock(self, session_id: str) -> threading.RLock:
+        """Get the lock to hold while reading or changing a session.
+
+        The lock belongs to the session ID, so it is shared by every copy of the
+        session, including one reloaded after eviction.
+        """
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+            if lock is None:
+                lock = threading.RLock()
+                self._session_locks[session_id] = lock
+            return lock
+
+    @contextmanager
+    def update(self, session_id: str) -> Iterator[Optional[DialogueSession]]:
+        """Lock a session and get its current copy to change, saving it afterwards.
+
+        Yields None, and saves nothing, if the session doesn't exist or has been
+        evicted.
+        """
+        with self.lock(session_id):
+            session = self.get(session_id)
+            yield session
+            if session is not None:
+                self.save(session)
+
+    def save(self, session: DialogueSession) -> None:
+        """Store a new or updated session."""
+        with self.lock(session.session_id):
+            data = session.model_dump_json() if self._db is not None else None
+            with self._lock:
+                self._remember(session)
+                if self._db is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO dialogue_sessions (session_id, data) "
+                        "VALUES (?, ?)",
+                        (session.session_id, data),
+                    )
+                    self._db.commit()
@@ -247,6 +247,16 @@ function DialogueApp() {
     const [dialogue, setDialogue] = React.useState([]);
     const [userInput, setUserInput] = React.useState('');
     const [scenario, setScenario] = React.useState('restaurant');
+    const [sessionId, setSessionId] = React.useState(null);
+    const [scenarios, setScenarios] = React.useState(['restaurant', 'shopping', 'travel', 'work']);
+    const [customScenario, setCustomScenario] = React.useState('');
+
+    React.useEffect(() => {
+        fetch('http://localhost:5001/api/scenarios')
+            .then(response => response.json())
+            .then(setScenarios)
+            .catch(error => console.error('Error loading scenarios:', error));
+    }, []);
     const [isStarted, setIsStarted] = React.useState(false);
     const [isLoading, setIsLoading] = React.useState(false);
     const [showPinyin, setShowPinyin] = React.useState(false);
@@ -255,6 +265,18 @@ function DialogueApp() {
 
     const [isReviewing, setIsReviewing] = React.useState(false);
     const [review, setReview] = React.useState(null);
+    const [error, setError] = React.useState(null);
+
+    // The server forgets sessions when it restarts or evicts them, so go back
+    // to the scenario selector to start a new one
+    const restartExpiredDialogue = () => {
+        setIsStarted(false);
+        setSessionId(null);
+        setDialogue([]);
+        setReview(null);
+        setIsReviewing(false);
+        setError('This conversation has expired. Please start a new dialogue.');
+    };
 
     const fetchReview = async () => {
         setIsLoading(true);
@@ -264,18 +286,18 @@ function DialogueApp() {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({
-                    history: dialogue.map(d => ({
-                        role: d.role,
-                        content: d.content_zh,
-                    })),
-                    scenario: scenario,
-                }),
+                body: JSON.stringify({ session_id: sessionId }),
             });
+            if (response.status === 404) {
+                restartExpiredDialogue();
+                return;
+            }
+            if (!response.ok) throw new Error(`Review failed: ${response.status}`);
             const data = await response.json();
             setReview(data);
         } catch (error) {
             console.error('Error getting review:', error);
+            setError('Could not get a review. Please try again.');
         } finally {
             setIsLoading(false);
         }
@@ -290,9 +312,14 @@ function DialogueApp() {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ scenario }),
+                body: JSON.stringify({
+                    // Scenarios that aren't built in get an opener generated for them
+                    scenario: scenario === 'custom' ? customScenario.trim() : scenario,
+                }),
             });
+            if (!response.ok) throw new Error(`Start failed: ${response.status}`);
             const data = await response.json();
+            setSessionId(data.session_id);
             setDialogue([{
                 role: 'tutor',
                 situation_zh: data.situation_zh,
@@ -302,57 +329,106 @@ function DialogueApp() {
                 content_en: data.initial_line_en,
             }]);
             setIsStarted(true);
+            setError(null);
             // Clear any existing review when starting new dialogue
             setReview(null);
             setIsReviewing(false);
         } catch (error) {
             console.error('Error starting dialogue:', error);
+            setError('Could not start the dialogue. Please try again.');
         } finally {
             setIsLoading(false);
         }
     };
 
+    // Read a server-sent event stream, calling onEvent with each parsed event
+    const readEventStream = async (response, onEvent) => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            for (const event of events) {
+                const data = event
+                    .split('\n')
+                    .filter(line => line.startsWith('data: '))
+                    .map(line => line.slice('data: '.length))
+                    .join('\n');
+                if (data) onEvent(JSON.parse(data));
+            }
+        }
+    };
+
     const sendResponse = async () => {
         if (!userInput.trim() || isLoading) return;
 
         setIsLoading(true);
+        setError(null);
+        const sentInput = userInput;
         try {
-            const newDialogue = [...dialogue, {
+            // Show the user's turn and an empty tutor line straight away, then
+            // fill in the tutor line as it is generated
+            setDialogue([...dialogue, {
                 role: 'user',
                 content_zh: userInput,
-            }];
+            }, {
+                role: 'tutor',
+                content_zh: '',
+            }]);
+            setUserInput('');
+            // Clear cached review since conversation changed
+            setReview(null);
 
-            const response = await fetch('http://localhost:5001/api/respond', {
+            const updateTutorLine = (update) => setDialogue(current => [
+                ...current.slice(0, -1),
+                { ...current[current.length - 1], ...update(current[current.length - 1]) },
+            ]);
+
+            const response = await fetch('http://localhost:5001/api/respond-stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
+                    session_id: sessionId,
                     response: userInput,
-                    history: dialogue.map(d => ({
-                        role: d.role,
-                        content: d.content_zh,
-                    })),
-                    scenario: scenario,
-
                 }),
             });
-            const data = await response.json();
 
-            // Continue with dialogue
-            newDialogue.push({
-                role: 'tutor',
-                content_zh: data.next_line_zh,
-                content_pinyin: data.next_line_pinyin,
-                content_en: data.next_line_en,
+            if (response.status === 404) {
+                restartExpiredDialogue();
+                return;
+            }
+            const contentType = response.headers.get('Content-Type') || '';
+            if (!response.ok || !contentType.startsWith('text/event-stream')) {
+                throw new Error(`Unexpected response: ${response.status} ${contentType}`);
+            }
+
+            await readEventStream(response, (event) => {
+                if (event.type === 'delta') {
+                    updateTutorLine(line => ({ content_zh: line.content_zh + event.text }));
+                } else if (event.type === 'field' && event.field === 'next_line_pinyin') {
+                    updateTutorLine(() => ({ content_pinyin: event.value }));
+                } else if (event.type === 'field' && event.field === 'next_line_en') {
+                    updateTutorLine(() => ({ content_en: event.value }));
+                } else if (event.type === 'done') {
+                    updateTutorLine(() => ({
+                        content_zh: event.response.next_line_zh,
+                        content_pinyin: event.response.next_line_pinyin,
+                        content_en: event.response.next_line_en,
+                    }));
+                }
             });
-
-            setDialogue(newDialogue);
-            setUserInput('');
-            // Clear cached review since conversation changed
-            setReview(null);
         } catch (error) {
             console.error('Error sending response:', error);
+            // Take back the turn so it can be sent again
+            setDialogue(current => current.slice(0, -2));
+            setUserInput(sentInput);
+            setError('Could not send your response. Please try again.');
         } finally {
             setIsLoading(false);
         }
@@ -361,6 +437,7 @@ function DialogueApp() {
     return (
         <div>
             <h1>Chinese Dialogue Practice</h1>
+            {error && <div className="error-message">{error}</div>}
             {!isStarted ? (
                 <div className="scenario-selector">
                     <p className="welcome-text">
@@ -390,14 +467,26 @@ function DialogueApp() {
                         onChange={(e) => setScenario(e.target.value)}
                         disabled={isLoading}
                     >
-                        <option value="restaurant">Restaurant</option>
-                        <option value="shopping">Shopping</option>
-                        <option value="travel">Travel</option>
-                        <option value="work">Work</option>
+                        {scenarios.map(name => (
+                            <option key={name} value={name}>
+                                {name.charAt(0).toUpperCase() + name.slice(1)}
+                            </option>
+                        ))}
+                        <option value="custom">Something else...</option>
                     </select>
+                    {scenario === 'custom' && (
+                        <input
+                            type="text"
+                            value={customScenario}
+                            onChange={(e) => setCustomScenario(e.target.value)}
+                            placeholder="e.g. at the doctor's"
+                            maxLength={100}
+                            disabled={isLoading}
+                        />
+                    )}
                     <button
                         onClick={startDialogue}
-                        disabled={isLoading}
+                        disabled={isLoading || (scenario === 'custom' && !customScenario.trim())}
                     >
                         {isLoading ? 'Starting...' : 'Start Dialogue'}
                     </button>
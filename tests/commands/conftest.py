@@ -0,0 +1,22 @@
+import pytest
+
+from tutor.commands.setup_anki import NoteTypeManager
+from tutor.utils.anki import ANKI_CONNECT_URL_ENV, AnkiConnectClient
+from tutor.utils.fake_anki import FakeAnkiConnect
+
+
+@pytest.fixture
+def fake_anki(monkeypatch):
+    """An empty FakeAnkiConnect, used by every AnkiConnectClient without an address."""
+    with FakeAnkiConnect() as fake:
+        monkeypatch.setenv(ANKI_CONNECT_URL_ENV, fake.address)
+        yield fake
+
+
+@pytest.fixture
+def anki(fake_anki):
+    """A FakeAnkiConnect with the Mandarin note type and a "Chinese" deck."""
+    client = AnkiConnectClient(fake_anki.address)
+    NoteTypeManager(client).create_note_type("mandarin")
+    client.add_deck("Chinese")
+    return fake_anki
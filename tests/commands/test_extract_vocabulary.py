@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from tutor.commands.extract_vocabulary import _extract_vocabulary_impl
+from tutor.utils.frequency import (
+    build_frequency_index,
+    get_frequency_index,
+    reset_frequency_indexes,
+)
+
+DECK = "Chinese"
+TEXT = """\
+我喜欢学习中文。學習中文很有意思。
+
+老师说，学习语言需要耐心。我们每天学习。
+耐心很重要。松弛感
+"""
+
+
+@pytest.fixture
+def anki(anki):
+    anki.add_note(DECK, "chinese-tutor-mandarin", {"Chinese": "中文"})
+    return anki
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    word_list = tmp_path / "words.txt"
+    word_list.write_text(
+        "我\n我们\n说\n很\n中文\n学习\n老师\n喜欢\n每天\n重要\n需要\n语言\n耐心\n有意思\n",
+        "utf-8",
+    )
+    with patch("tutor.utils.frequency.get_config_dir", return_value=tmp_path):
+        build_frequency_index(word_list, "mandarin")
+        index = get_frequency_index("mandarin")
+        yield lambda text, start: index.longest_prefix(text, start)[0]
+    reset_frequency_indexes()
+
+
+def test_extract_ranks_unknown_words(anki, matcher):
+    with patch(
+        "tutor.commands.extract_vocabulary.generate_flashcards"
+    ) as mock_generate:
+        words = _extract_vocabulary_impl(
+            DECK, TEXT.splitlines(True), "mandarin", matcher, top=3, dry_run=True
+        )
+
+    mock_generate.assert_not_called()
+    # 学习 (4 times, traditional included) then 耐心 (twice); 中文 is in the deck
+    assert words == ["学习", "耐心", "我们"]
+
+
+def test_extract_generates_in_batches(anki, matcher):
+    with (
+        patch(
+            "tutor.commands.extract_vocabulary.generate_flashcards", return_value=[]
+        ) as mock_generate,
+        patch(
+            "tutor.commands.extract_vocabulary.maybe_add_flashcards_to_deck",
+            return_value=False,
+        ),
+        patch(
+            "tutor.llm.prompts.get_config",
+            return_value=SimpleNamespace(learner_level="intermediate"),
+        ),
+    ):
+        words = _extract_vocabulary_impl(
+            DECK,
+            iter(TEXT.splitlines(True)),
+            "mandarin",
+            matcher,
+            top=5,
+            batch_size=2,
+            max_rank=10,
+        )
+
+    # 耐心 and 有意思 are rarer than rank 10
+    assert words == ["学习", "我们", "老师", "喜欢", "每天"]
+    prompts = [call.args[0] for call in mock_generate.call_args_list]
+    assert len(prompts) == 3
+    assert "学习, 我们." in prompts[0]
+    assert "每天." in prompts[2]
@@ -0,0 +1,60 @@
+from unittest.mock import patch
+
+import pytest
+
+from tutor.commands.find_duplicates import _find_duplicates_impl
+from tutor.commands.generate_flashcard_from_word import (
+    _generate_flashcard_from_word_impl,
+)
+
+DECK = "Chinese"
+MODEL = "chinese-tutor-mandarin"
+
+
+@pytest.fixture
+def anki(anki):
+    anki.add_note(DECK, MODEL, {"Chinese": "学习", "English": "to study"})
+    anki.add_note(DECK, MODEL, {"Chinese": "學習", "English": "to study"})
+    anki.add_note(DECK, MODEL, {"Chinese": "你好", "English": "hello"})
+    return anki
+
+
+def test_find_duplicates_lists_variants(anki):
+    result = _find_duplicates_impl(DECK, 0.5)
+
+    lines = result.splitlines()
+    assert lines[0] == f"Near-duplicate cards in deck '{DECK}':"
+    assert len(lines) == 2
+    assert "[variant, 1.00]" in lines[1]
+
+
+def test_find_duplicates_none_found(anki):
+    with patch(
+        "tutor.commands.find_duplicates.AnkiConnectClient.find_notes",
+        return_value=[],
+    ):
+        assert _find_duplicates_impl(DECK, 0.5).startswith("No near-duplicate")
+
+
+def test_generate_warns_about_similar_cards(anki, capsys):
+    with (
+        patch(
+            "tutor.commands.generate_flashcard_from_word.generate_flashcards",
+            return_value=[],
+        ),
+        patch(
+            "tutor.commands.generate_flashcard_from_word.get_generate_flashcard_from_word_prompt",
+            return_value="prompt",
+        ),
+        patch(
+            "tutor.commands.generate_flashcard_from_word.maybe_add_flashcards_to_targets",
+            return_value=False,
+        ),
+    ):
+        _generate_flashcard_from_word_impl(
+            DECK, ("学习者",), "mandarin", check_similar=True
+        )
+
+    out = capsys.readouterr().out
+    assert "Similar cards for '学习者' in the deck:" in out
+    assert "学习 - to study [overlap]" in out
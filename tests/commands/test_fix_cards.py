@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from tutor.commands.fix_cards import _fix_cards_impl, fix_cards
+from tutor.commands.setup_anki import NoteTypeManager
+from tutor.utils.anki import AnkiConnectClient
+from tutor.llm.models import CantoneseFlashcard, MandarinFlashcard
+from tutor.utils.romanization import (
+    build_pronunciation_dictionary,
+    reset_pronunciation_dictionaries,
+)
+
+DECK = "Chinese"
+
+
+@pytest.fixture
+def pronunciation_dictionary(tmp_path):
+    dict_file = tmp_path / "cedict.u8"
+    dict_file.write_text(
+        "學習 学习 [xue2 xi2] /to study/\n教育 教育 [jiao4 yu4] /education/\n", "utf-8"
+    )
+    with patch("tutor.utils.romanization.get_config_dir", return_value=tmp_path):
+        build_pronunciation_dictionary([dict_file], "mandarin")
+        yield
+    reset_pronunciation_dictionaries()
+
+
+def _add_card(anki, word, pinyin, deck=DECK):
+    return anki.add_note(
+        deck,
+        "chinese-tutor-mandarin",
+        {
+            "Chinese": word,
+            "Pinyin": pinyin,
+            "English": "to study",
+            "Sample Usage": f"我{word}中文。",
+            "Sample Usage (English)": "I study Chinese.",
+            "Sample Usage (Audio)": "[sound:sample.wav]",
+            "Word (Audio)": "[sound:word.wav]",
+            "Related Words": "• 教育 () - education [field]",
+        },
+    )
+
+
+def test_fix_cards_fills_pronunciation_without_llm(anki, pronunciation_dictionary):
+    note_id = _add_card(anki, "学习", "")
+
+    with (
+        patch("tutor.commands.fix_cards.generate_flashcards") as mock_generate,
+        patch("tutor.commands.fix_cards.text_to_speech", return_value="word.wav"),
+    ):
+        summary = _fix_cards_impl(DECK)
+
+    mock_generate.assert_not_called()
+    fields = anki.notes[note_id]["fields"]
+    assert fields["Pinyin"] == "xué xí"
+    assert fields["Related Words"] == "• 教育 (jiào yù) - education [field]"
+    assert "Pronunciations fixed without the LLM: 1" in summary
+
+
+def test_fix_cards_checks_pronunciation(anki, pronunciation_dictionary):
+    _add_card(anki, "学习", "xué xì")
+
+    with patch("tutor.commands.fix_cards.generate_flashcards") as mock_generate:
+        summary = _fix_cards_impl(DECK, dry_run=True, check_pronunciation=True)
+
+    mock_generate.assert_not_called()
+    assert "Pronunciation mismatches: 1" in summary
+
+
+def test_fix_cards_generates_once_for_several_decks(anki):
+    # Missing English, so the card has to be regenerated in both decks
+    note_ids = [_add_card(anki, "学习", "xué xí", deck) for deck in (DECK, "Work")]
+    for note_id in note_ids:
+        anki.notes[note_id]["fields"]["English"] = ""
+    new_card = MandarinFlashcard(
+        word="学习",
+        pinyin="xué xí",
+        english="to study",
+        sample_usage="我们学习中文。",
+        sample_usage_english="We study Chinese.",
+    )
+
+    with (
+        patch(
+            "tutor.commands.fix_cards.generate_flashcards", return_value=[new_card]
+        ) as mock_generate,
+        patch(
+            "tutor.commands.fix_cards.text_to_speech", return_value="sample.wav"
+        ) as mock_tts,
+        patch(
+            "tutor.llm.prompts.get_config",
+            return_value=SimpleNamespace(learner_level="intermediate"),
+        ),
+    ):
+        result = CliRunner().invoke(fix_cards, ["--deck", DECK, "--deck", "Work"])
+
+    assert result.exit_code == 0, result.output
+    mock_generate.assert_called_once()
+    # The new sample usage is synthesized once for both decks
+    mock_tts.assert_called_once_with("我们学习中文。", "mandarin")
+    for note_id in note_ids:
+        assert anki.notes[note_id]["fields"]["English"] == "to study"
+    assert f"=== {DECK} ===" in result.output
+    assert "=== Work ===" in result.output
+    # Progress from the decks fixed concurrently is labelled with the deck
+    assert f"[{DECK}] Processing card 1/1: 学习" in result.output
+    assert "[Work] Processing card 1/1: 学习" in result.output
+
+
+def test_fix_cards_regenerates_in_the_card_language(anki):
+    NoteTypeManager(AnkiConnectClient(anki.address)).create_note_type("cantonese")
+    note_id = anki.add_note(
+        DECK,
+        "chinese-tutor-cantonese",
+        {"Chinese": "學習", "Jyutping": "hok6 zaap6", "English": ""},
+    )
+    new_card = CantoneseFlashcard(
+        word="學習",
+        jyutping="hok6 zaap6",
+        english="to study",
+        sample_usage="我學習中文。",
+        sample_usage_english="I study Chinese.",
+    )
+
+    with (
+        patch(
+            "tutor.commands.fix_cards.generate_flashcards", return_value=[new_card]
+        ) as mock_generate,
+        patch("tutor.commands.fix_cards.text_to_speech", return_value="audio.wav"),
+        patch(
+            "tutor.llm.prompts.get_config",
+            return_value=SimpleNamespace(learner_level="intermediate"),
+        ),
+    ):
+        _fix_cards_impl(DECK)
+
+    prompt, language = mock_generate.call_args.args
+    assert language == "cantonese"
+    assert "Generate a cantonese flashcard for the word/phrase 學習" in prompt
+    assert anki.notes[note_id]["fields"]["English"] == "to study"
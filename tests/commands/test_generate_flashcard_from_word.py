@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+
+from tutor.commands.generate_flashcard_from_word import (
+    _generate_flashcard_from_word_impl,
+)
+from tutor.llm.models import MandarinFlashcard
+from tutor.utils.anki import AnkiConnectClient
+from tutor.utils.anki_targets import AnkiTarget
+
+MODEL = "chinese-tutor-mandarin"
+
+
+@pytest.fixture
+def anki(anki):
+    client = AnkiConnectClient(anki.address)
+    client.add_deck("HSK")
+    client.add_deck("Work")
+    anki.add_note("HSK", MODEL, {"Chinese": "你好", "English": "hello"})
+    return anki
+
+
+def _flashcard(prompt, language="mandarin", **_):
+    word = "你好" if "你好" in prompt else "谢谢"
+    return [
+        MandarinFlashcard(
+            word=word,
+            pinyin="",
+            english="",
+            sample_usage=f"{word}。",
+            sample_usage_english="",
+        )
+    ]
+
+
+def test_generate_adds_to_each_deck_missing_the_word(anki, capsys):
+    with (
+        patch(
+            "tutor.commands.generate_flashcard_from_word.generate_flashcards",
+            side_effect=_flashcard,
+        ) as mock_generate,
+        patch(
+            "tutor.commands.generate_flashcard_from_word.get_generate_flashcard_from_word_prompt",
+            side_effect=lambda word, *args: word,
+        ),
+        patch("tutor.llm_flashcards.get_skip_confirm", return_value=True),
+        patch("tutor.llm_flashcards.text_to_speech_async") as mock_tts,
+        patch("tutor.llm_flashcards.cancel_text_to_speech"),
+    ):
+        mock_tts.return_value.result.return_value = "audio.wav"
+        _generate_flashcard_from_word_impl(
+            "HSK",
+            ("你好", "谢谢"),
+            "mandarin",
+            targets=[AnkiTarget("HSK"), AnkiTarget("Work")],
+        )
+
+    # Each word is generated once, however many decks it's added to
+    assert mock_generate.call_count == 2
+    decks = sorted(
+        (note["deckName"], note["fields"]["Chinese"]) for note in anki.notes.values()
+    )
+    assert decks == [
+        ("HSK", "你好"),
+        ("HSK", "谢谢"),
+        ("Work", "你好"),
+        ("Work", "谢谢"),
+    ]
+    assert "Card for '你好' exists already in HSK" in capsys.readouterr().out
+
+
+def test_generate_reports_words_that_failed(anki, capsys):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    throttled = openai.RateLimitError(
+        "Rate limited", response=httpx.Response(429, request=request), body=None
+    )
+
+    def generate(prompt, language="mandarin", **_):
+        if "谢谢" in prompt:
+            raise throttled
+        return _flashcard(prompt, language)
+
+    with (
+        patch(
+            "tutor.commands.generate_flashcard_from_word.generate_flashcards",
+            side_effect=generate,
+        ),
+        patch(
+            "tutor.commands.generate_flashcard_from_word.get_generate_flashcard_from_word_prompt",
+            side_effect=lambda word, *args: word,
+        ),
+        patch("tutor.llm_flashcards.get_skip_confirm", return_value=True),
+        patch("tutor.llm_flashcards.text_to_speech_async") as mock_tts,
+        patch("tutor.llm_flashcards.cancel_text_to_speech"),
+    ):
+        mock_tts.return_value.result.return_value = "audio.wav"
+        _generate_flashcard_from_word_impl(
+            "Work", ("谢谢", "你好"), "mandarin", targets=[AnkiTarget("Work")]
+        )
+
+    # The other words are still added, and the failed ones listed for a rerun
+    words = [note["fields"]["Chinese"] for note in anki.notes.values()]
+    assert words.count("你好") == 2
+    assert "谢谢" not in words
+    assert "run: ct g 谢谢" in capsys.readouterr().out
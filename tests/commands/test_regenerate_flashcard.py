@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import openai
+
+from tutor.commands.regenerate_flashcard import _regenerate_flashcard_impl
+
+DECK = "Chinese"
+MODEL = "chinese-tutor-mandarin"
+
+
+def test_regenerate_reports_a_failed_generation(anki, capsys):
+    note_id = anki.add_note(DECK, MODEL, {"Chinese": "你好", "English": "hello"})
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    throttled = openai.RateLimitError(
+        "Rate limited", response=httpx.Response(429, request=request), body=None
+    )
+
+    with (
+        patch(
+            "tutor.llm_flashcards.get_config",
+            return_value=SimpleNamespace(default_deck=DECK),
+        ),
+        patch(
+            "tutor.llm.prompts.get_config",
+            return_value=SimpleNamespace(learner_level="intermediate"),
+        ),
+        patch(
+            "tutor.commands.regenerate_flashcard.get_skip_confirm", return_value=True
+        ),
+        patch(
+            "tutor.commands.regenerate_flashcard.generate_flashcards",
+            side_effect=throttled,
+        ),
+    ):
+        assert _regenerate_flashcard_impl("你好") is None
+
+    output = capsys.readouterr().out
+    assert "Failed to regenerate the flashcard for '你好'" in output
+    assert "ct rg 你好" in output
+    # The card is left as it was
+    assert anki.notes[note_id]["fields"]["English"] == "hello"
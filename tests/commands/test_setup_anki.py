@@ -0,0 +1,158 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from tutor.commands.setup_anki import (
+    NoteTypeManager,
+    get_card_css,
+    get_card_templates,
+    setup_anki,
+)
+from tutor.utils.anki import AnkiConnectClient
+from tutor.utils.fake_anki import FakeAnkiConnect
+
+MANDARIN = "chinese-tutor-mandarin"
+CANTONESE = "chinese-tutor-cantonese"
+
+
+@pytest.fixture
+def anki(fake_anki):
+    # Setup starts from an Anki without the note types
+    return fake_anki
+
+
+def _run_setup(languages="mandarin,cantonese"):
+    return CliRunner().invoke(setup_anki, ["--languages", languages])
+
+
+def test_setup_creates_note_types_in_two_requests(anki):
+    result = _run_setup()
+
+    assert result.exit_code == 0
+    assert set(anki.models) == {MANDARIN, CANTONESE}
+    assert anki.models[MANDARIN]["css"] == get_card_css("mandarin")
+    assert anki.calls["createModel"] == 2
+    # One request reads every note type, one more creates them
+    assert anki.requests == 2
+    assert "Setup complete" in result.output
+
+
+def test_setup_again_is_a_single_request(anki):
+    _run_setup()
+    anki.requests = 0
+    anki.calls.clear()
+
+    result = _run_setup()
+
+    assert result.exit_code == 0
+    assert anki.requests == 1
+    assert anki.calls["updateModelStyling"] == 0
+    assert anki.calls["updateModelTemplates"] == 0
+    assert result.output.count("is already up to date") == 2
+
+
+def test_setup_pushes_only_what_changed(anki):
+    _run_setup()
+    anki.models[MANDARIN]["css"] = ".card { color: red; }"
+    anki.models[CANTONESE]["templates"]["English front"]["Back"] = "old"
+    anki.calls.clear()
+
+    result = _run_setup()
+
+    assert result.exit_code == 0
+    assert anki.calls["updateModelStyling"] == 1
+    assert anki.calls["updateModelTemplates"] == 1
+    assert anki.models[MANDARIN]["css"] == get_card_css("mandarin")
+    assert (
+        anki.models[CANTONESE]["templates"]["English front"]
+        == get_card_templates("cantonese")["English front"]
+    )
+    assert f"Updated styling of '{MANDARIN}'" in result.output
+    assert f"Updated templates (English front) of '{CANTONESE}'" in result.output
+
+
+def test_setup_reports_missing_fields(anki):
+    anki.add_model(MANDARIN, ["Chinese"])
+
+    result = _run_setup("mandarin")
+
+    assert "missing fields" in result.output
+    assert "Setup failed" in result.output
+    assert anki.calls["updateModelStyling"] == 0
+
+
+def test_setup_skips_unsupported_languages(anki):
+    result = _run_setup("mandarin,klingon")
+
+    assert "Unsupported language: klingon" in result.output
+    assert set(anki.models) == {MANDARIN}
+    assert "Setup partially complete" in result.output
+
+
+def test_setup_reports_failed_updates(anki):
+    anki.inject_error("createModel", "collection is not available")
+
+    result = _run_setup("mandarin")
+
+    assert "collection is not available" in result.output
+    assert "Setup failed" in result.output
+
+
+def test_create_note_type_matches_setup(anki):
+    NoteTypeManager(AnkiConnectClient()).create_note_type("mandarin")
+    anki.calls.clear()
+
+    _run_setup("mandarin")
+
+    assert anki.calls["updateModelStyling"] == 0
+    assert anki.calls["updateModelTemplates"] == 0
+
+
+def test_setup_several_profiles(anki):
+    _run_setup()
+    with FakeAnkiConnect() as work:
+        config = SimpleNamespace(
+            anki_profiles={"work": {"anki_connect_url": work.address}}
+        )
+        with patch("tutor.utils.anki_targets.get_config", return_value=config):
+            result = CliRunner().invoke(
+                setup_anki, ["--anki-profile", "work", "--anki-profile", "work"]
+            )
+
+    assert result.exit_code == 0, result.output
+    assert set(work.models) == {MANDARIN, CANTONESE}
+    assert "--- Profile" not in result.output
+
+
+def test_setup_reports_each_profile(anki):
+    with FakeAnkiConnect() as work:
+        config = SimpleNamespace(
+            anki_profiles={
+                "home": {"anki_connect_url": anki.address},
+                "work": {"anki_connect_url": work.address},
+            }
+        )
+        work.inject_error("multi", "collection is not available", status=500)
+        with patch("tutor.utils.anki_targets.get_config", return_value=config):
+            result = CliRunner().invoke(
+                setup_anki,
+                ["-l", "mandarin", "--anki-profile", "home", "--anki-profile", "work"],
+            )
+
+    assert result.exit_code == 0, result.output
+    assert set(anki.models) == {MANDARIN}
+    assert "--- Profile: home ---" in result.output
+    assert "--- Profile: work ---" in result.output
+    assert "Error connecting to Anki" in result.output
+    assert "Setup partially complete" in result.output
+
+
+def test_setup_rejects_unknown_profiles(anki):
+    config = SimpleNamespace(anki_profiles={}, config_path="config.yaml")
+    with patch("tutor.utils.anki_targets.get_config", return_value=config):
+        result = CliRunner().invoke(setup_anki, ["--anki-profile", "home"])
+
+    assert result.exit_code != 0
+    assert "Unknown Anki profile 'home'" in result.output
@@ -0,0 +1,91 @@
+import pytest
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+
+from tutor.llm.metrics import (
+    OUTCOME_REFUSAL,
+    format_summary,
+    has_llm_calls,
+    render_prometheus,
+    reset_llm_metrics,
+    track_llm_call,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    reset_llm_metrics()
+    yield
+    reset_llm_metrics()
+
+
+def _usage(prompt: int, completion: int, cached: int) -> CompletionUsage:
+    return CompletionUsage(
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        total_tokens=prompt + completion,
+        prompt_tokens_details=PromptTokensDetails(cached_tokens=cached),
+    )
+
+
+def test_track_llm_call_records_usage_and_outcome():
+    assert not has_llm_calls()
+
+    for _ in range(2):
+        with track_llm_call("dialogue", "gpt-4o") as call:
+            call.record_usage(_usage(100, 20, 64))
+    with pytest.raises(RuntimeError):
+        with track_llm_call("dialogue", "gpt-4o"):
+            raise RuntimeError("timeout")
+    with pytest.raises(ValueError):
+        with track_llm_call("flashcards", "gpt-4o") as call:
+            call.outcome = OUTCOME_REFUSAL
+            raise ValueError("refused")
+
+    assert has_llm_calls()
+    metrics = render_prometheus()
+    labels = 'call="dialogue",model="gpt-4o",outcome="ok"'
+    assert f"tutor_llm_calls_total{{{labels}}} 2" in metrics
+    assert f'tutor_llm_tokens_total{{{labels},type="prompt"}} 200' in metrics
+    assert f'tutor_llm_tokens_total{{{labels},type="completion"}} 40' in metrics
+    assert f'tutor_llm_tokens_total{{{labels},type="cached"}} 128' in metrics
+    assert f'tutor_llm_call_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in metrics
+    assert f"tutor_llm_call_duration_seconds_count{{{labels}}} 2" in metrics
+    assert (
+        'tutor_llm_calls_total{call="dialogue",model="gpt-4o",outcome="error"} 1'
+        in metrics
+    )
+    assert (
+        'tutor_llm_calls_total{call="flashcards",model="gpt-4o",outcome="refusal"} 1'
+        in metrics
+    )
+
+
+def test_record_usage_ignores_missing_usage():
+    with track_llm_call("summary", "gpt-4o") as call:
+        call.record_usage(None)
+    assert (call.prompt_tokens, call.completion_tokens, call.cached_tokens) == (0, 0, 0)
+
+
+def test_format_summary():
+    with track_llm_call("review", "gpt-4o") as call:
+        call.record_usage(_usage(500, 80, 0))
+
+    rows = format_summary().splitlines()
+    assert rows[0].split() == [
+        "LLM",
+        "call",
+        "model",
+        "outcome",
+        "calls",
+        "avg",
+        "s",
+        "max",
+        "s",
+        "prompt",
+        "cached",
+        "output",
+    ]
+    fields = rows[2].split()
+    assert fields[:4] == ["review", "gpt-4o", "ok", "1"]
+    assert fields[-3:] == ["500", "0", "80"]
@@ -1,9 +1,17 @@
+import json
+import time
+
+import pytest
+from pydantic import ValidationError
+
 from tutor.llm.models import (
     LanguageFlashcard,
     MandarinFlashcard,
     CantoneseFlashcard,
     MandarinRelatedWord,
     CantoneseRelatedWord,
+    get_flashcards_adapter,
+    parse_flashcards_json,
 )
 
 
@@ -79,6 +87,51 @@ class TestLanguageFlashcard:
         assert mandarin_words[2].word == "考试"
         assert mandarin_words[2].relationship == "common context"
 
+    def test_parse_related_words_reports_malformed_lines(self):
+        """Test that malformed related word lines are reported, not silently dropped."""
+        related_words_text = """
+        • 学习 (xué xí) - to study (formal) [similar usage]
+        教育 - education [related field]
+        考试 (kǎo shì) - exam
+        """
+
+        malformed_lines = []
+        mandarin_words = LanguageFlashcard._parse_related_words(
+            related_words_text, MandarinRelatedWord, "pinyin", malformed_lines
+        )
+
+        assert len(mandarin_words) == 1
+        assert mandarin_words[0].word == "学习"
+        assert mandarin_words[0].english == "to study (formal)"
+        assert malformed_lines == [
+            "教育 - education [related field]",
+            "考试 (kǎo shì) - exam",
+        ]
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "教" + " " * 16000 + "育",
+            "教育" + " " * 16000 + "(",
+            "教育 (" + " " * 16000 + "jiào yù",
+        ],
+    )
+    def test_parse_related_words_long_malformed_line(self, line):
+        """Test that a long malformed line is rejected without backtracking."""
+        malformed_lines = []
+        start = time.perf_counter()
+        mandarin_words = LanguageFlashcard._parse_related_words(
+            f"• 学习 (xué xí) - to study [similar usage]\n{line}",
+            MandarinRelatedWord,
+            "pinyin",
+            malformed_lines,
+        )
+
+        # Seconds with a backtracking pattern, well under a millisecond without
+        assert time.perf_counter() - start < 0.5
+        assert [w.word for w in mandarin_words] == ["学习"]
+        assert malformed_lines == [line]
+
 
 class TestMandarinFlashcard:
     """Tests for the MandarinFlashcard class."""
@@ -224,3 +277,55 @@ class TestRelatedWords:
 
         # Test string representation
         assert str(word) == "學習 (hok6 zaap6) - to study [similar usage]"
+
+
+class TestParseFlashcardsJson:
+    """Tests for parsing LLM flashcard responses."""
+
+    FLASHCARD = {
+        "word": "学习",
+        "pinyin": "xué xí",
+        "english": "to study",
+        "sample_usage": "我每天学习中文。",
+        "sample_usage_english": "I study Chinese every day.",
+        "related_words": [
+            {
+                "word": "考试",
+                "pinyin": "kǎo shì",
+                "english": "exam",
+                "relationship": "common context",
+            }
+        ],
+    }
+
+    @pytest.mark.parametrize(
+        "response",
+        [
+            FLASHCARD,
+            [FLASHCARD, FLASHCARD],
+            {"flashcards": [FLASHCARD, FLASHCARD]},
+        ],
+    )
+    def test_parse_flashcards_json_shapes(self, response):
+        """Test that every supported response shape parses into a list."""
+        flashcards = parse_flashcards_json(json.dumps(response), MandarinFlashcard)
+
+        assert len(flashcards) == (1 if response is self.FLASHCARD else 2)
+        for flashcard in flashcards:
+            assert isinstance(flashcard, MandarinFlashcard)
+            assert flashcard.word == "学习"
+            assert isinstance(flashcard.related_words[0], MandarinRelatedWord)
+
+    def test_parse_flashcards_json_invalid(self):
+        """Test that responses missing required fields are rejected."""
+        with pytest.raises(ValidationError):
+            parse_flashcards_json('{"word": "学习"}', MandarinFlashcard)
+
+    def test_get_flashcards_adapter_is_cached(self):
+        """Test that adapters are built once per flashcard class."""
+        assert get_flashcards_adapter(MandarinFlashcard) is get_flashcards_adapter(
+            MandarinFlashcard
+        )
+        assert get_flashcards_adapter(MandarinFlashcard) is not get_flashcards_adapter(
+            CantoneseFlashcard
+        )
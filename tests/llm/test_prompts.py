@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from tutor.llm.prompts import (
+    get_generate_flashcard_from_word_prompt,
+    get_generate_flashcards_from_words_prompt,
+)
+
+
+@pytest.fixture(autouse=True)
+def config():
+    with patch(
+        "tutor.llm.prompts.get_config",
+        return_value=SimpleNamespace(learner_level="intermediate"),
+    ):
+        yield
+
+
+def test_prompts_describe_fields_without_structured_outputs():
+    prompt = get_generate_flashcard_from_word_prompt("你好", "cantonese")
+
+    assert "Respond with a single valid JSON object" in prompt
+    assert '"jyutping"' in prompt
+
+    prompt = get_generate_flashcards_from_words_prompt(["你好", "谢谢"])
+
+    assert 'has a "flashcards" array' in prompt
+    assert '"pinyin"' in prompt
+
+
+def test_prompts_leave_fields_to_the_structured_outputs_schema():
+    prompt = get_generate_flashcard_from_word_prompt(
+        "你好", "mandarin", structured_outputs=True
+    )
+
+    assert "你好" in prompt
+    assert "intermediate students" in prompt
+    assert "JSON" not in prompt
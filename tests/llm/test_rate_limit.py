@@ -0,0 +1,82 @@
+from unittest.mock import MagicMock, patch
+
+import httpx
+import openai
+import pytest
+
+from tutor.llm.rate_limit import call_openai, is_retryable_error
+from tutor.utils.rate_limit import AdaptiveLimiter
+
+
+def _rate_limit_error(code: str) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.RateLimitError(
+        "Rate limited",
+        response=httpx.Response(429, request=request),
+        body={"code": code},
+    )
+
+
+def test_call_openai_retries_throttled_calls():
+    errors = [_rate_limit_error("rate_limit_exceeded")]
+
+    def call():
+        if errors:
+            raise errors.pop()
+        return "done"
+
+    with patch("tutor.utils.rate_limit.time.sleep") as mock_sleep:
+        assert call_openai(call) == "done"
+    assert mock_sleep.call_count == 1
+
+
+def test_call_openai_doesnt_retry_insufficient_quota():
+    error = _rate_limit_error("insufficient_quota")
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise error
+
+    with patch("tutor.utils.rate_limit.time.sleep"):
+        with pytest.raises(openai.RateLimitError):
+            call_openai(call)
+    assert len(calls) == 1
+    assert not is_retryable_error(error)
+    assert is_retryable_error(_rate_limit_error("rate_limit_exceeded"))
+
+
+def _stream(chunks):
+    stream = MagicMock(spec=openai.Stream)
+    stream.__iter__.return_value = iter(chunks)
+    return stream
+
+
+def test_call_openai_holds_the_limiter_until_the_stream_is_read():
+    limiter = AdaptiveLimiter("test")
+    with patch("tutor.llm.rate_limit.get_limiter", return_value=limiter):
+        stream = call_openai(lambda: _stream(["a", "b"]))
+        # The generation happens while the stream is read
+        assert limiter.in_flight == 1
+        assert list(stream) == ["a", "b"]
+        assert limiter.in_flight == 0
+        assert limiter.successes == 1
+
+        assert call_openai(lambda: "done") == "done"
+        assert limiter.in_flight == 0
+
+
+def test_call_openai_releases_the_limiter_when_a_stream_is_closed_early():
+    limiter = AdaptiveLimiter("test")
+    with patch("tutor.llm.rate_limit.get_limiter", return_value=limiter):
+        raw = _stream(["a", "b"])
+        stream = call_openai(lambda: raw)
+        for _ in stream:
+            break
+        stream.close()
+        assert limiter.in_flight == 0
+        raw.close.assert_called()
+
+        with call_openai(lambda: _stream(["a"])):
+            assert limiter.in_flight == 1
+        assert limiter.in_flight == 0
@@ -0,0 +1,71 @@
+import json
+
+from tutor.llm.streaming import IncrementalJsonParser
+
+
+def _feed_in_chunks(document: str, chunk_size: int):
+    parser = IncrementalJsonParser()
+    completed = []
+    for i in range(0, len(document), chunk_size):
+        completed.extend(parser.feed(document[i : i + chunk_size]))
+    return completed
+
+
+def test_reports_string_values_with_paths():
+    document = json.dumps(
+        {
+            "flashcards": [
+                {
+                    "word": "你好",
+                    "frequency": None,
+                    "related_words": [
+                        {"word": "再见", "pinyin": "zài jiàn"},
+                        {"word": "谢谢", "pinyin": "xiè xie"},
+                    ],
+                    "sample_usage": "你好，我叫小明。",
+                }
+            ]
+        },
+        ensure_ascii=False,
+    )
+
+    # The result must not depend on how the stream is split into chunks
+    for chunk_size in (1, 3, len(document)):
+        assert _feed_in_chunks(document, chunk_size) == [
+            (("flashcards", 0, "word"), "你好"),
+            (("flashcards", 0, "related_words", 0, "word"), "再见"),
+            (("flashcards", 0, "related_words", 0, "pinyin"), "zài jiàn"),
+            (("flashcards", 0, "related_words", 1, "word"), "谢谢"),
+            (("flashcards", 0, "related_words", 1, "pinyin"), "xiè xie"),
+            (("flashcards", 0, "sample_usage"), "你好，我叫小明。"),
+        ]
+
+
+def test_reports_values_as_soon_as_complete():
+    parser = IncrementalJsonParser()
+    assert parser.feed('{"word": "你') == []
+    assert parser.feed('好", "english": "hel') == [(("word",), "你好")]
+    assert parser.feed('lo"}') == [(("english",), "hello")]
+
+
+def test_decodes_escapes():
+    document = json.dumps({"sample_usage": 'He said "hi"\\n', "english": "你"})
+    assert _feed_in_chunks(document, 1) == [
+        (("sample_usage",), 'He said "hi"\\n'),
+        (("english",), "你"),
+    ]
+
+
+def test_partial_value():
+    parser = IncrementalJsonParser()
+    parser.feed('{"next_line_zh": "您')
+    assert parser.partial_value() == (("next_line_zh",), "您")
+
+    # Incomplete escape sequences are held back until they are complete
+    parser.feed("好\\u4e")
+    assert parser.partial_value() == (("next_line_zh",), "您好")
+    parser.feed('2d", "next_')
+    assert parser.partial_value() is None
+
+    parser.feed('line_en": "')
+    assert parser.partial_value() == (("next_line_en",), "")
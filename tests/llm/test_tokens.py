@@ -0,0 +1,10 @@
+from unittest.mock import patch
+
+from tutor.llm.tokens import count_tokens
+
+
+def test_count_tokens_estimate_without_encoding():
+    with patch("tutor.llm.tokens._get_encoding", return_value=None):
+        assert count_tokens("") == 0
+        assert count_tokens("你好") == 2
+        assert count_tokens("hello, 你好") == 2 + 2
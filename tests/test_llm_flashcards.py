@@ -0,0 +1,183 @@
+import json
+from unittest.mock import Mock, patch
+
+import httpx
+import openai
+import pytest
+
+from tutor.llm.models import CantoneseFlashcard, MandarinFlashcard
+from tutor.llm_flashcards import (
+    generate_flashcards,
+    get_flashcards_response_format,
+    maybe_add_flashcards_to_deck,
+)
+
+
+def _mock_completion(content: str) -> Mock:
+    message = Mock(content=content, refusal=None)
+    return Mock(choices=[Mock(message=message)])
+
+
+@pytest.fixture
+def flashcard_json():
+    return json.dumps(
+        {
+            "flashcards": [
+                {
+                    "word": "你好",
+                    "pinyin": "nǐ hǎo",
+                    "english": "hello",
+                    "sample_usage": "你好，我叫小明。",
+                    "sample_usage_english": "Hello, my name is Xiao Ming.",
+                    "frequency": "very common",
+                    "related_words": [],
+                }
+            ]
+        }
+    )
+
+
+def test_get_flashcards_response_format():
+    response_format = get_flashcards_response_format(MandarinFlashcard)
+
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["strict"] is True
+    schema = response_format["json_schema"]["schema"]
+    assert schema["required"] == ["flashcards"]
+    assert "pinyin" in schema["$defs"]["MandarinFlashcard"]["properties"]
+    # The Anki note ID is never generated by the LLM
+    assert "anki_note_id" not in schema["$defs"]["MandarinFlashcard"]["properties"]
+
+    # Schemas are built once per language
+    assert get_flashcards_response_format(MandarinFlashcard) is response_format
+    assert get_flashcards_response_format(CantoneseFlashcard) is not response_format
+
+
+@pytest.mark.parametrize("structured_outputs", [True, False])
+def test_generate_flashcards(flashcard_json, structured_outputs):
+    with (
+        patch("tutor.llm_flashcards.OpenAI") as mock_openai,
+        patch("tutor.llm_flashcards.get_model", return_value="gpt-4o"),
+        patch(
+            "tutor.llm_flashcards.get_structured_outputs",
+            return_value=structured_outputs,
+        ),
+    ):
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = _mock_completion(flashcard_json)
+
+        flashcards = generate_flashcards("prompt", "mandarin")
+
+    assert len(flashcards) == 1
+    assert isinstance(flashcards[0], MandarinFlashcard)
+    assert flashcards[0].pinyin == "nǐ hǎo"
+
+    response_format = create.call_args.kwargs["response_format"]
+    if structured_outputs:
+        assert response_format is get_flashcards_response_format(MandarinFlashcard)
+    else:
+        assert response_format == {"type": "json_object"}
+
+
+def test_generate_flashcards_retries_when_rate_limited(flashcard_json):
+    response = httpx.Response(
+        429,
+        headers={"retry-after-ms": "10"},
+        request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"),
+    )
+    rate_limited = openai.RateLimitError(
+        "Rate limit reached", response=response, body=None
+    )
+
+    with (
+        patch("tutor.llm_flashcards.OpenAI") as mock_openai,
+        patch("tutor.llm_flashcards.get_model", return_value="gpt-4o"),
+        patch("tutor.llm_flashcards.get_structured_outputs", return_value=True),
+        patch("tutor.utils.rate_limit.time.sleep") as mock_sleep,
+    ):
+        create = mock_openai.return_value.chat.completions.create
+        create.side_effect = [
+            rate_limited,
+            rate_limited,
+            _mock_completion(flashcard_json),
+        ]
+
+        flashcards = generate_flashcards("prompt", "mandarin")
+
+    # The card is generated once the rate limit clears, rather than dropped
+    assert [f.word for f in flashcards] == ["你好"]
+    assert create.call_count == 3
+    assert mock_sleep.call_count == 2
+    assert all(call.args[0] >= 0.01 for call in mock_sleep.call_args_list)
+
+
+def test_generate_flashcards_streaming(flashcard_json):
+    # Split the response into small chunks, as a streamed completion would
+    chunks = [
+        Mock(
+            choices=[Mock(delta=Mock(content=flashcard_json[i : i + 5], refusal=None))]
+        )
+        for i in range(0, len(flashcard_json), 5)
+    ]
+    fields = []
+
+    with (
+        patch("tutor.llm_flashcards.OpenAI") as mock_openai,
+        patch("tutor.llm_flashcards.get_model", return_value="gpt-4o"),
+        patch("tutor.llm_flashcards.get_structured_outputs", return_value=True),
+    ):
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = iter(chunks)
+
+        flashcards = generate_flashcards(
+            "prompt", "mandarin", on_field=lambda path, value: fields.append(path)
+        )
+
+    assert create.call_args.kwargs["stream"] is True
+    assert len(flashcards) == 1
+    assert flashcards[0].word == "你好"
+    # Paths are relative to the flashcard, without the "flashcards" container
+    assert fields == [
+        ("word",),
+        ("pinyin",),
+        ("english",),
+        ("sample_usage",),
+        ("sample_usage_english",),
+        ("frequency",),
+    ]
+
+
+def test_maybe_add_flashcards_to_deck_prefetches_audio():
+    flashcards = [
+        MandarinFlashcard(
+            word=word,
+            pinyin="",
+            english="",
+            sample_usage=f"{word}。",
+            sample_usage_english="",
+        )
+        for word in ("你好", "再见", "谢谢")
+    ]
+
+    with (
+        patch("tutor.llm_flashcards.AnkiConnectClient") as mock_client,
+        patch("tutor.llm_flashcards.get_skip_confirm", return_value=False),
+        patch("tutor.llm_flashcards.click.confirm", side_effect=[False, True, True]),
+        patch("tutor.llm_flashcards.text_to_speech_async") as mock_tts,
+        patch("tutor.llm_flashcards.cancel_text_to_speech") as mock_cancel,
+    ):
+        mock_tts.return_value.result.return_value = "audio.wav"
+
+        assert maybe_add_flashcards_to_deck(flashcards, "Test::Deck")
+
+        # Audio for the first card and the next ones is started before the first
+        # confirmation prompt is answered
+        prefetched = [c.args[0] for c in mock_tts.call_args_list[:6]]
+        assert prefetched == ["你好。", "你好", "再见。", "再见", "谢谢。", "谢谢"]
+
+        # The skipped card's audio is discarded as soon as it is skipped
+        assert mock_cancel.call_args_list[:2] == [
+            (("你好。", "mandarin"),),
+            (("你好", "mandarin"),),
+        ]
+        assert mock_client.return_value.add_flashcard.call_count == 2
@@ -367,6 +367,13 @@ def test_get_default_anki_media_dir(system, expected_path):
             assert str(result).endswith(expected_path)
 
 
+def test_get_default_anki_media_dir_for_profile():
+    with patch("platform.system", return_value="Linux"):
+        with patch("pathlib.Path.home", return_value=Path("/home/user")):
+            result = get_default_anki_media_dir("Work")
+            assert str(result).endswith(".local/share/Anki2/Work/collection.media")
+
+
 def test_get_default_anki_media_dir_unsupported():
     with patch("platform.system", return_value="Unsupported"):
         with pytest.raises(NotImplementedError) as exc_info:
@@ -0,0 +1,81 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from tutor.utils.anki_targets import (
+    SharedResults,
+    for_each_target,
+    resolve_targets,
+)
+
+
+@pytest.fixture
+def config():
+    config = SimpleNamespace(
+        default_deck="Chinese",
+        anki_profiles={"work": {"anki_connect_url": "http://localhost:8766"}},
+        config_path="config.yaml",
+    )
+    with patch("tutor.utils.anki_targets.get_config", return_value=config):
+        yield config
+
+
+def test_resolve_targets_defaults(config):
+    targets = resolve_targets((), ())
+
+    assert [(t.profile, t.deck) for t in targets] == [(None, "Chinese")]
+    assert targets[0].client.address == "http://localhost:8765"
+
+
+def test_resolve_targets_fans_out_decks_and_profiles(config):
+    targets = resolve_targets(("A", "B", "A"), ("work",))
+
+    assert [str(t) for t in targets] == ["work/A", "work/B"]
+    assert targets[0].client is targets[1].client
+    assert targets[0].client.address == "http://localhost:8766"
+
+
+def test_resolve_targets_rejects_unknown_profiles(config):
+    with pytest.raises(ValueError, match="Unknown Anki profile 'home'"):
+        resolve_targets(("A",), ("home",))
+
+
+def test_for_each_target_runs_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def work(n):
+        # Only returns once all three are running at the same time
+        barrier.wait()
+        return n * 2
+
+    assert for_each_target([1, 2, 3], work) == [2, 4, 6]
+
+
+def test_shared_results_computes_once():
+    shared = SharedResults()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "result"
+
+    results = for_each_target(range(4), lambda _: shared.get("key", compute))
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert shared.get("other", lambda: "other") == "other"
+
+
+def test_shared_results_retries_failures():
+    shared = SharedResults()
+
+    def fail():
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        shared.get("key", fail)
+    assert shared.get("key", lambda: "ok") == "ok"
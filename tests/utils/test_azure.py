@@ -0,0 +1,58 @@
+from collections import OrderedDict
+import threading
+from unittest.mock import patch
+
+from tutor.utils import azure
+from tutor.utils.azure import cancel_text_to_speech, text_to_speech_async
+
+
+def test_text_to_speech_async_shares_synthesis():
+    with patch(
+        "tutor.utils.azure.text_to_speech", return_value="audio.wav"
+    ) as mock_tts:
+        first = text_to_speech_async("你好", "mandarin")
+        second = text_to_speech_async("你好", "Mandarin")
+
+        assert first is second
+        assert first.result() == "audio.wav"
+        mock_tts.assert_called_once_with("你好", "mandarin")
+
+        cancel_text_to_speech("你好", "mandarin")
+
+
+def test_cancel_text_to_speech():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_tts(text, language):
+        started.set()
+        release.wait()
+        return f"{text}.wav"
+
+    with patch("tutor.utils.azure.text_to_speech", side_effect=slow_tts):
+        running = text_to_speech_async("running", "mandarin")
+        started.wait()
+
+        cancel_text_to_speech("running", "mandarin")
+        # A discarded synthesis is started afresh on the next request
+        restarted = text_to_speech_async("running", "mandarin")
+        assert restarted is not running
+
+        release.set()
+        assert restarted.result() == "running.wav"
+        cancel_text_to_speech("running", "mandarin")
+
+
+def test_text_to_speech_async_forgets_oldest_finished_syntheses():
+    with (
+        patch("tutor.utils.azure.MAX_TTS_RESULTS", 2),
+        patch("tutor.utils.azure._tts_futures", OrderedDict()),
+        patch("tutor.utils.azure.text_to_speech", side_effect=lambda t, lang: t),
+    ):
+        for text in ["一", "二"]:
+            text_to_speech_async(text, "mandarin").result()
+        # Requesting 一 again makes 二 the least recently requested
+        text_to_speech_async("一", "mandarin")
+        text_to_speech_async("三", "mandarin").result()
+
+        assert list(azure._tts_futures) == [("一", "mandarin"), ("三", "mandarin")]
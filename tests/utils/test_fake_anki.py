@@ -0,0 +1,166 @@
+import time
+
+import pytest
+import requests
+
+from tutor.commands.setup_anki import NoteTypeManager
+from tutor.llm.models import CantoneseFlashcard, MandarinFlashcard, MandarinRelatedWord
+from tutor.utils.anki import AnkiAction, AnkiConnectClient, AnkiConnectError
+from tutor.utils.fake_anki import FakeAnkiConnect
+
+
+@pytest.fixture
+def anki():
+    with FakeAnkiConnect() as fake:
+        yield fake
+
+
+@pytest.fixture
+def client(anki):
+    client = AnkiConnectClient(anki.address)
+    NoteTypeManager(client).create_note_type("mandarin")
+    client.add_deck("Chinese::Vocab")
+    return client
+
+
+def _flashcard(word, related_words=()):
+    return MandarinFlashcard(
+        word=word,
+        pinyin="pīn yīn",
+        english="english",
+        sample_usage=f"{word}。",
+        sample_usage_english="Sample.",
+        related_words=list(related_words),
+    )
+
+
+def test_add_and_find_flashcards(anki, client):
+    related = MandarinRelatedWord(
+        word="您好", pinyin="nín hǎo", english="hello", relationship="formal"
+    )
+    note_id = client.add_flashcard(
+        "Chinese::Vocab",
+        _flashcard("你好", [related]),
+        sample_usage_audio_filepath="sample.wav",
+    )
+    client.add_flashcard("Chinese::Vocab", _flashcard("你们好"))
+
+    [card] = client.find_notes('"deck:Chinese::Vocab" Chinese:你好')
+    assert card.anki_note_id == note_id
+    assert card.word == "你好"
+    assert card.related_words == [related]
+    assert "[sound:sample.wav]" in anki.notes[note_id]["fields"]["Sample Usage (Audio)"]
+
+    assert len(client.find_notes('"deck:Chinese::Vocab" Chinese:*你*')) == 2
+    assert len(client.find_notes('deck:"Chinese"')) == 2
+    assert client.find_notes('deck:"Other"') == []
+    assert (
+        client.find_notes('(deck:"Chinese" rated:7:1 OR deck:"Chinese" rated:7:2)')
+        == []
+    )
+
+
+def test_add_duplicate_fails(client):
+    client.add_flashcard("Chinese::Vocab", _flashcard("你好"))
+    with pytest.raises(AnkiConnectError):
+        client.add_flashcard("Chinese::Vocab", _flashcard("你好"))
+
+
+def test_add_flashcard_requires_note_type(anki, client):
+    card = CantoneseFlashcard(
+        word="你好",
+        jyutping="nei5 hou2",
+        english="hello",
+        sample_usage="你好。",
+        sample_usage_english="Hello.",
+    )
+    with pytest.raises(AnkiConnectError):
+        client.add_flashcard("Chinese::Vocab", card)
+    assert anki.calls["addNote"] == 0
+
+
+def test_update_flashcard(client):
+    note_id = client.add_flashcard("Chinese::Vocab", _flashcard("你好"))
+    card = _flashcard("你好")
+    card.english = "hi"
+    client.update_flashcard(note_id, card)
+
+    assert client.get_note_fields(note_id)["English"] == "hi"
+
+
+def test_models(client):
+    model_name = "chinese-tutor-mandarin"
+    assert client.send_request(AnkiAction.MODEL_NAMES) == [model_name]
+    assert "Chinese" in client.send_request(
+        AnkiAction.MODEL_FIELD_NAMES, {"modelName": model_name}
+    )
+
+    client.update_card_styling_and_templates(
+        model_name, ".card {}", {"Chinese front": {"Front": "{{Chinese}}"}}
+    )
+    assert client.get_model_styling(model_name) == {"css": ".card {}"}
+    templates = client.get_model_templates(model_name)
+    assert templates["Chinese front"]["Front"] == "{{Chinese}}"
+    assert set(templates) == {"Chinese front", "English front"}
+
+
+def test_multi(anki, client):
+    results = client.send_request(
+        AnkiAction.MULTI,
+        {
+            "actions": [
+                {"action": "deckNames"},
+                {"action": "modelStyling", "params": {"modelName": "missing"}},
+            ]
+        },
+    )
+
+    assert results[0] == {"result": ["Default", "Chinese::Vocab"], "error": None}
+    assert results[1]["error"] == "model was not found: missing"
+    assert anki.requests == 3
+    assert anki.calls["deckNames"] == 1
+
+
+def test_client_multi(anki, client):
+    results = client.multi(
+        [
+            (AnkiAction.DECK_NAMES, None),
+            (AnkiAction.MODEL_STYLING, {"modelName": "missing"}),
+        ]
+    )
+
+    assert results[0] == ["Default", "Chinese::Vocab"]
+    assert isinstance(results[1], AnkiConnectError)
+    assert results[1].message == "model was not found: missing"
+    assert client.multi([]) == []
+
+
+def test_injected_errors(anki, client):
+    anki.inject_error("deckNames", "collection is not available", count=2)
+    for _ in range(2):
+        with pytest.raises(AnkiConnectError, match="collection is not available"):
+            client.list_decks()
+    assert client.list_decks() == ["Default", "Chinese::Vocab"]
+
+    anki.inject_error("findNotes", status=500, count=None)
+    for _ in range(3):
+        with pytest.raises(AnkiConnectError):
+            client.find_note_ids("deck:Chinese")
+    assert anki.calls["findNotes"] == 3
+
+
+def test_latency(anki):
+    anki.latency = 0.05
+    start = time.perf_counter()
+    response = requests.post(anki.address, json={"action": "deckNames", "version": 6})
+    assert time.perf_counter() - start >= 0.05
+    assert response.json() == {"result": ["Default"], "error": None}
+
+
+def test_seeded_notes(anki, client):
+    fields = {"Chinese": "你好", "Pinyin": "nǐ hǎo", "English": "hello"}
+    note_id = anki.add_note("Chinese::Vocab", "chinese-tutor-mandarin", fields)
+
+    [card] = client.find_notes('deck:"Chinese::Vocab"')
+    assert card.anki_note_id == note_id
+    assert card.sample_usage == ""
@@ -0,0 +1,147 @@
+import struct
+from unittest.mock import Mock, patch
+
+import pytest
+
+from tutor.llm.models import LanguageFlashcard, MandarinFlashcard
+from tutor.llm_flashcards import generate_flashcards
+from tutor.utils.frequency import (
+    FrequencyIndex,
+    build_frequency_index,
+    frequency_label,
+    lookup_frequency,
+    prioritize_words,
+    read_word_list,
+    reset_frequency_indexes,
+)
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    with patch("tutor.utils.frequency.get_config_dir", return_value=tmp_path):
+        yield tmp_path
+    reset_frequency_indexes()
+
+
+def test_index_lookups(tmp_path):
+    path = tmp_path / "words.idx"
+    assert FrequencyIndex.build(["的", "是", "学习", "是", "松弛感"], path) == 4
+
+    index = FrequencyIndex(path)
+    assert len(index) == 4
+    assert [index.rank(w) for w in ("的", "是", "学习", "松弛感")] == [1, 2, 3, 4]
+    assert index.rank("学") is None
+    assert index.rank("学习者") is None
+    assert "学习" in index
+    assert index.label("的") == "very common"
+    index.close()
+
+    empty = tmp_path / "empty.idx"
+    FrequencyIndex.build([], empty)
+    assert FrequencyIndex(empty).rank("的") is None
+
+
+def test_index_integers_are_little_endian(tmp_path):
+    path = tmp_path / "words.idx"
+    FrequencyIndex.build(["是", "的"], path)
+
+    # Header, then the word offsets and ranks in sorted (UTF-8) order: 是, 的
+    assert struct.unpack_from("<4sII3I2I", path.read_bytes()) == (
+        b"TFQI",
+        1,
+        2,
+        *(0, 3, 6),
+        *(1, 2),
+    )
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_bytes(b"not an index at all")
+    with pytest.raises(ValueError):
+        FrequencyIndex(path)
+
+
+@pytest.mark.parametrize(
+    "rank, label",
+    [(1, "very common"), (1000, "very common"), (1001, "common"), (60000, "very rare")],
+)
+def test_frequency_label(rank, label):
+    assert frequency_label(rank) == label
+
+
+def test_read_word_list(tmp_path):
+    counted = tmp_path / "counted.txt"
+    counted.write_text("# word count\n學習 50 v\n的 900 uj\n\n是 300 v\n", "utf-8")
+    # Counts rank the words, and Mandarin words are simplified
+    assert read_word_list(counted, "mandarin") == ["的", "是", "学习"]
+
+    ranked = tmp_path / "ranked.txt"
+    ranked.write_text("的\n学习\n", "utf-8")
+    assert read_word_list(ranked, "cantonese") == ["的", "學習"]
+
+
+def test_prioritize_words(config_dir, tmp_path):
+    word_list = tmp_path / "words.txt"
+    word_list.write_text("的\n是\n学习\n工作\n", "utf-8")
+    words = ["工作", "松弛感", "学习", "工作", "是"]
+
+    # Without an index words are only deduped
+    assert prioritize_words(words, "mandarin") == ["工作", "松弛感", "学习", "是"]
+
+    assert build_frequency_index(word_list, "mandarin") == 4
+    assert prioritize_words(words, "mandarin") == ["是", "学习", "工作", "松弛感"]
+    assert prioritize_words(words, "mandarin", max_rank=3) == ["是", "学习"]
+    assert lookup_frequency("学习", "mandarin") == "very common"
+    assert lookup_frequency("学习", "cantonese") is None
+
+
+def test_from_anki_json_fills_in_frequency(config_dir, tmp_path):
+    word_list = tmp_path / "words.txt"
+    word_list.write_text("学习 100\n", "utf-8")
+    build_frequency_index(word_list, "mandarin")
+    fields = {
+        "Chinese": "学习",
+        "Pinyin": "xué xí",
+        "English": "to study",
+        "Sample Usage": "我学习中文。",
+        "Sample Usage (English)": "I study Chinese.",
+    }
+    note = {
+        "noteId": 1,
+        "modelName": "chinese-tutor-mandarin",
+        "fields": {name: {"value": value} for name, value in fields.items()},
+    }
+
+    card = LanguageFlashcard.from_anki_json(note)
+    assert card.frequency == "very common"
+    # Shown when ct g prints a card that's already in the deck
+    assert "Frequency: very common" in str(card)
+
+
+def test_generate_flashcards_fills_in_frequency(config_dir, tmp_path):
+    word_list = tmp_path / "words.txt"
+    word_list.write_text("学习 100\n", "utf-8")
+    build_frequency_index(word_list, "mandarin")
+    flashcards = [
+        MandarinFlashcard(
+            word=word,
+            pinyin="",
+            english="",
+            sample_usage="",
+            sample_usage_english="",
+        )
+        for word in ["学习", "松弛感"]
+    ]
+
+    with (
+        patch("tutor.llm_flashcards.OpenAI") as mock_openai,
+        patch("tutor.llm_flashcards.get_model", return_value="gpt-4o"),
+        patch("tutor.llm_flashcards.parse_flashcards_json", return_value=flashcards),
+    ):
+        message = Mock(content="{}", refusal=None)
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = Mock(choices=[Mock(message=message)])
+        generated = generate_flashcards("prompt", "mandarin")
+
+    assert [card.frequency for card in generated] == ["very common", None]
@@ -0,0 +1,79 @@
+import json
+import threading
+
+import pytest
+
+from tutor.utils.profiling import (
+    disable_profiling,
+    enable_profiling,
+    format_breakdown,
+    get_span_records,
+    span,
+    write_chrome_trace,
+)
+
+
+@pytest.fixture
+def profiling():
+    enable_profiling()
+    yield
+    disable_profiling()
+
+
+def test_spans_are_not_recorded_when_disabled():
+    enable_profiling()
+    disable_profiling()
+    with span("anki.findNotes", "anki"):
+        pass
+    assert get_span_records() == []
+
+
+def test_breakdown_merges_nested_spans(profiling):
+    with span("ct g", "cli"):
+        for _ in range(3):
+            with span("anki.findNotes", "anki"):
+                pass
+        with span("llm.flashcards", "llm"):
+            with span("pydantic.parse_flashcards", "pydantic"):
+                pass
+
+    records = get_span_records()
+    assert [r.name for r in records].count("anki.findNotes") == 3
+    assert records[-1].name == "ct g"
+    assert records[0].path == ("ct g",)
+
+    lines = format_breakdown(wall_time=1.0).splitlines()
+    # (count, indented name) for each node, in tree order
+    nodes = [(line.split()[2], line[line.index("  ", 30) + 2 :]) for line in lines[3:]]
+    assert nodes[0] == ("1", "ct g")
+    assert ("3", "  anki.findNotes") in nodes
+    parse = nodes.index(("1", "    pydantic.parse_flashcards"))
+    assert nodes[parse - 1] == ("1", "  llm.flashcards")
+
+
+def test_chrome_trace(profiling, tmp_path):
+    with span("ct fix-cards", "cli"):
+        with span("anki.notesInfo", "anki"):
+            pass
+
+    def synthesize():
+        with span("tts.mandarin", "tts"):
+            pass
+
+    worker = threading.Thread(target=synthesize, name="tts_0")
+    worker.start()
+    worker.join()
+
+    path = tmp_path / "trace.json"
+    write_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+
+    complete = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert set(complete) == {"ct fix-cards", "anki.notesInfo", "tts.mandarin"}
+    outer, inner = complete["ct fix-cards"], complete["anki.notesInfo"]
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["cat"] == "anki"
+    assert complete["tts.mandarin"]["tid"] != outer["tid"]
+    thread_names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert thread_names == {"MainThread", "tts_0"}
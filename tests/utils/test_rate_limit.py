@@ -0,0 +1,148 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from tutor.utils.rate_limit import (
+    AdaptiveLimiter,
+    RetryableError,
+    backoff_delay,
+    call_with_backoff,
+    get_retry_after,
+    parse_duration,
+)
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [
+        ("20", 20.0),
+        ("0.5", 0.5),
+        ("1s", 1.0),
+        ("6m0s", 360.0),
+        ("20ms", 0.02),
+        ("1h2m3.5s", 3723.5),
+        ("", None),
+        ("soon", None),
+        (None, None),
+    ],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_get_retry_after():
+    assert get_retry_after({"retry-after-ms": "250", "retry-after": "1"}) == 0.25
+    assert get_retry_after({"retry-after": "3"}) == 3.0
+    assert get_retry_after({}) is None
+
+
+def test_backoff_delay():
+    for attempt in range(1, 10):
+        assert (
+            0
+            <= backoff_delay(attempt, base=0.5, cap=4.0)
+            <= min(4.0, 0.5 * 2 ** (attempt - 1))
+        )
+    assert 2.0 <= backoff_delay(1, retry_after=2.0, base=0.5) <= 2.5
+
+
+def test_concurrency_increases_additively_and_halves_when_throttled():
+    limiter = AdaptiveLimiter("test", concurrency=4, max_concurrency=8)
+    # About one more slot per window of (concurrency) successes
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.concurrency == 5
+
+    # Calls throttled together only halve the concurrency once
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(succeeded=False, throttled=True)
+    assert limiter.concurrency == 2
+    assert limiter.throttles == 3
+    assert limiter.in_flight == 0
+
+
+def test_acquire_waits_for_a_free_slot():
+    limiter = AdaptiveLimiter("test", concurrency=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def acquire():
+        limiter.acquire()
+        acquired.set()
+
+    waiter = threading.Thread(target=acquire)
+    waiter.start()
+    assert not acquired.wait(0.05)
+    limiter.release()
+    assert acquired.wait(1)
+    waiter.join()
+
+
+def test_exhausted_quota_pauses_calls_until_reset():
+    limiter = AdaptiveLimiter("test")
+    start = time.monotonic()
+    limiter.update_from_headers(
+        {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "50ms"}
+    )
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.05
+    limiter.release()
+
+
+def test_request_quota_paces_calls():
+    limiter = AdaptiveLimiter("test", concurrency=8)
+    # 1200 requests per minute, so a burst of 20 and then one every 50ms
+    limiter.update_from_headers({"x-ratelimit-limit-requests": "1200"})
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release()
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.03
+    limiter.release()
+
+
+def test_call_with_backoff_retries_retryable_errors():
+    limiter = AdaptiveLimiter("test")
+    results = iter(
+        [
+            RetryableError("throttled"),
+            RetryableError("timeout", throttled=False),
+            "done",
+        ]
+    )
+
+    def call():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with patch("tutor.utils.rate_limit.time.sleep") as mock_sleep:
+        assert call_with_backoff(limiter, call) == "done"
+    assert mock_sleep.call_count == 2
+    assert limiter.throttles == 1
+    assert limiter.successes == 1
+    assert limiter.in_flight == 0
+
+
+def test_call_with_backoff_gives_up():
+    limiter = AdaptiveLimiter("test")
+
+    def call():
+        raise RetryableError("throttled")
+
+    with patch("tutor.utils.rate_limit.time.sleep"):
+        with pytest.raises(RetryableError):
+            call_with_backoff(limiter, call, max_attempts=3)
+    assert limiter.throttles == 3
+
+    # Other errors aren't retried
+    with pytest.raises(ValueError):
+        call_with_backoff(limiter, lambda: int("x"))
+    assert limiter.in_flight == 0
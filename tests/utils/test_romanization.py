@@ -0,0 +1,129 @@
+from unittest.mock import patch
+
+import pytest
+
+from tutor.llm.models import CantoneseFlashcard, MandarinFlashcard, MandarinRelatedWord
+from tutor.utils.romanization import (
+    PronunciationDictionary,
+    build_pronunciation_dictionary,
+    check_reading,
+    fill_pronunciations,
+    marked_to_numbered,
+    numbered_to_marked,
+    reset_pronunciation_dictionaries,
+    romanize,
+)
+
+CEDICT = """\
+# CC-CEDICT
+你好 你好 [ni3 hao3] {nei5 hou2} /hello/
+你 你 [ni3] {nei5} /you/
+好 好 [hao3] {hou2} /good/
+好 好 [hao4] {hou3} /to be fond of/
+學習 学习 [xue2 xi2] {hok6 zaap6} /to study/
+綠茶 绿茶 [lu:4 cha2] /green tea/
+一樣 一样 [yi1 yang4] /same/
+不要 不要 [bu4 yao4] /don't/
+"""
+
+
+@pytest.fixture
+def dictionaries(tmp_path):
+    dict_file = tmp_path / "cedict.u8"
+    dict_file.write_text(CEDICT, "utf-8")
+    with patch("tutor.utils.romanization.get_config_dir", return_value=tmp_path):
+        build_pronunciation_dictionary([dict_file], "mandarin")
+        build_pronunciation_dictionary([dict_file], "cantonese")
+        yield
+    reset_pronunciation_dictionaries()
+
+
+@pytest.mark.parametrize(
+    "numbered, marked",
+    [
+        ("hao3", "hǎo"),
+        ("lu:4", "lǜ"),
+        ("xue2", "xué"),
+        ("dou1", "dōu"),
+        ("gui4", "guì"),
+        ("ma5", "ma"),
+        ("r5", "r"),
+    ],
+)
+def test_tone_marks(numbered, marked):
+    assert numbered_to_marked(numbered) == marked
+    assert marked_to_numbered(marked) == numbered.replace("u:", "ü")
+
+
+def test_longest_prefix(tmp_path):
+    path = tmp_path / "words.idx"
+    entries = [
+        ("你", "ni3"),
+        ("你好", "ni3 hao3"),
+        ("你们", "ni3 men5"),
+        ("好", "hao3"),
+    ]
+    assert PronunciationDictionary.build(entries, path) == 4
+    dictionary = PronunciationDictionary(path)
+
+    assert dictionary.longest_prefix("你好吗") == (2, ["ni3 hao3"])
+    assert dictionary.longest_prefix("你吗") == (1, ["ni3"])
+    assert dictionary.longest_prefix("吗") == (0, [])
+    assert dictionary.longest_prefix("我你", start=1) == (1, ["ni3"])
+    assert dictionary.readings("你们") == ["ni3 men5"]
+    assert dictionary.readings("你们好") == []
+    dictionary.close()
+
+
+def test_romanize(dictionaries):
+    assert romanize("你好", "mandarin") == "nǐ hǎo"
+    assert romanize("你好", "cantonese") == "nei5 hou2"
+    # Traditional and simplified forms are both indexed
+    assert romanize("學習", "mandarin") == "xué xí"
+    assert romanize("你绿茶", "mandarin") == "nǐ lǜ chá"
+    assert romanize("你好，学习！", "mandarin") == "nǐ hǎo xué xí"
+    # Characters with several readings are left to the LLM
+    assert romanize("好", "mandarin") is None
+    assert romanize("你们", "mandarin") is None
+
+
+def test_check_reading(dictionaries):
+    assert check_reading("你好", "nǐ hǎo", "mandarin") is True
+    assert check_reading("你好", "ni3 hao3", "mandarin") is True
+    assert check_reading("你好", "nǐ hāo", "mandarin") is False
+    assert check_reading("你好", "nǐ", "mandarin") is False
+    # Any reading of a character is accepted
+    assert check_reading("好", "hào", "mandarin") is True
+    # The tones of 一 and 不 change with the next syllable
+    assert check_reading("一样", "yí yàng", "mandarin") is True
+    assert check_reading("不要", "bú yào", "mandarin") is True
+    assert check_reading("你好", "nei5 hou2", "cantonese") is True
+    assert check_reading("你们", "nǐ men", "mandarin") is None
+
+
+def test_fill_pronunciations(dictionaries):
+    card = MandarinFlashcard(
+        word="学习",
+        pinyin="",
+        english="to study",
+        sample_usage="我学习中文。",
+        sample_usage_english="I study Chinese.",
+        related_words=[
+            MandarinRelatedWord(
+                word="你好", pinyin="", english="hello", relationship="greeting"
+            )
+        ],
+    )
+    filled = fill_pronunciations(card)
+    assert filled.pinyin == "xué xí"
+    assert filled.related_words[0].pinyin == "nǐ hǎo"
+    assert card.pinyin == ""
+
+    cantonese = CantoneseFlashcard(
+        word="好",
+        jyutping="",
+        english="good",
+        sample_usage="好。",
+        sample_usage_english="Good.",
+    )
+    assert fill_pronunciations(cantonese) is None
@@ -0,0 +1,46 @@
+import io
+
+from tutor.utils.frequency import FrequencyIndex
+from tutor.utils.segmentation import iter_paragraphs, read_chunks, segment
+
+
+def test_segment_by_longest_match(tmp_path):
+    path = tmp_path / "words.idx"
+    FrequencyIndex.build(["我", "学习", "学习者", "中文", "卡拉OK"], path)
+    index = FrequencyIndex(path)
+
+    def matcher(text, start):
+        return index.longest_prefix(text, start)[0]
+
+    assert segment("我学习中文。", matcher) == ["我", "学习", "中文"]
+    assert segment("学习者喜欢卡拉OK!", matcher) == ["学习者", "喜", "欢", "卡拉OK"]
+    assert segment("Hello, 中文", matcher) == ["中文"]
+    index.close()
+
+
+def test_iter_paragraphs():
+    lines = ["第一段\n", "还是第一段\n", "\n", "\n", "第二段\n"]
+    assert list(iter_paragraphs(lines)) == ["第一段还是第一段", "第二段"]
+
+    # Long paragraphs and lines are cut, so memory stays bounded
+    lines = ["一二三\n", "四五\n", "六七八九十\n"]
+    assert list(iter_paragraphs(lines, max_chars=4)) == [
+        "一二三四五",
+        "六七八九",
+        "十",
+    ]
+
+
+def test_iter_paragraphs_without_line_breaks():
+    # A text with no line breaks is read in chunks and cut after sentences
+    text = io.StringIO("第一句。第二句！\n\n第三句？第四句。第五句")
+    chunks = read_chunks(text, size=3)
+    assert list(iter_paragraphs(chunks, max_chars=6)) == [
+        "第一句。第二句！",
+        "第三句？第四句。",
+        "第五句",
+    ]
+
+    # Or mid-sentence, if a sentence is too long
+    chunks = read_chunks(io.StringIO("一二三四五六七八"), size=3)
+    assert list(iter_paragraphs(chunks, max_chars=6)) == ["一二三四五六", "七八"]
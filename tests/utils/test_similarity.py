@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from tutor.utils.similarity import (
+    KIND_OVERLAP,
+    KIND_SIMILAR,
+    KIND_VARIANT,
+    DuplicateIndex,
+    english_shingles,
+    jaccard,
+    word_shingles,
+)
+
+
+@pytest.fixture
+def index():
+    index = DuplicateIndex()
+    index.add(1, "學習", "to study")
+    index.add(2, "学习者", "learner")
+    index.add(3, "你好", "hello")
+    index.add(4, "学生", "student")
+    index.add(5, "图书馆", "library")
+    index.add(6, "图书馆员", "librarian")
+    return index
+
+
+def test_word_shingles_are_simplified():
+    assert word_shingles("學習") == word_shingles("学习")
+    assert word_shingles("学习") == {"c:学", "c:习", "b:学习"}
+
+
+def test_english_shingles_drop_stopwords():
+    assert english_shingles("To study (a subject)") == {"e:study", "e:subject"}
+
+
+def test_jaccard():
+    assert jaccard(frozenset("ab"), frozenset("bc")) == pytest.approx(1 / 3)
+    assert jaccard(frozenset(), frozenset()) == 0.0
+
+
+def test_query_finds_variants_and_overlaps(index):
+    duplicates = index.query("学习")
+
+    assert [(d.key, d.kind) for d in duplicates] == [
+        (1, KIND_VARIANT),
+        (2, KIND_OVERLAP),
+    ]
+    assert duplicates[0].similarity == 1.0
+
+
+def test_query_with_english(index):
+    duplicates = index.query("学习", "to study")
+
+    assert duplicates[0].key == 1
+    assert duplicates[0].similarity == 1.0
+
+
+def test_query_ignores_unrelated_words(index):
+    assert index.query("谢谢") == []
+    # Sharing one character of two isn't enough
+    assert index.query("学校") == []
+
+
+def test_single_characters_are_not_overlaps():
+    index = DuplicateIndex()
+    index.add(1, "学", "to learn")
+
+    assert index.query("学生") == []
+
+
+def test_similar_above_threshold():
+    index = DuplicateIndex(threshold=0.3)
+    index.add(1, "电脑游戏", "computer game")
+
+    duplicates = index.query("电子游戏", "video game")
+
+    assert [(d.key, d.kind) for d in duplicates] == [(1, KIND_SIMILAR)]
+
+
+def test_find_duplicates(index):
+    pairs = {(key, d.key, d.kind) for key, d in index.find_duplicates()}
+
+    assert pairs == {(1, 2, KIND_OVERLAP), (5, 6, KIND_OVERLAP)}
+
+
+def test_add_rejects_repeated_keys(index):
+    assert 1 in index
+    with pytest.raises(ValueError):
+        index.add(1, "学习", "to study")
+
+
+def test_query_is_fast_on_large_decks():
+    index = DuplicateIndex()
+    for i in range(5000):
+        word = chr(0x4E00 + i % 3000) + chr(0x4E00 + (7 * i) % 3000)
+        index.add(i, word, f"meaning {i}")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.query("学习")
+    per_query = (time.perf_counter() - start) / 100
+
+    assert per_query < 0.001
@@ -0,0 +1,13 @@
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_background_review():
+    """Keep recorded turns from starting background LLM reviews in tests."""
+    with (
+        patch("tutor.web.app.review_in_background"),
+        patch("tutor.web.app.review_in_background_async"),
+    ):
+        yield
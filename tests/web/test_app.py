@@ -0,0 +1,333 @@
+import json
+import threading
+from unittest.mock import Mock, patch
+
+from tutor.llm.metrics import reset_llm_metrics
+from tutor.web.app import (
+    DIALOGUE_SYSTEM_PROMPT,
+    DialogueResponse,
+    _get_dialogue_messages,
+    ConversationReview,
+    GrammarFeedback,
+    create_app,
+    VocabItem,
+    get_conversation_review,
+    record_turn,
+    review_in_background,
+    start_session,
+    stream_dialogue_response,
+    wait_for_background_review,
+)
+from tutor.web.sessions import DialogueSession, SessionStore
+
+
+def _chunk(content):
+    return Mock(choices=[Mock(delta=Mock(content=content))], usage=None)
+
+
+def _session():
+    return DialogueSession(session_id="abc", scenario="restaurant")
+
+
+def _parse_events(body: str):
+    return [json.loads(event[len("data: ") :]) for event in body.split("\n\n") if event]
+
+
+RESPONSE_CHUNKS = [
+    '{"next_line_zh": "您',
+    "好，",
+    '要点菜吗？", "next_line_pinyin": "nín hǎo',
+    ', yào diǎn cài ma?", "next_line_en": "Hello, ready to order?"}',
+]
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_stream_dialogue_response(mock_openai, _):
+    mock_openai.return_value.chat.completions.create.return_value = [
+        _chunk(content) for content in RESPONSE_CHUNKS
+    ]
+
+    events = _parse_events("".join(stream_dialogue_response(_session(), "你好")))
+
+    assert events == [
+        {"type": "delta", "field": "next_line_zh", "text": "您"},
+        {"type": "delta", "field": "next_line_zh", "text": "好，"},
+        {"type": "delta", "field": "next_line_zh", "text": "要点菜吗？"},
+        {
+            "type": "field",
+            "field": "next_line_pinyin",
+            "value": "nín hǎo, yào diǎn cài ma?",
+        },
+        {"type": "field", "field": "next_line_en", "value": "Hello, ready to order?"},
+        {
+            "type": "done",
+            "response": {
+                "next_line_zh": "您好，要点菜吗？",
+                "next_line_pinyin": "nín hǎo, yào diǎn cài ma?",
+                "next_line_en": "Hello, ready to order?",
+            },
+        },
+    ]
+    assert mock_openai.return_value.chat.completions.create.call_args.kwargs["stream"]
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_stream_dialogue_response_falls_back_on_error(mock_openai, _):
+    mock_openai.return_value.chat.completions.create.side_effect = Exception("down")
+
+    events = _parse_events("".join(stream_dialogue_response(_session(), "你好")))
+
+    assert len(events) == 1
+    assert events[0]["type"] == "done"
+    assert events[0]["response"]["next_line_zh"] == "好的，让我们继续"
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_respond_stream_endpoint(mock_openai, _):
+    mock_openai.return_value.chat.completions.create.return_value = [
+        _chunk(content) for content in RESPONSE_CHUNKS
+    ]
+
+    sessions = SessionStore()
+    client = create_app(sessions).test_client()
+    session_id = client.post("/api/start-dialogue", json={}).json["session_id"]
+    response = client.post(
+        "/api/respond-stream", json={"session_id": session_id, "response": "你好"}
+    )
+
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    events = _parse_events(response.get_data(as_text=True))
+    assert events[-1]["response"]["next_line_zh"] == "您好，要点菜吗？"
+
+    # Both turns are recorded, so the client only ever sends the new one
+    assert sessions.get(session_id).transcript == (
+        "Tutor: 您好，请问想吃点什么？\nUser: 你好\nTutor: 您好，要点菜吗？"
+    )
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_metrics_endpoint_counts_llm_calls(mock_openai, _):
+    mock_openai.return_value.chat.completions.create.side_effect = Exception("down")
+    reset_llm_metrics()
+
+    client = create_app().test_client()
+    session_id = client.post("/api/start-dialogue", json={}).json["session_id"]
+    client.post("/api/respond", json={"session_id": session_id, "response": "你好"})
+
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    assert (
+        'tutor_llm_calls_total{call="dialogue",model="gpt-4o",outcome="error"} 1'
+        in response.get_data(as_text=True)
+    )
+    reset_llm_metrics()
+
+
+def test_dialogue_messages_only_grow_at_the_tail():
+    sessions = SessionStore()
+    session = sessions.get(start_session(sessions, "work")["session_id"])
+
+    first = _get_dialogue_messages(session, "我要去爬山。")
+    assert first[0] == {"role": "system", "content": DIALOGUE_SYSTEM_PROMPT}
+    assert first[1] == {"role": "system", "content": "The scenario is: work."}
+    assert first[2]["role"] == "assistant"
+    assert first[-1] == {"role": "user", "content": "我要去爬山。"}
+
+    reply = DialogueResponse(
+        next_line_zh="去哪座山？", next_line_pinyin=None, next_line_en=None
+    )
+    record_turn(sessions, session, "我要去爬山。", reply)
+    second = _get_dialogue_messages(session, "香山。")
+
+    # The previous prompt is an exact prefix of the next one, so it can be cached
+    assert second[: len(first)] == first
+    assert second[len(first)] == {
+        "role": "assistant",
+        "content": reply.model_dump_json(),
+    }
+    assert second[-1] == {"role": "user", "content": "香山。"}
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_review_only_sends_unreviewed_turns(mock_openai, _):
+    feedback = GrammarFeedback(
+        original="我要去爬山", correction="我打算去爬山", explanation="", example=""
+    )
+    parse = mock_openai.return_value.beta.chat.completions.parse
+    parse.return_value = Mock(
+        choices=[
+            Mock(
+                message=Mock(
+                    parsed=ConversationReview(
+                        grammar_feedback=[feedback], vocabulary_review=[]
+                    )
+                )
+            )
+        ]
+    )
+    sessions = SessionStore()
+    session = sessions.get(start_session(sessions, "work")["session_id"])
+    reply = DialogueResponse(
+        next_line_zh="去哪座山？", next_line_pinyin=None, next_line_en=None
+    )
+    record_turn(sessions, session, "我要去爬山", reply)
+
+    review = get_conversation_review(sessions, session)
+    assert review.grammar_feedback == [feedback]
+    assert "User: 我要去爬山" in parse.call_args.kwargs["messages"][1]["content"]
+
+    # Nothing new to review, so the stored review is returned without a call
+    assert get_conversation_review(sessions, session) == review
+    assert parse.call_count == 1
+
+    record_turn(sessions, session, "香山", reply)
+    review = get_conversation_review(sessions, session)
+    prompt = parse.call_args.kwargs["messages"][1]["content"]
+    assert "User: 香山" in prompt
+    assert "我要去爬山" not in prompt
+    # The same correction isn't repeated in the merged review
+    assert review.grammar_feedback == [feedback]
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_turns_are_reviewed_in_background(mock_openai, _):
+    vocab = VocabItem(word="爬山", pinyin="pá shān", meaning="to hike", usage_note="")
+    parse = mock_openai.return_value.beta.chat.completions.parse
+    parse.return_value = Mock(
+        choices=[
+            Mock(
+                message=Mock(
+                    parsed=ConversationReview(
+                        grammar_feedback=[], vocabulary_review=[vocab]
+                    )
+                )
+            )
+        ]
+    )
+    sessions = SessionStore()
+    client = create_app(sessions).test_client()
+    session_id = client.post("/api/start-dialogue", json={}).json["session_id"]
+    session = sessions.get(session_id)
+    reply = DialogueResponse(
+        next_line_zh="去哪座山？", next_line_pinyin=None, next_line_en=None
+    )
+    record_turn(sessions, session, "我要去爬山", reply)
+
+    review_in_background(sessions, session)
+    wait_for_background_review(session)
+    assert parse.call_count == 1
+    assert not session.unreviewed_transcript
+
+    # The final review only returns what was stored
+    response = client.post("/api/review", json={"session_id": session_id})
+    assert response.json["vocabulary_review"] == [vocab.model_dump()]
+    assert parse.call_count == 1
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_review_keeps_turns_recorded_after_a_reload(mock_openai, _, tmp_path):
+    sessions = SessionStore(max_sessions=1, db_path=str(tmp_path / "sessions.db"))
+    session_id = start_session(sessions, "work")["session_id"]
+    session = sessions.get(session_id)
+    reply = DialogueResponse(
+        next_line_zh="去哪座山？", next_line_pinyin=None, next_line_en=None
+    )
+    record_turn(sessions, session, "我要去爬山", reply)
+
+    def review_meanwhile(**kwargs):
+        # The session is evicted, reloaded and given a turn during the review
+        start_session(sessions, "work")
+        record_turn(sessions, sessions.get(session_id), "香山", reply)
+        return Mock(
+            choices=[
+                Mock(
+                    message=Mock(
+                        parsed=ConversationReview(
+                            grammar_feedback=[], vocabulary_review=[]
+                        )
+                    )
+                )
+            ]
+        )
+
+    mock_openai.return_value.beta.chat.completions.parse.side_effect = review_meanwhile
+    get_conversation_review(sessions, session)
+
+    stored = sessions.get(session_id)
+    assert stored is not session
+    assert "User: 香山" in stored.transcript
+    assert stored.unreviewed_transcript == "User: 香山\nTutor: 去哪座山？"
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app.OpenAI")
+def test_review_does_not_wait_for_background_reviews(mock_openai, _):
+    vocab = VocabItem(word="爬山", pinyin="pá shān", meaning="to hike", usage_note="")
+    started = threading.Event()
+    release = threading.Event()
+
+    def parse(**kwargs):
+        if threading.current_thread().name.startswith("review-"):
+            started.set()
+            release.wait(5)
+        return Mock(
+            choices=[
+                Mock(
+                    message=Mock(
+                        parsed=ConversationReview(
+                            grammar_feedback=[], vocabulary_review=[vocab]
+                        )
+                    )
+                )
+            ]
+        )
+
+    mock_openai.return_value.beta.chat.completions.parse.side_effect = parse
+    sessions = SessionStore()
+    client = create_app(sessions).test_client()
+    session_id = client.post("/api/start-dialogue", json={}).json["session_id"]
+    session = sessions.get(session_id)
+    reply = DialogueResponse(
+        next_line_zh="去哪座山？", next_line_pinyin=None, next_line_en=None
+    )
+    record_turn(sessions, session, "我要去爬山", reply)
+    review_in_background(sessions, session)
+    assert started.wait(5)
+
+    # The unreviewed turns are reviewed without waiting for the stuck review
+    response = client.post("/api/review", json={"session_id": session_id})
+    assert response.json["vocabulary_review"] == [vocab.model_dump()]
+
+    release.set()
+    wait_for_background_review(session)
+    assert sessions.get(session_id).vocabulary_review == [vocab.model_dump()]
+
+
+def test_serves_compressed_static_files():
+    client = create_app().test_client()
+
+    response = client.get("/", headers={"Accept-Encoding": "br"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "br"
+
+    response = client.get(
+        "/",
+        headers={"Accept-Encoding": "br", "If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+    assert client.get("/missing.js").status_code == 404
+    assert client.get("/api/scenarios").json == [
+        "restaurant",
+        "shopping",
+        "travel",
+        "work",
+    ]
@@ -0,0 +1,79 @@
+import gzip
+
+import brotli
+
+from tutor.web.assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    StaticAssets,
+)
+
+APP_JS = "console.log('你好');\n" * 100
+
+
+def _assets(tmp_path) -> StaticAssets:
+    (tmp_path / "index.html").write_text(
+        '<script src="https://cdn.example.com/react.js"></script>'
+        '<script type="text/babel" src="app.js"></script>'
+    )
+    (tmp_path / "app.js").write_text(APP_JS)
+    return StaticAssets(tmp_path)
+
+
+def _hashed_app_js(assets: StaticAssets) -> str:
+    index, _, _ = assets.response("")
+    return index.decode().split('src="')[2].split('"')[0]
+
+
+def test_index_refers_to_hashed_assets(tmp_path):
+    assets = _assets(tmp_path)
+    index, status, headers = assets.response("/")
+
+    assert status == 200
+    assert b'src="https://cdn.example.com/react.js"' in index
+    assert _hashed_app_js(assets).startswith("app.")
+    assert headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+    assert headers["Content-Type"] == "text/html; charset=utf-8"
+
+
+def test_hashed_assets_are_cached_forever(tmp_path):
+    assets = _assets(tmp_path)
+
+    body, status, headers = assets.response(_hashed_app_js(assets))
+    assert status == 200
+    assert body.decode() == APP_JS
+    assert headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+    # The unhashed name still works, but must be revalidated
+    _, _, headers = assets.response("app.js")
+    assert headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+
+    assert assets.response("missing.js") is None
+
+
+def test_compression_negotiation(tmp_path):
+    assets = _assets(tmp_path)
+
+    body, _, headers = assets.response("app.js", "gzip, deflate, br")
+    assert headers["Content-Encoding"] == "br"
+    assert brotli.decompress(body).decode() == APP_JS
+
+    body, _, headers = assets.response("app.js", "gzip, br;q=0")
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body).decode() == APP_JS
+
+    _, _, headers = assets.response("app.js", "")
+    assert "Content-Encoding" not in headers
+
+
+def test_etag_revalidation(tmp_path):
+    assets = _assets(tmp_path)
+    _, _, headers = assets.response("app.js", "gzip")
+
+    body, status, _ = assets.response("app.js", "gzip", headers["ETag"])
+    assert status == 304
+    assert body == b""
+
+    # A different encoding has a different ETag
+    _, status, _ = assets.response("app.js", "", headers["ETag"])
+    assert status == 200
@@ -0,0 +1,247 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+from tutor.web import app
+from tutor.web.app import (
+    SCENARIOS,
+    ConversationReview,
+    DialogueResponse,
+    review_in_background_async,
+)
+from tutor.web.scenarios import ScenarioOpener
+from tutor.web.async_app import create_async_app
+from tutor.web.sessions import SessionStore
+
+
+async def _slow_dialogue_response(session, user_response):
+    await asyncio.sleep(0.2)
+    return DialogueResponse(
+        next_line_zh=f"你说：{user_response}",
+        next_line_pinyin=None,
+        next_line_en=None,
+    )
+
+
+async def _start_session(client) -> str:
+    response = await client.post("/api/start-dialogue", json={"scenario": "work"})
+    return (await response.get_json())["session_id"]
+
+
+def test_start_dialogue():
+    async def run():
+        client = create_async_app().test_client()
+        response = await client.post(
+            "/api/start-dialogue", json={"scenario": "shopping"}
+        )
+        data = await response.get_json()
+        assert data.pop("session_id")
+        assert data == SCENARIOS["shopping"]
+
+        response = await client.post("/api/start-dialogue", json={"scenario": ""})
+        data = await response.get_json()
+        assert data.pop("session_id")
+        assert data == SCENARIOS["restaurant"]
+
+    asyncio.run(run())
+
+
+@patch("tutor.web.app.get_model", return_value="gpt-4o")
+@patch("tutor.web.app._get_async_openai_client")
+def test_start_dialogue_generates_and_caches_new_scenarios(mock_client, _):
+    opener = ScenarioOpener(
+        situation_zh="你在医院看病",
+        situation_en="You are seeing a doctor",
+        initial_line_zh="你哪里不舒服？",
+        initial_line_pinyin="nǐ nǎ lǐ bù shū fu?",
+        initial_line_en="What's bothering you?",
+    )
+    parse = mock_client.return_value.beta.chat.completions.parse = AsyncMock(
+        return_value=Mock(choices=[Mock(message=Mock(parsed=opener))])
+    )
+
+    async def run():
+        client = create_async_app().test_client()
+        for _ in range(2):
+            response = await client.post(
+                "/api/start-dialogue", json={"scenario": "at the doctor's"}
+            )
+            data = await response.get_json()
+            assert data["initial_line_zh"] == "你哪里不舒服？"
+
+    asyncio.run(run())
+    assert parse.call_count == 1
+
+
+def test_respond_does_not_block_on_llm_calls():
+    async def run():
+        client = create_async_app().test_client()
+        session_ids = [await _start_session(client) for _ in range(20)]
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/api/respond",
+                    json={"session_id": session_id, "response": str(i)},
+                )
+                for i, session_id in enumerate(session_ids)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+        data = [await response.get_json() for response in responses]
+        assert [d["next_line_zh"] for d in data] == [f"你说：{i}" for i in range(20)]
+        # The 20 LLM calls overlap instead of running one after another
+        assert elapsed < 2
+
+    with patch(
+        "tutor.web.async_app.get_dialogue_response_async",
+        side_effect=_slow_dialogue_response,
+    ):
+        asyncio.run(run())
+
+
+def test_respond_records_turns_off_the_event_loop():
+    threads = []
+
+    def fake_add_turns(sessions, session, user_response, response):
+        threads.append(threading.current_thread())
+        return session
+
+    async def run():
+        client = create_async_app().test_client()
+        session_id = await _start_session(client)
+        await client.post(
+            "/api/respond", json={"session_id": session_id, "response": "你好"}
+        )
+
+    with (
+        patch(
+            "tutor.web.async_app.get_dialogue_response_async",
+            side_effect=_slow_dialogue_response,
+        ),
+        patch("tutor.web.app._add_turns", side_effect=fake_add_turns),
+    ):
+        asyncio.run(run())
+
+    # Saving the session would otherwise block every other request
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
+
+
+def test_session_store_calls_run_off_the_event_loop():
+    threads = []
+
+    class RecordingStore(SessionStore):
+        def get(self, session_id):
+            threads.append(threading.current_thread())
+            return super().get(session_id)
+
+        def save(self, session):
+            threads.append(threading.current_thread())
+            super().save(session)
+
+    async def run():
+        client = create_async_app(RecordingStore()).test_client()
+        session_id = await _start_session(client)
+        await client.post("/api/review", json={"session_id": session_id})
+
+    with patch(
+        "tutor.web.async_app.get_conversation_review_async",
+        AsyncMock(
+            return_value=ConversationReview(grammar_feedback=[], vocabulary_review=[])
+        ),
+    ):
+        asyncio.run(run())
+
+    # SQLite reads and writes would otherwise block every other request
+    assert threads
+    assert threading.main_thread() not in threads
+
+
+def test_turns_are_reviewed_on_the_event_loop():
+    threads = []
+
+    async def fake_review(sessions, session):
+        threads.append(threading.current_thread())
+        await asyncio.sleep(0.01)
+        return app._record_review(
+            sessions,
+            session,
+            ConversationReview(grammar_feedback=[], vocabulary_review=[]),
+            len(session.transcript),
+        )
+
+    async def run():
+        sessions = SessionStore()
+        session = sessions.create("work")
+        session.add_turn("tutor", "周末有什么计划吗？")
+        review_in_background_async(sessions, session)
+        # A second review isn't started while the first is running
+        review_in_background_async(sessions, session)
+        await app._review_tasks[session.session_id]
+        return session
+
+    with patch("tutor.web.app.get_conversation_review_async", side_effect=fake_review):
+        session = asyncio.run(run())
+
+    assert threads == [threading.main_thread()]
+    assert not session.unreviewed_transcript
+    assert session.session_id not in app._review_tasks
+
+
+def test_review():
+    async def fake_review(sessions, session):
+        assert session.transcript == "Tutor: " + SCENARIOS["work"]["initial_line_zh"]
+        return ConversationReview(grammar_feedback=[], vocabulary_review=[])
+
+    async def run():
+        client = create_async_app().test_client()
+        session_id = await _start_session(client)
+        response = await client.post("/api/review", json={"session_id": session_id})
+        assert await response.get_json() == {
+            "grammar_feedback": [],
+            "vocabulary_review": [],
+        }
+
+    with patch(
+        "tutor.web.async_app.get_conversation_review_async", side_effect=fake_review
+    ):
+        asyncio.run(run())
+
+
+def test_respond_stream():
+    async def fake_stream(session, user_response, on_response):
+        yield 'data: {"type": "delta", "field": "next_line_zh", "text": "你"}\n\n'
+        await on_response(
+            DialogueResponse(
+                next_line_zh="你", next_line_pinyin=None, next_line_en=None
+            )
+        )
+        yield 'data: {"type": "done", "response": {}}\n\n'
+
+    async def run():
+        client = create_async_app().test_client()
+        session_id = await _start_session(client)
+        response = await client.post(
+            "/api/respond-stream", json={"session_id": session_id, "response": "你好"}
+        )
+        assert response.mimetype == "text/event-stream"
+        assert (await response.get_data(as_text=True)).count("data: ") == 2
+
+    with patch(
+        "tutor.web.async_app.stream_dialogue_response_async", side_effect=fake_stream
+    ):
+        asyncio.run(run())
+
+
+def test_unknown_session():
+    async def run():
+        client = create_async_app().test_client()
+        response = await client.post(
+            "/api/respond", json={"session_id": "missing", "response": "你好"}
+        )
+        assert response.status_code == 404
+
+    asyncio.run(run())
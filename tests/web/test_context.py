@@ -0,0 +1,80 @@
+from unittest.mock import Mock, patch
+
+from tutor.web import context
+from tutor.web.app import _get_dialogue_messages
+from tutor.web.sessions import DialogueSession, SessionStore
+
+
+def _long_session(turns: int) -> DialogueSession:
+    session = DialogueSession(session_id="abc", scenario="work")
+    for i in range(turns):
+        session.add_turn("tutor", f"第{i}个问题" * 20)
+        session.add_turn("user", f"第{i}个回答" * 20)
+    return session
+
+
+def test_needs_summary():
+    assert not context.needs_summary(_long_session(2))
+    assert context.needs_summary(_long_session(30))
+
+
+@patch("tutor.web.context.get_model", return_value="gpt-4o")
+@patch("tutor.web.context.OpenAI")
+def test_summarize_session_keeps_recent_messages(mock_openai, _):
+    mock_openai.return_value.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content=" They talked about work. "))]
+    )
+    sessions = SessionStore()
+    session = _long_session(30)
+
+    sessions.save(session)
+
+    context.summarize_session(sessions, session.session_id)
+
+    assert session.summary == "They talked about work."
+    assert session.summarized_messages == 60 - context.DIALOGUE_RECENT_MESSAGES
+    assert not context.needs_summary(session)
+
+    messages = _get_dialogue_messages(session, "好的")
+    assert messages[2] == {
+        "role": "system",
+        "content": "Summary of the conversation so far:\nThey talked about work.",
+    }
+    assert messages[3:-1] == session.messages[-context.DIALOGUE_RECENT_MESSAGES :]
+
+
+@patch("tutor.web.context.get_model", return_value="gpt-4o")
+@patch("tutor.web.context.OpenAI")
+def test_summary_keeps_turns_recorded_after_a_reload(mock_openai, _, tmp_path):
+    sessions = SessionStore(max_sessions=1, db_path=str(tmp_path / "sessions.db"))
+    session = _long_session(30)
+    sessions.save(session)
+
+    def summarize_meanwhile(**kwargs):
+        # The session is evicted, reloaded and given a turn during the summary
+        sessions.create("work")
+        with sessions.update(session.session_id) as stored:
+            stored.add_turn("user", "好的")
+        return Mock(choices=[Mock(message=Mock(content="They talked about work."))])
+
+    mock_openai.return_value.chat.completions.create.side_effect = summarize_meanwhile
+    context.summarize_session(sessions, session.session_id)
+
+    stored = sessions.get(session.session_id)
+    assert stored.summary == "They talked about work."
+    assert stored.summarized_messages == 60 - context.DIALOGUE_RECENT_MESSAGES
+    assert stored.history[-1] == {"role": "user", "content": "好的"}
+
+
+@patch("tutor.web.context.summarize_session")
+def test_maybe_summarize_runs_in_background(mock_summarize):
+    sessions = SessionStore()
+
+    context.maybe_summarize(sessions, _long_session(2))
+    context._summary_executor.submit(lambda: None).result()
+    mock_summarize.assert_not_called()
+
+    session = _long_session(30)
+    context.maybe_summarize(sessions, session)
+    context._summary_executor.submit(lambda: None).result()
+    mock_summarize.assert_called_once_with(sessions, session.session_id)
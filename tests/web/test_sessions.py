@@ -0,0 +1,62 @@
+from tutor.web.sessions import DialogueSession, SessionStore
+
+
+def test_add_turn_extends_transcript():
+    session = DialogueSession(session_id="abc", scenario="work")
+    session.add_turn("tutor", "周末有什么计划吗？")
+    session.add_turn("user", "我要去爬山。")
+
+    assert session.history == [
+        {"role": "tutor", "content": "周末有什么计划吗？"},
+        {"role": "user", "content": "我要去爬山。"},
+    ]
+    assert session.transcript == "Tutor: 周末有什么计划吗？\nUser: 我要去爬山。"
+
+
+def test_evicts_least_recently_used_sessions():
+    sessions = SessionStore(max_sessions=2)
+    first = sessions.create("work")
+    second = sessions.create("work")
+
+    # Touching the first session makes the second the least recently used
+    assert sessions.get(first.session_id) is first
+    sessions.create("work")
+
+    assert sessions.get(first.session_id) is first
+    assert sessions.get(second.session_id) is None
+    assert sessions.get(None) is None
+
+
+def test_sqlite_backend_reloads_evicted_sessions(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    sessions = SessionStore(max_sessions=1, db_path=db_path)
+    session = sessions.create("travel")
+    session.add_turn("tutor", "您要去哪里？")
+    sessions.save(session)
+    sessions.create("travel")
+
+    reloaded = sessions.get(session.session_id)
+    assert reloaded is not session
+    assert reloaded == session
+
+    # Sessions also survive a restart
+    assert SessionStore(db_path=db_path).get(session.session_id) == session
+
+
+def test_update_changes_the_stored_copy(tmp_path):
+    sessions = SessionStore(max_sessions=1, db_path=str(tmp_path / "sessions.db"))
+    session = sessions.create("travel")
+    lock = sessions.lock(session.session_id)
+    sessions.create("travel")
+
+    # Work that started before the eviction changes the reloaded copy, under the
+    # same lock
+    with sessions.update(session.session_id) as stored:
+        assert stored is not session
+        assert sessions.lock(session.session_id) is lock
+        stored.summary = "They planned a trip."
+
+    assert sessions.get(session.session_id).summary == "They planned a trip."
+
+    with sessions.update("missing") as stored:
+        assert stored is None